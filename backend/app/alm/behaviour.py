@@ -0,0 +1,301 @@
+# app/alm/behaviour.py
+# This file calibrates behavioural models (deposit decay, loan prepayment) per product segment from historical balances
+
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .columnar import PositionFrame
+from .curves import FX_SPOT
+from .models import AccountType
+
+# Non-maturity deposit and loan products, and the position category each one drives
+DEPOSIT_PRODUCTS = (AccountType.CHECKING.value, AccountType.SAVINGS.value)
+LOAN_PRODUCTS = (AccountType.LOAN.value, AccountType.MORTGAGE.value)
+PRODUCT_CATEGORIES = {
+    **{product: "deposits" for product in DEPOSIT_PRODUCTS},
+    **{product: "loans" for product in LOAN_PRODUCTS},
+}
+
+# Months of history fitted, ending with the calibration month
+HISTORY_MONTHS = 60
+
+# Fewest months with a balance a segment needs to be calibrated
+MIN_HISTORY_MONTHS = 6
+
+# Longest retention horizon fitted, in months
+MAX_HORIZON_MONTHS = 24
+
+# Quantile of the observed retentions taken as the stressed retention of deposits
+RETENTION_QUANTILE = 0.05
+
+# Gauss-Newton stopping rules of the decay fit
+MAX_ITERATIONS = 50
+STEP_TOLERANCE = 1e-10
+
+# Average month length, to turn remaining terms in days into months
+DAYS_PER_MONTH = 365.25 / 12
+
+
+def history_window(calibration_date: date, months: int = HISTORY_MONTHS) -> List[str]:
+    """Monthly periods (YYYY-MM) of the history fitted on a calibration date, oldest first."""
+    end = np.datetime64(calibration_date, "M")
+    return np.arange(end - np.timedelta64(months - 1, "M"), end + np.timedelta64(1, "M")).astype(str).tolist()
+
+
+def monthly_series(periods: Sequence[str], opening: float, rows: Sequence[tuple]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Turn monthly rollup buckets into dense series over `periods`.
+
+    Args:
+        periods: Months covered, in order.
+        opening: Balance before the first month.
+        rows: (period, inflow, outflow, count, balance) buckets, as read from a rollup.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Balance at the end of each month
+        (months without activity keep the previous balance), inflows and outflows.
+    """
+    index = {period: i for i, period in enumerate(periods)}
+    n = len(periods)
+    balance = np.full(n, np.nan)
+    inflow = np.zeros(n)
+    outflow = np.zeros(n)
+    for period, received, paid, _, closing in rows:
+        i = index[period]
+        balance[i], inflow[i], outflow[i] = closing, received, paid
+    last = np.maximum.accumulate(np.where(np.isnan(balance), -1, np.arange(n)))
+    balance = np.where(last >= 0, balance[np.maximum(last, 0)], opening)
+    return balance, inflow, outflow
+
+
+def retention_envelope(
+    balance: np.ndarray,
+    max_horizon: int = MAX_HORIZON_MONTHS,
+    quantile: float = RETENTION_QUANTILE,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Stressed retention of a deposit balance after 1, 2, ... months.
+
+    For each horizon, the balance that many months later is divided by the balance
+    at every start month, and the low `quantile` of those ratios is kept: the share
+    of the balance retained in all but the worst observed periods.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Horizons in months and the retention at each.
+    """
+    horizons, retention = [], []
+    for h in range(1, min(max_horizon, len(balance) - 1) + 1):
+        start, later = balance[:-h], balance[h:]
+        valid = start > 0
+        if valid.any():
+            horizons.append(h)
+            retention.append(np.quantile(later[valid] / start[valid], quantile))
+    return np.array(horizons, dtype=np.float64), np.array(retention)
+
+
+def fit_decay(
+    horizons: np.ndarray,
+    retention: np.ndarray,
+    start: Optional[Tuple[float, float]] = None,
+) -> Tuple[float, float, int, float]:
+    """
+    Fit retention(h) = core_share * exp(-decay_rate * h) by Gauss-Newton least squares.
+
+    The volatile share (1 - core_share) leaves straight away; the core runs off
+    exponentially. Refits start from the previous calibration, so on a history
+    that gained a month or two they converge within a couple of iterations.
+
+    Args:
+        horizons: Horizons in months.
+        retention: Observed retention at each horizon.
+        start: (core_share, decay_rate) to start from; by default a log-linear
+            regression gives the starting point.
+
+    Returns:
+        Tuple[float, float, int, float]: Core share (0 to 1), monthly decay rate
+        (non-negative), iterations used and the root mean square error.
+    """
+    if start is None:
+        positive = retention > 0
+        slope, intercept = (
+            np.polyfit(horizons[positive], np.log(retention[positive]), 1) if positive.sum() >= 2 else (0.0, 0.0)
+        )
+        start = (np.exp(intercept), -slope)
+    core, decay = float(np.clip(start[0], 0.0, 1.0)), max(float(start[1]), 0.0)
+    iterations = 0
+    while iterations < MAX_ITERATIONS:
+        iterations += 1
+        survival = np.exp(-decay * horizons)
+        jacobian = np.column_stack([survival, -core * horizons * survival])
+        step = np.linalg.lstsq(jacobian, retention - core * survival, rcond=None)[0]
+        new_core, new_decay = float(np.clip(core + step[0], 0.0, 1.0)), max(decay + float(step[1]), 0.0)
+        moved = max(abs(new_core - core), abs(new_decay - decay))
+        core, decay = new_core, new_decay
+        if moved < STEP_TOLERANCE:
+            break
+    rmse = float(np.sqrt(np.mean((retention - core * np.exp(-decay * horizons)) ** 2)))
+    return core, decay, iterations, rmse
+
+
+def fit_prepayment(balance: np.ndarray, inflow: np.ndarray, outflow: np.ndarray, remaining_months: Optional[float]) -> float:
+    """
+    Estimate the annual conditional prepayment rate (CPR) of a loan segment.
+
+    Each month's repayments, as a share of the balance outstanding at the start of
+    the month, are compared with straight-line scheduled amortization over the
+    remaining term; the excess is that month's single monthly mortality (SMM).
+    The balance-weighted SMM over the history is annualized as 1 - (1 - SMM)^12.
+    Loan balances may be held with either sign; repayments are the flows moving
+    them towards zero.
+
+    Args:
+        balance: Balance at the end of each month.
+        inflow: Inflows within each month.
+        outflow: Outflows within each month.
+        remaining_months: Balance-weighted remaining term at the end of the
+            history; if unknown, all repayments count as prepayments.
+
+    Returns:
+        float: Annual prepayment rate (0 to 1).
+    """
+    outstanding = np.abs(balance[:-1])
+    repaid = np.where(balance[:-1] < 0, inflow[1:], outflow[1:])
+    if remaining_months is None:
+        scheduled = np.zeros_like(outstanding)
+    else:
+        months_left = remaining_months + np.arange(len(outstanding), 0, -1)
+        scheduled = outstanding / np.maximum(months_left, 1.0)
+    total = outstanding.sum()
+    smm = np.clip(repaid - scheduled, 0.0, outstanding).sum() / total if total > 0 else 0.0
+    return float(1.0 - (1.0 - smm) ** 12)
+
+
+def calibrate_segment(
+    product: str,
+    currency: str,
+    balance: np.ndarray,
+    inflow: np.ndarray,
+    outflow: np.ndarray,
+    remaining_months: Optional[float] = None,
+    previous: Optional[Dict] = None,
+) -> Optional[Dict]:
+    """
+    Calibrate the behavioural model of one product segment.
+
+    Args:
+        product: Account type of the segment.
+        currency: Currency of the segment.
+        balance, inflow, outflow: Monthly series, as returned by monthly_series.
+        remaining_months: Remaining term of a loan segment (see fit_prepayment).
+        previous: Previous calibration of the segment, to start the fit from.
+
+    Returns:
+        Optional[Dict]: Segment parameters, or None if the product is not modelled
+        or has too little history.
+    """
+    category = PRODUCT_CATEGORIES.get(product)
+    active = np.flatnonzero(balance)
+    if category is None or not len(active):
+        return None
+    # History starts with the first month holding a balance
+    first = active[0]
+    balance, inflow, outflow = balance[first:], inflow[first:], outflow[first:]
+    if len(balance) < MIN_HISTORY_MONTHS:
+        return None
+
+    segment = {
+        "product": product,
+        "currency": currency,
+        "category": category,
+        "balance": float(abs(balance[-1])),
+        "core_share": None,
+        "decay_rate": None,
+        "prepayment_rate": None,
+        "observations": len(balance),
+        "iterations": 0,
+        "rmse": None,
+    }
+    if category == "deposits":
+        horizons, retention = retention_envelope(balance)
+        start = None
+        if previous is not None and previous.get("core_share") is not None:
+            start = (previous["core_share"], previous["decay_rate"])
+        core, decay, iterations, rmse = fit_decay(horizons, retention, start)
+        segment.update(core_share=core, decay_rate=decay, iterations=iterations, rmse=rmse)
+    else:
+        segment["prepayment_rate"] = fit_prepayment(balance, inflow, outflow, remaining_months)
+    return segment
+
+
+def segment_parameters(segments: Sequence[Dict]) -> Dict[Tuple[str, str], Dict[str, float]]:
+    """Behavioural parameters per (position category, currency), balance-weighted over the segments."""
+    totals: Dict[Tuple[str, str], Dict[str, float]] = {}
+    for segment in segments:
+        weight = segment["balance"]
+        entry = totals.setdefault((segment["category"], segment["currency"]), {"balance": 0.0})
+        entry["balance"] += weight
+        for name in ("core_share", "decay_rate", "prepayment_rate"):
+            if segment[name] is not None:
+                entry[name] = entry.get(name, 0.0) + weight * segment[name]
+    parameters: Dict[Tuple[str, str], Dict[str, float]] = {}
+    for key, entry in totals.items():
+        weight = entry.pop("balance")
+        parameters[key] = {name: value / weight if weight else 0.0 for name, value in entry.items()}
+        parameters[key]["balance"] = weight
+    return parameters
+
+
+def deposit_runoff(parameters: Dict[Tuple[str, str], Dict[str, float]], months: float = 1.0) -> Optional[float]:
+    """
+    Share of non-maturity deposits withdrawn within `months`: the volatile share and the decayed part of the core.
+
+    Currencies are weighted by their deposit balance in the base currency. Returns
+    None if no deposit segment is calibrated.
+    """
+    weights, runoffs = [], []
+    for (category, currency), p in parameters.items():
+        if category == "deposits" and "core_share" in p:
+            weights.append(p["balance"] * FX_SPOT.get(currency, 1.0))
+            runoffs.append(1.0 - p["core_share"] * np.exp(-p["decay_rate"] * months))
+    if not weights or not sum(weights):
+        return None
+    return float(np.average(runoffs, weights=weights))
+
+
+def stressed_runoff(behavioural: float, stress: float) -> float:
+    """Deposit runoff with a stress on top of the behavioural runoff, withdrawing `stress` of what remains."""
+    return behavioural + (1.0 - behavioural) * stress
+
+
+def survival(frame: PositionFrame, parameters: Dict[Tuple[str, str], Dict[str, float]], t: np.ndarray) -> np.ndarray:
+    """
+    Share of each position's balance still outstanding at each time, with behaviour applied.
+
+    Without behaviour a position is outstanding in full until its maturity. Calibrated
+    deposits follow their retention curve whatever their contractual maturity; calibrated
+    loans prepay at their CPR until maturity.
+
+    Args:
+        frame: Positions.
+        parameters: Parameters per (category, currency), from segment_parameters.
+        t: Times in years.
+
+    Returns:
+        np.ndarray: Outstanding shares, shape (positions, len(t)).
+    """
+    t = np.asarray(t, dtype=np.float64)
+    out = (frame.maturity_years[:, None] > t[None, :]).astype(np.float64)
+    for (category, currency), p in parameters.items():
+        if category not in frame.categories or currency not in frame.currencies:
+            continue
+        rows = (frame.category_codes == frame.categories.index(category)) & (
+            frame.currency_codes == frame.currencies.index(currency)
+        )
+        if "core_share" in p:
+            retained = np.where(t > 0, p["core_share"] * np.exp(-p["decay_rate"] * 12.0 * t), 1.0)
+            out[rows] = retained[None, :]
+        elif "prepayment_rate" in p:
+            out[rows] *= ((1.0 - p["prepayment_rate"]) ** t)[None, :]
+    return out
@@ -0,0 +1,219 @@
+# app/alm/columnar.py
+# This file defines the columnar view of positions consumed by the ALM analytics engines
+
+from datetime import date
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def encode(values: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+    """
+    Dictionary-encode a sequence of labels.
+
+    Args:
+        values: Labels to encode (currencies, categories, counterparties...).
+
+    Returns:
+        Tuple of the sorted distinct labels and an int32 code array indexing into them.
+    """
+    labels, codes = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+    return labels.tolist(), codes.astype(np.int32)
+
+
+def _merge_labels(parts: Sequence[Tuple[List[str], np.ndarray]]) -> Tuple[List[str], np.ndarray]:
+    """Re-encode several (labels, codes) pairs against their combined sorted labels."""
+    labels = sorted(set().union(*(part_labels for part_labels, _ in parts)))
+    index = np.array(labels, dtype=object)
+    codes = [
+        np.searchsorted(index, np.array(part_labels, dtype=object)).astype(np.int32)[part_codes]
+        if part_labels else part_codes
+        for part_labels, part_codes in parts
+    ]
+    return labels, np.concatenate(codes) if codes else np.empty(0, np.int32)
+
+
+class PositionFrame:
+    """
+    Column-oriented snapshot of assets and liabilities as of a given date.
+
+    Each attribute is a NumPy array with one entry per position, so engines can
+    work on whole columns instead of iterating over AssetLiability objects.
+    Text columns are dictionary-encoded: `currency_codes` indexes into
+    `currencies`, `category_codes` into `categories`, and so on.
+    """
+
+    def __init__(
+        self,
+        as_of_date: date,
+        ids: np.ndarray,
+        is_asset: np.ndarray,
+        amount: np.ndarray,
+        rate: np.ndarray,
+        fixed: np.ndarray,
+        maturity: np.ndarray,
+        currencies: List[str],
+        currency_codes: np.ndarray,
+        categories: List[str],
+        category_codes: np.ndarray,
+        counterparties: List[str],
+        counterparty_codes: np.ndarray,
+    ):
+        self.as_of_date = as_of_date
+        self.ids = ids                                  # Position identifiers (object array)
+        self.is_asset = is_asset                        # True for assets, False for liabilities
+        self.amount = amount                            # Outstanding notional
+        self.rate = rate                                # Contractual rate as a decimal
+        self.fixed = fixed                              # True for fixed-rate positions
+        self.maturity = maturity                        # Maturity date (datetime64[D])
+        self.currencies = currencies
+        self.currency_codes = currency_codes
+        self.categories = categories
+        self.category_codes = category_codes
+        self.counterparties = counterparties
+        self.counterparty_codes = counterparty_codes
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def sign(self) -> np.ndarray:
+        """+1 for assets and -1 for liabilities, as float64."""
+        return np.where(self.is_asset, 1.0, -1.0)
+
+    @property
+    def maturity_years(self) -> np.ndarray:
+        """Residual maturity in years from the as-of date, floored at zero."""
+        days = (self.maturity - np.datetime64(self.as_of_date, "D")).astype(np.float64)
+        return np.maximum(days, 0.0) / 365.0
+
+    def take(self, index: np.ndarray) -> "PositionFrame":
+        """Subset of the positions selected by a boolean mask or an index array, sharing the label lists."""
+        return PositionFrame(
+            as_of_date=self.as_of_date,
+            ids=self.ids[index],
+            is_asset=self.is_asset[index],
+            amount=self.amount[index],
+            rate=self.rate[index],
+            fixed=self.fixed[index],
+            maturity=self.maturity[index],
+            currencies=self.currencies,
+            currency_codes=self.currency_codes[index],
+            categories=self.categories,
+            category_codes=self.category_codes[index],
+            counterparties=self.counterparties,
+            counterparty_codes=self.counterparty_codes[index],
+        )
+
+    @classmethod
+    def concat(cls, frames: Sequence["PositionFrame"]) -> "PositionFrame":
+        """Stack frames valued as of the same date, merging their label dictionaries."""
+        currencies, currency_codes = _merge_labels([(f.currencies, f.currency_codes) for f in frames])
+        categories, category_codes = _merge_labels([(f.categories, f.category_codes) for f in frames])
+        counterparties, counterparty_codes = _merge_labels([(f.counterparties, f.counterparty_codes) for f in frames])
+        return cls(
+            as_of_date=frames[0].as_of_date,
+            ids=np.concatenate([f.ids for f in frames]),
+            is_asset=np.concatenate([f.is_asset for f in frames]),
+            amount=np.concatenate([f.amount for f in frames]),
+            rate=np.concatenate([f.rate for f in frames]),
+            fixed=np.concatenate([f.fixed for f in frames]),
+            maturity=np.concatenate([f.maturity for f in frames]),
+            currencies=currencies,
+            currency_codes=currency_codes,
+            categories=categories,
+            category_codes=category_codes,
+            counterparties=counterparties,
+            counterparty_codes=counterparty_codes,
+        )
+
+    def with_changes(self, rows: Sequence[tuple], deleted_ids: Iterable[str]) -> Tuple["PositionFrame", np.ndarray]:
+        """
+        Apply position changes without re-reading the unchanged positions.
+
+        Args:
+            rows: New content of inserted or amended positions, as stored rows
+                (POSITION_FIELDS order, interest rates in percent).
+            deleted_ids: IDs of removed positions.
+
+        Returns:
+            Tuple of the new frame and the boolean mask of the positions kept
+            from this one. Kept positions come first, in their original order,
+            followed by `rows`.
+        """
+        touched = {row[0] for row in rows}.union(deleted_ids)
+        keep = np.fromiter((id not in touched for id in self.ids), dtype=bool, count=len(self))
+        if not rows:
+            return self.take(keep), keep
+        added = PositionFrame.from_columns(self.as_of_date, *zip(*rows))
+        return PositionFrame.concat([self.take(keep), added]), keep
+
+    @classmethod
+    def from_columns(
+        cls,
+        as_of_date: date,
+        ids: Sequence[str],
+        types: Sequence[str],
+        categories: Sequence[str],
+        amounts: Sequence[float],
+        currencies: Sequence[str],
+        maturity_dates: Sequence,
+        interest_rates: Sequence[float],
+        fixed_rates: Sequence[bool],
+        counterparties: Sequence[Optional[str]],
+    ) -> "PositionFrame":
+        """
+        Build a frame from raw column values, e.g. straight from a database cursor.
+
+        Args:
+            as_of_date: Date the frame is valued as of.
+            ids, types, ...: One sequence per AssetLiability field, all of the same length.
+                Interest rates are in percent; maturity dates may be dates or ISO strings.
+
+        Returns:
+            PositionFrame: The columnar snapshot.
+        """
+        currency_labels, currency_codes = encode(currencies)
+        category_labels, category_codes = encode(categories)
+        counterparty_labels, counterparty_codes = encode([cp or "" for cp in counterparties])
+        return cls(
+            as_of_date=as_of_date,
+            ids=np.array(ids, dtype=object),
+            is_asset=np.asarray(types, dtype=object) == "asset",
+            amount=np.array(amounts, dtype=np.float64),
+            rate=np.array(interest_rates, dtype=np.float64) / 100.0,
+            fixed=np.array(fixed_rates, dtype=bool),
+            maturity=np.array(maturity_dates, dtype="datetime64[D]"),
+            currencies=currency_labels,
+            currency_codes=currency_codes,
+            categories=category_labels,
+            category_codes=category_codes,
+            counterparties=counterparty_labels,
+            counterparty_codes=counterparty_codes,
+        )
+
+    @classmethod
+    def from_positions(cls, positions: Iterable, as_of_date: date) -> "PositionFrame":
+        """
+        Build a frame from AssetLiability objects.
+
+        Args:
+            positions: Iterable of AssetLiability (or any object with the same attributes).
+            as_of_date: Date the frame is valued as of.
+
+        Returns:
+            PositionFrame: The columnar snapshot.
+        """
+        positions = list(positions)
+        return cls.from_columns(
+            as_of_date,
+            ids=[p.id for p in positions],
+            types=[p.type for p in positions],
+            categories=[p.category for p in positions],
+            amounts=[p.amount for p in positions],
+            currencies=[p.currency for p in positions],
+            maturity_dates=[p.maturity_date for p in positions],
+            interest_rates=[p.interest_rate for p in positions],
+            fixed_rates=[p.fixed_rate for p in positions],
+            counterparties=[p.counterparty for p in positions],
+        )
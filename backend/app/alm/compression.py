@@ -0,0 +1,296 @@
+# app/alm/compression.py
+# This file implements negotiated, streaming response compression (zstd, gzip) and its per-endpoint metrics
+
+import asyncio
+import threading
+import time
+import zlib
+from typing import Dict, Optional, Sequence, Tuple
+
+import pyarrow as pa
+from starlette.datastructures import Headers, MutableHeaders
+
+from .export import ChunkSink
+
+# Encodings offered, in order of preference when the client accepts several equally.
+# zstd compresses about as well as gzip for a fraction of the CPU time; gzip is always available.
+SUPPORTED_ENCODINGS = tuple(e for e in ("zstd",) if pa.Codec.is_available(e)) + ("gzip",)
+
+# zlib level of gzip bodies
+GZIP_LEVEL = 6
+
+# Bodies smaller than this are sent as they are
+MINIMUM_SIZE = 1024
+
+# Whole bodies at least this large are compressed on a worker thread instead of the event loop
+OFFLOAD_SIZE = 256 * 1024
+
+# Counters kept per endpoint and encoding
+METRIC_FIELDS = ("responses", "precompressed", "body_bytes", "wire_bytes", "compressed_bytes", "cpu_seconds")
+
+# Media types worth compressing; others (Parquet, images...) are compressed already
+COMPRESSIBLE_TYPES = ("application/json", "application/vnd.apache.arrow.stream", "text/")
+
+
+def negotiate(accept_encoding: Optional[str], available: Sequence[str] = SUPPORTED_ENCODINGS) -> Optional[str]:
+    """
+    Pick the content coding of a response from an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Raw header value, e.g. "gzip, deflate, br, zstd" or "gzip;q=0.5, *;q=0".
+        available: Encodings the server can produce, most preferred first.
+
+    Returns:
+        Optional[str]: The acceptable encoding with the highest quality (ties going to
+        the server's preference), or None to send the body unencoded.
+    """
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        if coding:
+            weights[coding] = weight
+    default = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for encoding in available:
+        weight = weights.get(encoding, default)
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+class Encoder:
+    """
+    Incremental compressor of one response body.
+
+    Output is produced as the compressor's internal buffers fill, so a streamed
+    body is compressed chunk by chunk in bounded memory. CPU time spent
+    compressing is accumulated in `cpu_seconds`.
+    """
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        self.cpu_seconds = 0.0
+        if encoding == "gzip":
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        else:
+            self._sink = ChunkSink()
+            self._stream = pa.CompressedOutputStream(pa.PythonFile(self._sink, mode="w"), encoding)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compressed bytes available after feeding `data`."""
+        start = time.thread_time()
+        if self.encoding == "gzip":
+            out = self._zlib.compress(data)
+        else:
+            self._stream.write(data)
+            out = self._sink.drain()
+        self.cpu_seconds += time.thread_time() - start
+        return out
+
+    def finish(self) -> bytes:
+        """The rest of the compressed body."""
+        start = time.thread_time()
+        if self.encoding == "gzip":
+            out = self._zlib.flush()
+        else:
+            self._stream.close()
+            out = self._sink.drain()
+        self.cpu_seconds += time.thread_time() - start
+        return out
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Compress a whole body."""
+    encoder = Encoder(encoding)
+    return encoder.compress(data) + encoder.finish()
+
+
+class CompressionMetrics:
+    """
+    Bytes on the wire and compression CPU time per endpoint and encoding.
+
+    Responses sent pre-compressed (e.g. from a cached snapshot) count towards
+    the savings but cost no compression time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    def record(self, endpoint: str, encoding: str, body_bytes: int, wire_bytes: int, cpu_seconds: Optional[float]) -> None:
+        """
+        Record one response.
+
+        Args:
+            endpoint: Method and route of the request.
+            encoding: Content coding sent ("identity" if none).
+            body_bytes: Size of the body before encoding.
+            wire_bytes: Size of the body sent.
+            cpu_seconds: Time spent compressing it, None if it was sent pre-compressed.
+        """
+        with self._lock:
+            stats = self._stats.setdefault((endpoint, encoding), dict.fromkeys(METRIC_FIELDS, 0))
+            stats["responses"] += 1
+            stats["body_bytes"] += body_bytes
+            stats["wire_bytes"] += wire_bytes
+            if cpu_seconds is None:
+                stats["precompressed"] += 1
+            elif encoding != "identity":
+                stats["compressed_bytes"] += body_bytes
+                stats["cpu_seconds"] += cpu_seconds
+
+    def report(self) -> Dict[str, Dict]:
+        """
+        Aggregated figures per endpoint.
+
+        Returns:
+            dict: Endpoint -> totals and the same figures per encoding ("identity" for
+            bodies sent as they are): responses (and how many were pre-compressed),
+            body bytes before and wire bytes after encoding, their ratio, compression
+            CPU seconds and CPU milliseconds per MB compressed.
+        """
+        with self._lock:
+            stats = {key: dict(values) for key, values in self._stats.items()}
+        totals: Dict[str, Dict[str, float]] = {}
+        by_encoding: Dict[str, Dict[str, Dict]] = {}
+        for (endpoint, encoding), values in sorted(stats.items()):
+            total = totals.setdefault(endpoint, dict.fromkeys(METRIC_FIELDS, 0))
+            for name in METRIC_FIELDS:
+                total[name] += values[name]
+            by_encoding.setdefault(endpoint, {})[encoding] = _figures(values)
+        return {endpoint: {**_figures(total), "by_encoding": by_encoding[endpoint]} for endpoint, total in totals.items()}
+
+
+def _figures(values: Dict[str, float]) -> Dict[str, float]:
+    """Reported figures of accumulated metrics."""
+    return {
+        "responses": values["responses"],
+        "precompressed": values["precompressed"],
+        "body_bytes": values["body_bytes"],
+        "wire_bytes": values["wire_bytes"],
+        "ratio": values["wire_bytes"] / values["body_bytes"] if values["body_bytes"] else 1.0,
+        "cpu_seconds": values["cpu_seconds"],
+        "cpu_ms_per_mb": 1e9 * values["cpu_seconds"] / values["compressed_bytes"] if values["compressed_bytes"] else 0.0,
+    }
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing the responses under `path_prefix` with the best encoding the client accepts.
+
+    - Bodies below `minimum_size`, media types not in COMPRESSIBLE_TYPES and
+      responses that already carry a Content-Encoding are sent as they are.
+    - A body sent in one message is compressed whole (on a worker thread if large)
+      and gets an exact Content-Length.
+    - A streamed body (e.g. an Arrow export) is compressed chunk by chunk as it
+      is produced and sent chunked.
+
+    Every response is recorded in `metrics` under its route.
+    """
+
+    def __init__(self, app, path_prefix: str = "/api/alm", minimum_size: int = MINIMUM_SIZE, metrics: Optional[CompressionMetrics] = None):
+        self.app = app
+        self.path_prefix = path_prefix
+        self.minimum_size = minimum_size
+        self.metrics = metrics or CompressionMetrics()
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        await self.app(scope, receive, _CompressingSender(self, scope, send, encoding).send)
+
+
+class _CompressingSender:
+    """Rewrites the response messages of one request."""
+
+    def __init__(self, middleware: CompressionMiddleware, scope, send, encoding: Optional[str]):
+        self.middleware = middleware
+        self.scope = scope
+        self._send = send
+        self.encoding = encoding
+        self.start: Optional[dict] = None
+        self.encoder: Optional[Encoder] = None
+        self.sent_encoding = "identity"
+        self.precompressed = False
+        self.body_bytes = 0
+        self.wire_bytes = 0
+
+    async def send(self, message: dict) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+        self.body_bytes += len(body)
+        if self.start is not None:
+            await self._begin(body, more)
+        elif self.encoder is not None:
+            out = self.encoder.compress(body)
+            if not more:
+                out += self.encoder.finish()
+            await self._send_body(out, more)
+        else:
+            await self._send_body(body, more)
+        if not more:
+            self._record()
+
+    async def _begin(self, body: bytes, more: bool) -> None:
+        """Decide on the encoding from the first body message and send the response start."""
+        start, self.start = self.start, None
+        headers = MutableHeaders(raw=start["headers"])
+        media_type = headers.get("content-type", "")
+        if "content-encoding" in headers:
+            # Encoded by the endpoint, e.g. a pre-compressed snapshot; its size before encoding is left in the request state
+            self.sent_encoding = headers["content-encoding"]
+            self.precompressed = True
+            self.body_bytes = self.scope.get("state", {}).get("uncompressed_length", len(body))
+        elif media_type.startswith(COMPRESSIBLE_TYPES):
+            if "accept-encoding" not in headers.get("vary", "").lower():
+                headers.add_vary_header("Accept-Encoding")
+            if self.encoding is not None and start["status"] not in (204, 304) and (more or len(body) >= self.middleware.minimum_size):
+                self.encoder = Encoder(self.encoding)
+                self.sent_encoding = self.encoding
+                headers["Content-Encoding"] = self.encoding
+                if more:
+                    if "content-length" in headers:
+                        del headers["content-length"]
+                    body = self.encoder.compress(body)
+                else:
+                    body = await self._compress_whole(body)
+                    headers["Content-Length"] = str(len(body))
+        await self._send(start)
+        await self._send_body(body, more)
+
+    async def _compress_whole(self, body: bytes) -> bytes:
+        encoder = self.encoder
+        if len(body) >= OFFLOAD_SIZE:
+            return await asyncio.to_thread(lambda: encoder.compress(body) + encoder.finish())
+        return encoder.compress(body) + encoder.finish()
+
+    async def _send_body(self, body: bytes, more: bool) -> None:
+        self.wire_bytes += len(body)
+        await self._send({"type": "http.response.body", "body": body, "more_body": more})
+
+    def _record(self) -> None:
+        route = self.scope.get("route")
+        endpoint = f"{self.scope['method']} {getattr(route, 'path', self.scope['path'])}"
+        if self.precompressed:
+            cpu_seconds = None
+        else:
+            cpu_seconds = self.encoder.cpu_seconds if self.encoder is not None else 0.0
+        self.middleware.metrics.record(endpoint, self.sent_encoding, self.body_bytes, self.wire_bytes, cpu_seconds)
@@ -0,0 +1,210 @@
+# app/alm/concentration.py
+# This file implements the concentration risk engine (counterparty, group, sector and currency exposures)
+
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .columnar import PositionFrame, encode
+from .curves import FX_SPOT
+
+UNCLASSIFIED = "unclassified"
+
+# Dimensions exposures are aggregated along
+DIMENSIONS = ("counterparty", "group", "sector", "currency")
+
+
+class CounterpartyHierarchy:
+    """
+    Index mapping each counterparty to its group of connected clients and its sector.
+
+    Counterparties that are not registered form a group of their own and fall in
+    the "unclassified" sector.
+    """
+
+    def __init__(self, entries: Optional[Dict[str, Tuple[str, str]]] = None):
+        self.entries: Dict[str, Tuple[str, str]] = dict(entries or {})
+
+    def register(self, counterparty: str, group: str, sector: str) -> None:
+        """Add or move a counterparty in the hierarchy."""
+        self.entries[counterparty] = (group, sector)
+
+    def group_of(self, counterparty: str) -> str:
+        return self.entries.get(counterparty, (counterparty, UNCLASSIFIED))[0]
+
+    def sector_of(self, counterparty: str) -> str:
+        return self.entries.get(counterparty, (counterparty, UNCLASSIFIED))[1]
+
+
+class TopNIndex:
+    """
+    Running totals per key with a max-heap for top-N queries.
+
+    Updates push a fresh heap entry and leave the old one behind; stale entries
+    are recognised because their value no longer matches the current total and
+    are discarded when they reach the top. Each update is O(log n) and a top-N
+    query only touches the top of the heap.
+    """
+
+    def __init__(self, totals: Optional[Dict[str, float]] = None):
+        self.totals: Dict[str, float] = dict(totals or {})
+        self.sum = sum(self.totals.values())
+        self.sum_squares = sum(v * v for v in self.totals.values())
+        self._heap = [(-value, key) for key, value in self.totals.items()]
+        heapq.heapify(self._heap)
+
+    def add(self, key: str, delta: float) -> None:
+        """Add `delta` to the total of `key`."""
+        old = self.totals.get(key, 0.0)
+        new = old + delta
+        self.sum += delta
+        self.sum_squares += new * new - old * old
+        if abs(new) < 1e-9:
+            self.totals.pop(key, None)
+        else:
+            self.totals[key] = new
+            heapq.heappush(self._heap, (-new, key))
+        # Rebuild once stale entries dominate so the heap stays proportional to the keys
+        if len(self._heap) > 2 * len(self.totals) + 64:
+            self._heap = [(-value, k) for k, value in self.totals.items()]
+            heapq.heapify(self._heap)
+
+    def top(self, n: int) -> List[Tuple[str, float]]:
+        """Return the `n` largest totals, largest first."""
+        result: List[Tuple[str, float]] = []
+        popped = []
+        seen = set()
+        while self._heap and len(result) < n:
+            entry = heapq.heappop(self._heap)
+            value, key = -entry[0], entry[1]
+            if key in seen or self.totals.get(key) != value:
+                continue  # Stale or duplicate entry
+            seen.add(key)
+            popped.append(entry)
+            result.append((key, value))
+        for entry in popped:
+            heapq.heappush(self._heap, entry)
+        return result
+
+    def hhi(self) -> float:
+        """Herfindahl-Hirschman index of the totals (0 to 1)."""
+        return self.sum_squares / (self.sum * self.sum) if self.sum else 0.0
+
+
+class ConcentrationEngine:
+    """
+    Aggregates asset exposures by counterparty, group, sector and currency.
+
+    The initial load aggregates the whole book with grouped reductions over the
+    columnar frame. After that each position's contribution is remembered, so a
+    loaded, amended or removed position only moves its own amounts between
+    totals and updates the rankings incrementally.
+    """
+
+    def __init__(self, hierarchy: CounterpartyHierarchy):
+        self.hierarchy = hierarchy
+        self.indexes: Dict[str, TopNIndex] = {dim: TopNIndex() for dim in DIMENSIONS}
+        self.contributions: Dict[str, Tuple[Tuple[str, ...], float]] = {}
+
+    def _keys(self, counterparty: str, currency: str) -> Tuple[str, ...]:
+        return (
+            counterparty,
+            self.hierarchy.group_of(counterparty),
+            self.hierarchy.sector_of(counterparty),
+            currency,
+        )
+
+    def load(self, frame: PositionFrame) -> None:
+        """Rebuild every aggregate from a position frame in one pass of grouped sums."""
+        assets = frame.is_asset
+        spot = np.array([FX_SPOT.get(ccy, 1.0) for ccy in frame.currencies])
+        exposure = (frame.amount * spot[frame.currency_codes])[assets]
+        counterparty_codes = frame.counterparty_codes[assets]
+        currency_codes = frame.currency_codes[assets]
+
+        groups, group_of = encode([self.hierarchy.group_of(cp) for cp in frame.counterparties] or [""])
+        sectors, sector_of = encode([self.hierarchy.sector_of(cp) for cp in frame.counterparties] or [""])
+        labels = {
+            "counterparty": (frame.counterparties, counterparty_codes),
+            "group": (groups, group_of[counterparty_codes]),
+            "sector": (sectors, sector_of[counterparty_codes]),
+            "currency": (frame.currencies, currency_codes),
+        }
+        for dim, (names, codes) in labels.items():
+            totals = np.bincount(codes, weights=exposure, minlength=len(names))
+            self.indexes[dim] = TopNIndex({names[i]: float(v) for i, v in enumerate(totals) if v})
+
+        self.contributions = {
+            pid: (self._keys(frame.counterparties[cp], frame.currencies[ccy]), float(value))
+            for pid, cp, ccy, value in zip(frame.ids[assets], counterparty_codes, currency_codes, exposure)
+        }
+
+    def remove(self, position_id: str) -> None:
+        """Withdraw a position's contribution from all aggregates."""
+        previous = self.contributions.pop(position_id, None)
+        if previous is not None:
+            keys, value = previous
+            for dim, key in zip(DIMENSIONS, keys):
+                self.indexes[dim].add(key, -value)
+
+    def upsert(self, position) -> None:
+        """
+        Apply a new or amended position incrementally.
+
+        Args:
+            position: AssetLiability (or any object with the same attributes).
+        """
+        self.remove(position.id)
+        if position.type != "asset":
+            return
+        counterparty = position.counterparty or ""
+        value = position.amount * FX_SPOT.get(position.currency, 1.0)
+        keys = self._keys(counterparty, position.currency)
+        self.contributions[position.id] = (keys, value)
+        for dim, key in zip(DIMENSIONS, keys):
+            self.indexes[dim].add(key, value)
+
+    def report(self, top_n: int, eligible_capital: float, large_exposure_threshold: float = 0.10) -> Dict:
+        """
+        Summarize concentration for the current book.
+
+        Args:
+            top_n: Number of counterparties and groups to rank.
+            eligible_capital: Capital base for large-exposure ratios.
+            large_exposure_threshold: Group exposure, as a fraction of capital,
+                from which an exposure is reported as large.
+
+        Returns:
+            dict: Totals, HHI per dimension, top-N rankings and large exposures.
+        """
+        total = self.indexes["counterparty"].sum
+
+        def ranked(dim: str, n: int) -> List[Dict]:
+            return [
+                {
+                    "name": name,
+                    "exposure": value,
+                    "share": value / total if total else 0.0,
+                    "capital_ratio": value / eligible_capital if eligible_capital else 0.0,
+                }
+                for name, value in self.indexes[dim].top(n)
+            ]
+
+        # Widen the ranking until it reaches groups below the large-exposure threshold
+        n = max(top_n, 16)
+        groups = ranked("group", n)
+        while len(groups) == n and groups[-1]["capital_ratio"] >= large_exposure_threshold:
+            n *= 2
+            groups = ranked("group", n)
+        large = [entry for entry in groups if entry["capital_ratio"] >= large_exposure_threshold]
+
+        return {
+            "total_exposure": total,
+            "hhi": {dim: index.hhi() for dim, index in self.indexes.items()},
+            "top_counterparties": ranked("counterparty", top_n),
+            "top_groups": groups[:top_n],
+            "by_sector": dict(self.indexes["sector"].totals),
+            "by_currency": dict(self.indexes["currency"].totals),
+            "large_exposures": large,
+        }
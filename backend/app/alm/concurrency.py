@@ -0,0 +1,109 @@
+# app/alm/concurrency.py
+# This file implements request coalescing and admission control for the heavy ALM endpoints
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request is shed instead of being computed.
+
+    Attributes:
+        status_code: 429 if the wait queue was full, 503 if the request waited too long.
+        retry_after: Seconds the client should wait before retrying.
+    """
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical requests onto one in-flight computation.
+
+    The first caller for a key starts the computation as a task of its own;
+    callers arriving with the same key while it runs await that task and all
+    receive its result (or its exception). Nothing is kept once it finishes,
+    so later requests always recompute. The task is shielded, so a caller
+    disconnecting does not cancel the work for the others.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0            # Requests that started a computation
+        self.followers = 0          # Requests that joined one already in flight
+
+    async def run(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.leaders += 1
+        else:
+            self.followers += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception so an abandoned failure is not reported as never retrieved
+        if not task.cancelled():
+            task.exception()
+
+
+class AdmissionControl:
+    """
+    Bounds the load one endpoint may put on the server.
+
+    At most `max_concurrent` computations run at once, each on a worker thread
+    so the event loop stays responsive. Up to `max_queued` more requests wait
+    for a slot, for at most `queue_timeout` seconds. Beyond that, requests are
+    shed at once with 429 (queue full) or after the wait with 503 (timed out),
+    so excess load is refused early instead of slowing down every request.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queued: int, queue_timeout: float = 10.0):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self.active = 0             # Computations running
+        self.queued = 0             # Requests waiting for a slot
+        self.rejected = 0           # Requests shed
+
+    def _reject(self, message: str, status_code: int) -> AdmissionRejected:
+        self.rejected += 1
+        logger.warning(f"{self.name}: {message} ({self.active} running, {self.queued} queued)")
+        return AdmissionRejected(message, status_code, max(1, round(self.queue_timeout)))
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run `func(*args)` on a worker thread once a slot is free.
+
+        Raises:
+            AdmissionRejected: If the request is shed.
+        """
+        if self.active + self.queued >= self.max_concurrent + self.max_queued:
+            raise self._reject(f"Too many pending {self.name} requests", 429)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._reject(f"Timed out waiting to run {self.name}", 503) from None
+        finally:
+            self.queued -= 1
+        self.active += 1
+        try:
+            return await asyncio.to_thread(func, *args)
+        finally:
+            self.active -= 1
+            self._slots.release()
+
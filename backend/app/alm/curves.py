@@ -0,0 +1,106 @@
+# app/alm/curves.py
+# This file defines yield curves and tenor grids shared by the ALM analytics engines
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Standard key-rate tenor grid, as (label, year fraction) pairs
+KEY_RATE_TENORS: List[tuple] = [
+    ("1M", 1 / 12), ("3M", 0.25), ("6M", 0.5), ("9M", 0.75), ("1Y", 1.0),
+    ("18M", 1.5), ("2Y", 2.0), ("3Y", 3.0), ("4Y", 4.0), ("5Y", 5.0),
+    ("6Y", 6.0), ("7Y", 7.0), ("8Y", 8.0), ("9Y", 9.0), ("10Y", 10.0),
+    ("12Y", 12.0), ("15Y", 15.0), ("20Y", 20.0), ("25Y", 25.0), ("30Y", 30.0),
+]
+
+
+class YieldCurve:
+    """
+    Zero-coupon yield curve defined on a set of tenor nodes.
+
+    Rates are stored as decimals (0.05 for 5%) with continuous compounding.
+    Between nodes the curve is linearly interpolated, and it is flat beyond
+    the first and last node.
+    """
+
+    def __init__(self, tenors: List[float], rates: List[float], currency: Optional[str] = None):
+        self.tenors = np.asarray(tenors, dtype=np.float64)
+        self.rates = np.asarray(rates, dtype=np.float64)
+        self.currency = currency
+        if self.tenors.shape != self.rates.shape or self.tenors.ndim != 1:
+            raise ValueError("Curve tenors and rates must be 1-D arrays of equal length")
+        if np.any(np.diff(self.tenors) <= 0):
+            raise ValueError("Curve tenors must be strictly increasing")
+
+    def zero_rates(self, t: np.ndarray) -> np.ndarray:
+        """Interpolate zero rates at the given year fractions."""
+        return np.interp(t, self.tenors, self.rates)
+
+    def discount_factors(self, t: np.ndarray) -> np.ndarray:
+        """Discount factors at the given year fractions."""
+        t = np.asarray(t, dtype=np.float64)
+        return np.exp(-self.zero_rates(t) * t)
+
+    def shifted(self, shift: float) -> "YieldCurve":
+        """Return a copy of the curve shifted in parallel by `shift` (decimal)."""
+        return YieldCurve(self.tenors, self.rates + shift, self.currency)
+
+
+# Reference curves used when no market curve has been loaded for a currency
+DEFAULT_CURVES: Dict[str, YieldCurve] = {
+    "TND": YieldCurve([0.25, 1.0, 2.0, 5.0, 10.0, 30.0], [0.080, 0.082, 0.084, 0.086, 0.088, 0.090], "TND"),
+    "USD": YieldCurve([0.25, 1.0, 2.0, 5.0, 10.0, 30.0], [0.045, 0.043, 0.041, 0.040, 0.042, 0.044], "USD"),
+    "EUR": YieldCurve([0.25, 1.0, 2.0, 5.0, 10.0, 30.0], [0.030, 0.028, 0.026, 0.026, 0.028, 0.030], "EUR"),
+}
+
+# Spot rates used to convert foreign-currency amounts into the base currency (TND)
+BASE_CURRENCY = "TND"
+FX_SPOT: Dict[str, float] = {"TND": 1.0, "USD": 3.10, "EUR": 3.35}
+
+
+# Interest rate shock sizes in basis points (parallel, short, long), following the Basel IRRBB standard
+SHOCK_SIZES_BP: Dict[str, tuple] = {
+    "TND": (400.0, 500.0, 300.0),
+    "USD": (200.0, 300.0, 150.0),
+    "EUR": (200.0, 250.0, 100.0),
+}
+DEFAULT_SHOCK_SIZES_BP = (200.0, 300.0, 150.0)
+
+# Weights of the parallel, short-end and long-end shocks in the six standard scenarios
+REGULATORY_SCENARIOS: Dict[str, tuple] = {
+    "parallel_up": (1.0, 0.0, 0.0),
+    "parallel_down": (-1.0, 0.0, 0.0),
+    "steepener": (0.0, -0.65, 0.9),
+    "flattener": (0.0, 0.8, -0.6),
+    "short_up": (0.0, 1.0, 0.0),
+    "short_down": (0.0, -1.0, 0.0),
+}
+
+
+def scenario_shift(scenario: str, currency: str, t: np.ndarray) -> np.ndarray:
+    """
+    Zero-rate shift (decimal) of a standard rate scenario at the given year fractions.
+
+    The short-end shock decays as exp(-t/4) and the long-end shock builds up as
+    1 - exp(-t/4), so steepeners and flatteners rotate the curve around the belly.
+    """
+    parallel, short, long = SHOCK_SIZES_BP.get(currency, DEFAULT_SHOCK_SIZES_BP)
+    w_parallel, w_short, w_long = REGULATORY_SCENARIOS[scenario]
+    decay = np.exp(-np.asarray(t, dtype=np.float64) / 4.0)
+    return (w_parallel * parallel + w_short * short * decay + w_long * long * (1.0 - decay)) / 10_000.0
+
+
+def get_curve(currency: str, curves: Optional[Dict[str, YieldCurve]] = None) -> YieldCurve:
+    """
+    Look up the curve for a currency, falling back to the default TND curve.
+
+    Args:
+        currency: ISO currency code.
+        curves: Optional mapping of currency code to curve overriding the defaults.
+
+    Returns:
+        YieldCurve: The curve to use for discounting flows in that currency.
+    """
+    if curves and currency in curves:
+        return curves[currency]
+    return DEFAULT_CURVES.get(currency, DEFAULT_CURVES["TND"])
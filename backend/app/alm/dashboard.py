@@ -0,0 +1,141 @@
+# app/alm/dashboard.py
+# This file implements the materialized dashboard aggregate with background refresh and ETags
+
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Hashable, Optional
+
+from .compression import MINIMUM_SIZE, SUPPORTED_ENCODINGS, compress
+
+logger = logging.getLogger(__name__)
+
+# Warning and critical thresholds for the dashboard risk scores, as fractions of eligible capital
+SCORE_THRESHOLDS = {
+    "eve_loss": (0.10, 0.15),           # Worst EVE loss under +/-200bp
+    "var": (0.05, 0.10),                # 1-day 99% market VaR
+    "large_exposure": (0.20, 0.25),     # Largest exposure to a group of connected clients
+}
+
+
+class Snapshot:
+    """
+    A serialized aggregate together with the source version it was built from.
+
+    The body is compressed with every supported content coding when the snapshot
+    is built (off the request path), so serving it compressed costs no CPU.
+    """
+
+    def __init__(self, body: bytes, version: Hashable):
+        self.body = body                                    # JSON-encoded payload
+        self.version = version                              # Source data version it reflects
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.built_at = datetime.now()
+        # Compressed bodies by content coding; small bodies are always sent as they are
+        self.encoded = {encoding: compress(body, encoding) for encoding in SUPPORTED_ENCODINGS} if len(body) >= MINIMUM_SIZE else {}
+
+    def representation(self, encoding: Optional[str]) -> tuple:
+        """
+        Body to send for a negotiated content coding.
+
+        Returns:
+            tuple: The body, its content coding (None if sent as is) and its entity tag.
+        """
+        if encoding not in self.encoded:
+            return self.body, None, self.etag
+        return self.encoded[encoding], encoding, f'{self.etag[:-1]}-{encoding}"'
+
+
+class MaterializedView:
+    """
+    Pre-serialized aggregate that is rebuilt off the request path.
+
+    Readers always get the latest complete snapshot, so a page load is a cache
+    read. When the source version moves on, the first reader to notice schedules
+    a rebuild on a background thread and keeps serving the previous snapshot
+    until the new one is ready. Only the very first build runs synchronously.
+    """
+
+    def __init__(self, build: Callable[[], bytes], version: Callable[[], Hashable], name: str = "view"):
+        self._build = build
+        self._version = version
+        self._name = name
+        self._snapshot: Optional[Snapshot] = None
+        self._lock = threading.Lock()
+        self._rebuilding = False
+
+    @property
+    def ready(self) -> bool:
+        """True once a snapshot exists, i.e. `get` no longer blocks on a build."""
+        return self._snapshot is not None
+
+    def get(self) -> Snapshot:
+        """Return the current snapshot, scheduling a refresh if it is out of date."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = self._materialize()
+                return self._snapshot
+        if snapshot.version != self._version():
+            self.refresh()
+        return snapshot
+
+    def refresh(self) -> None:
+        """Rebuild the snapshot on a background thread unless a rebuild is already running."""
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._rebuild, name=f"{self._name}-refresh", daemon=True).start()
+
+    def _materialize(self) -> Snapshot:
+        version = self._version()
+        return Snapshot(self._build(), version)
+
+    def _rebuild(self) -> None:
+        try:
+            # Loop in case the source changed again while we were building
+            while True:
+                snapshot = self._materialize()
+                self._snapshot = snapshot
+                if snapshot.version == self._version():
+                    break
+        except Exception:
+            logger.exception(f"Background refresh of {self._name} failed")
+        finally:
+            with self._lock:
+                self._rebuilding = False
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Evaluate an If-None-Match header against an entity tag (weak comparison).
+
+    Args:
+        if_none_match: Raw header value, e.g. '"abc", W/"def"' or '*'.
+        etag: Current strong entity tag, including quotes.
+
+    Returns:
+        bool: True if the client's copy is current and a 304 can be sent.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def appetite_score(value: float, warning: float, critical: float) -> float:
+    """
+    Map a metric onto a 0-100 risk score using its appetite thresholds.
+
+    The warning threshold maps to 50 and the critical threshold to 80, linearly,
+    whichever direction the metric deteriorates in. The score is clipped to 0-100.
+    """
+    if critical == warning:
+        return 80.0 if value >= critical else 0.0
+    score = 50.0 + 30.0 * (value - warning) / (critical - warning)
+    return float(min(100.0, max(0.0, score)))
@@ -0,0 +1,231 @@
+# app/alm/export.py
+# This file implements columnar export and import of positions and result tables (Arrow IPC stream / Parquet)
+
+from datetime import date
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .repository import POSITION_FIELDS, PositionChanges, PositionRepository
+from .validation import PositionValidator
+
+# Supported formats and their media types / file extensions
+MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+FILE_EXTENSIONS = {"arrow": "arrows", "parquet": "parquet"}
+
+# Arrow types of the position columns; low-cardinality text is dictionary-encoded
+POSITION_TYPES = {
+    "id": pa.string(),
+    "type": pa.dictionary(pa.int32(), pa.string()),
+    "category": pa.dictionary(pa.int32(), pa.string()),
+    "amount": pa.float64(),
+    "currency": pa.dictionary(pa.int32(), pa.string()),
+    "maturity_date": pa.date32(),
+    "interest_rate": pa.float64(),
+    "fixed_rate": pa.bool_(),
+    "counterparty": pa.string(),
+}
+
+
+class ChunkSink:
+    """Write-only file object that collects bytes until they are drained into the response."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _check_format(format: str) -> None:
+    if format not in MEDIA_TYPES:
+        raise ValueError(f"Unsupported export format '{format}', expected one of {sorted(MEDIA_TYPES)}")
+
+
+def _encode(batches: Iterator[pa.RecordBatch], schema: pa.Schema, format: str) -> Iterator[bytes]:
+    """
+    Serialize record batches incrementally, yielding bytes as each batch is written.
+
+    Each batch becomes one Parquet row group or one IPC message, so memory use is
+    bounded by the batch size however large the export is.
+    """
+    sink = ChunkSink()
+    if format == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    try:
+        for batch in batches:
+            writer.write_batch(batch)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def _position_batch(rows: List[tuple], columns: Sequence[str], schema: pa.Schema) -> pa.RecordBatch:
+    """Convert a batch of repository rows into a record batch."""
+    arrays = []
+    for name, values in zip(columns, zip(*rows)):
+        if name == "maturity_date":
+            arrays.append(pa.array(values, pa.string()).cast(pa.date32()))
+        elif name == "fixed_rate":
+            arrays.append(pa.array(values, pa.int8()).cast(pa.bool_()))
+        elif pa.types.is_dictionary(POSITION_TYPES[name]):
+            arrays.append(pa.array(values, pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, POSITION_TYPES[name]))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def export_positions(
+    repository: PositionRepository,
+    as_of_date: date,
+    format: str = "arrow",
+    columns: Optional[Sequence[str]] = None,
+    **filters,
+) -> Iterator[bytes]:
+    """
+    Stream the position snapshot as of a date as Arrow IPC or Parquet.
+
+    Projection and filters are pushed down to the repository, so unrequested
+    columns and filtered-out rows are never read.
+
+    Args:
+        repository: Position store to read from.
+        as_of_date: Date whose latest snapshot is exported.
+        format: "arrow" (IPC stream) or "parquet".
+        columns: Position fields to export; all fields by default.
+        **filters: type, categories, currencies, maturity_from, maturity_to
+            (see PositionRepository.iter_position_rows).
+
+    Returns:
+        Iterator[bytes]: The encoded file, chunk by chunk.
+
+    Raises:
+        ValueError: If the format or a column is unknown.
+    """
+    _check_format(format)
+    columns = list(columns or POSITION_FIELDS)
+    unknown = set(columns) - set(POSITION_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown position columns: {sorted(unknown)}")
+    schema = pa.schema(
+        [pa.field(name, POSITION_TYPES[name]) for name in columns],
+        metadata={"as_of_date": as_of_date.isoformat()},
+    )
+    batches = (
+        _position_batch(rows, columns, schema)
+        for rows in repository.iter_position_rows(as_of_date, columns, **filters)
+    )
+    return _encode(batches, schema, format)
+
+
+def export_table(table: Dict[str, Sequence], format: str = "arrow", batch_size: int = 65_536) -> Iterator[bytes]:
+    """
+    Stream an in-memory result table (column name -> values) as Arrow IPC or Parquet.
+
+    Raises:
+        ValueError: If the format is unknown.
+    """
+    _check_format(format)
+    data = pa.table(table)
+    return _encode(iter(data.to_batches(max_chunksize=batch_size)), data.schema, format)
+
+
+def import_positions(
+    repository: PositionRepository,
+    source: BinaryIO,
+    format: str = "arrow",
+    as_of_date: Optional[date] = None,
+    batch_size: int = 65_536,
+    corrections: Sequence[str] = (),
+) -> Tuple[PositionChanges, PositionValidator]:
+    """
+    Validate positions from an Arrow IPC stream or Parquet file and merge them into the store.
+
+    Files produced by export_positions with all columns can be read back as is.
+    Record batches are validated column-wise as they are read; rejected rows are
+    left out and reported.
+
+    Args:
+        repository: Position store to write to.
+        source: Readable binary file object.
+        format: "arrow" (IPC stream) or "parquet".
+        as_of_date: Snapshot to load into; defaults to the file's as_of_date
+            metadata, then to today.
+        batch_size: Rows read per Parquet batch.
+        corrections: Validation corrections to apply (see validation.CORRECTIONS).
+
+    Returns:
+        Tuple of the merged changes and the validator holding the anomaly report.
+
+    Raises:
+        ValueError: If the format or a correction is unknown, or position columns are missing.
+    """
+    _check_format(format)
+    if format == "parquet":
+        reader = pq.ParquetFile(source)
+        schema = reader.schema_arrow
+        present = [name for name in POSITION_FIELDS if name in schema.names]
+        batches = reader.iter_batches(batch_size=batch_size, columns=present)
+    else:
+        reader = pa.ipc.open_stream(source)
+        schema = reader.schema
+        batches = iter(reader)
+    missing = [name for name in POSITION_FIELDS if name not in schema.names and name != "counterparty"]
+    if missing:
+        raise ValueError(f"Position file is missing columns: {missing}")
+    if as_of_date is None:
+        stamp = (schema.metadata or {}).get(b"as_of_date")
+        as_of_date = date.fromisoformat(stamp.decode()) if stamp else date.today()
+
+    validator = PositionValidator(as_of_date, corrections)
+
+    def rows():
+        for batch in batches:
+            columns = []
+            for name in POSITION_FIELDS:
+                if name not in batch.schema.names:
+                    columns.append(np.full(batch.num_rows, None, dtype=object))
+                    continue
+                column = batch.column(name)
+                if pa.types.is_dictionary(column.type):
+                    column = column.cast(pa.string())
+                columns.append(column.to_numpy(zero_copy_only=False))
+            yield from validator.validate_columns(columns)
+
+    changes = repository.merge_positions(as_of_date, rows())
+    return changes, validator
@@ -0,0 +1,142 @@
+# app/alm/extraction.py
+# This file implements incremental extraction of positions from upstream data sources
+
+import sqlite3
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+# Changes are re-read from this far behind the watermark, to catch rows committed
+# late with an earlier timestamp. Re-read rows are recognized as unchanged by their hash.
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+
+class Extract:
+    """
+    Position rows pulled from a source in one extraction.
+
+    `rows` is consumed exactly once, by the merge. Connectors streaming a change
+    feed may fill `deleted_ids` and advance `watermark` while `rows` is consumed;
+    both are read only afterwards.
+    """
+
+    def __init__(
+        self,
+        rows: Iterable[Sequence],
+        complete: bool,
+        deleted_ids: Optional[List[str]] = None,
+        watermark: Optional[datetime] = None,
+    ):
+        self.rows = rows                                # Position rows in POSITION_FIELDS order
+        self.complete = complete                        # True for a full book, False for changes only
+        self.deleted_ids = deleted_ids or []            # Positions removed at the source
+        self.watermark = watermark                      # Source time up to which changes are included
+
+
+class SourceConnector:
+    """
+    Reads positions from an upstream system.
+
+    Connectors able to list changes since a point in time return incremental
+    extracts; the others return the full book, which the merge diffs against
+    the store.
+    """
+
+    def extract(self, since: Optional[datetime], as_of_date: date) -> Extract:
+        """
+        Pull positions from the source.
+
+        Args:
+            since: Watermark of the previous extraction, or None for an initial load.
+            as_of_date: Business date being loaded.
+
+        Returns:
+            Extract: The rows to merge.
+        """
+        raise NotImplementedError
+
+
+def _timestamp(value: Any) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+
+
+class DBAPIConnector(SourceConnector):
+    """
+    Connector for any DB-API 2.0 database.
+
+    `snapshot_query` selects the position fields (in POSITION_FIELDS order) of
+    the whole book. `changes_query`, if given, selects the same fields followed
+    by a deleted flag and a last-modified timestamp for the rows modified after
+    its single bound parameter; it is used once a watermark exists.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        snapshot_query: str,
+        changes_query: Optional[str] = None,
+        fetch_size: int = 10_000,
+    ):
+        self.connect = connect
+        self.snapshot_query = snapshot_query
+        self.changes_query = changes_query
+        self.fetch_size = fetch_size
+
+    def _fetch(self, query: str, params: Sequence = ()) -> Iterator[tuple]:
+        conn = self.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(self.fetch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+
+    def extract(self, since: Optional[datetime], as_of_date: date) -> Extract:
+        started = datetime.now()
+        if since is None or self.changes_query is None:
+            return Extract(self._fetch(self.snapshot_query), complete=True, watermark=started)
+
+        extract = Extract((), complete=False, watermark=since)
+
+        def changed_rows() -> Iterator[tuple]:
+            for row in self._fetch(self.changes_query, (since - WATERMARK_OVERLAP,)):
+                *fields, deleted, modified = row
+                extract.watermark = max(extract.watermark, _timestamp(modified))
+                if deleted:
+                    extract.deleted_ids.append(str(fields[0]))
+                else:
+                    yield fields
+
+        extract.rows = changed_rows()
+        return extract
+
+
+def _sqlite_connector(params: Dict[str, Any]) -> SourceConnector:
+    return DBAPIConnector(
+        lambda: sqlite3.connect(params["path"]),
+        params["snapshot_query"],
+        params.get("changes_query"),
+    )
+
+
+# Connector factories by the "type" connection parameter of a data source
+CONNECTOR_TYPES: Dict[str, Callable[[Dict[str, Any]], SourceConnector]] = {
+    "sqlite": _sqlite_connector,
+}
+
+
+def connector_for(connection_params: Dict[str, Any]) -> SourceConnector:
+    """
+    Build the connector described by a data source's connection parameters.
+
+    Raises:
+        ValueError: If no connector is available for the source type.
+    """
+    source_type = connection_params.get("type")
+    factory = CONNECTOR_TYPES.get(source_type)
+    if factory is None:
+        raise ValueError(f"No connector available for source type '{source_type}'")
+    return factory(connection_params)
@@ -0,0 +1,48 @@
+# app/alm/gap.py
+# This file implements the maturity gap: assets and liabilities running off within each time bucket
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from .behaviour import survival
+from .columnar import PositionFrame
+from .curves import FX_SPOT
+
+# Gap analysis periods shown on the dashboard, with their upper bound in years
+DASHBOARD_GAP_PERIODS = [("1M", 1 / 12), ("3M", 0.25), ("6M", 0.5), ("1Y", 1.0)]
+
+# Length in years of the units of a gap analysis time bucket label ("2W", "3M", "1Y", ...)
+BUCKET_UNITS = {"D": 1 / 365, "W": 7 / 365, "M": 1 / 12, "Y": 1.0}
+
+
+def bucket_years(label: str) -> float:
+    """
+    End in years of a gap analysis time bucket, from its label ("2W", "3M", "1Y", ...).
+
+    Raises:
+        ValueError: If the label is not a positive count followed by D, W, M or Y.
+    """
+    count, unit = label[:-1], label[-1:].upper()
+    if unit not in BUCKET_UNITS or not count.isdigit() or int(count) == 0:
+        raise ValueError(f"Invalid time bucket '{label}', expected e.g. '3M' or '1Y'")
+    return int(count) * BUCKET_UNITS[unit]
+
+
+def gap_by_period(
+    frame: PositionFrame, parameters: Dict[Tuple[str, str], Dict[str, float]], bounds: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Assets and liabilities (in TND) of a frame running off within each period, with behaviour applied.
+
+    Periods end at `bounds` (in years), the dashboard gap periods by default. Positions run off at
+    maturity, except where behaviour is calibrated: non-maturity deposits follow their calibrated
+    retention and loans prepay at their calibrated rate.
+    """
+    if bounds is None:
+        bounds = np.array([years for _, years in DASHBOARD_GAP_PERIODS])
+    spot = np.array([FX_SPOT.get(ccy, 1.0) for ccy in frame.currencies])
+    value = frame.amount * spot[frame.currency_codes]
+    # Share of each position running off within each period
+    share = -np.diff(survival(frame, parameters, np.append(0.0, bounds)), axis=1)
+    return value[frame.is_asset] @ share[frame.is_asset], value[~frame.is_asset] @ share[~frame.is_asset]
@@ -0,0 +1,218 @@
+# app/alm/market_risk.py
+# This file implements historical-simulation VaR and expected shortfall for the market risk books
+
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .curves import BASE_CURRENCY, DEFAULT_CURVES, FX_SPOT, KEY_RATE_TENORS
+from .sensitivity import BP, SensitivityEngine
+
+# Categories that make up the trading bond book
+BOND_CATEGORIES = ("bonds",)
+
+
+def default_risk_factors() -> List[str]:
+    """
+    Names of the risk factors tracked by default.
+
+    Interest-rate factors are "IR.<currency>.<tenor>" key-rate moves in basis
+    points; FX factors are "FX.<currency><base>" daily log returns of the spot.
+    """
+    factors = [f"IR.{ccy}.{label}" for ccy in DEFAULT_CURVES for label, _ in KEY_RATE_TENORS]
+    factors += [f"FX.{ccy}{BASE_CURRENCY}" for ccy in DEFAULT_CURVES if ccy != BASE_CURRENCY]
+    return factors
+
+
+class RiskFactorHistory:
+    """
+    Fixed-size rolling window of daily risk-factor returns.
+
+    Returns are held in a (window, factors) float32 ring buffer. Appending a day
+    overwrites the oldest slot in place, so the window never has to be copied
+    or shifted.
+    """
+
+    def __init__(self, factors: Sequence[str], window: int = 250):
+        self.factors = list(factors)
+        self.index = {name: i for i, name in enumerate(self.factors)}
+        self.window = window
+        self.returns = np.zeros((window, len(self.factors)), dtype=np.float32)
+        self.dates = np.full(window, np.datetime64("NaT", "D"))
+        self.count = 0      # Number of filled slots
+        self.head = 0       # Slot the next day will be written to
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def last_date(self) -> Optional[date]:
+        """Date of the most recent day in the window."""
+        if not self.count:
+            return None
+        return self.dates[(self.head - 1) % self.window].item()
+
+    def vector(self, returns: Dict[str, float]) -> np.ndarray:
+        """Convert a factor -> return mapping into a dense vector; missing factors are zero."""
+        vector = np.zeros(len(self.factors), dtype=np.float32)
+        for name, value in returns.items():
+            if name not in self.index:
+                raise ValueError(f"Unknown risk factor '{name}'")
+            vector[self.index[name]] = value
+        return vector
+
+    def append(self, day: date, returns: np.ndarray) -> int:
+        """
+        Add one day of factor returns, evicting the oldest day once the window is full.
+
+        Args:
+            day: Date of the returns; must be after the last date held.
+            returns: Dense vector of factor returns.
+
+        Returns:
+            int: The ring slot the day was written to.
+        """
+        last = self.last_date
+        if last is not None and day <= last:
+            raise ValueError(f"Returns for {day} are not after the last loaded date {last}")
+        slot = self.head
+        self.returns[slot] = returns
+        self.dates[slot] = np.datetime64(day, "D")
+        self.head = (self.head + 1) % self.window
+        self.count = min(self.count + 1, self.window)
+        return slot
+
+
+class HistoricalVaR:
+    """
+    Historical-simulation VaR and expected shortfall over a rolling window.
+
+    Each desk has a sensitivity vector over the risk factors; its scenario P&L
+    is the product of that vector with the factor-return history. The P&L matrix
+    is kept aligned with the ring slots of the history, so:
+
+    - a new day only computes one P&L column (desks x factors times factors),
+    - a desk whose sensitivities changed only recomputes its own row,
+    - unchanged desks reuse the previous day's P&L as is.
+    """
+
+    def __init__(self, history: RiskFactorHistory):
+        self.history = history
+        self.desks: List[str] = []
+        self.sensitivities = np.zeros((0, len(history.factors)))
+        self.pnl = np.zeros((0, history.window))
+
+    def set_sensitivities(self, sensitivities: Dict[str, np.ndarray]) -> int:
+        """
+        Replace desk sensitivities, recomputing P&L only for desks that changed.
+
+        Args:
+            sensitivities: Desk name -> dense sensitivity vector (P&L per unit factor return).
+
+        Returns:
+            int: Number of desks whose P&L rows were recomputed.
+        """
+        desks = list(sensitivities)
+        # Sized by the factor count, so a book without desks still gives a (0, factors) matrix
+        matrix = np.array([sensitivities[d] for d in desks], dtype=np.float64).reshape(len(desks), len(self.history.factors))
+        previous = {d: i for i, d in enumerate(self.desks)}
+        pnl = np.zeros((len(desks), self.history.window))
+        changed = []
+        for i, desk in enumerate(desks):
+            j = previous.get(desk)
+            if j is not None and np.array_equal(self.sensitivities[j], matrix[i]):
+                pnl[i] = self.pnl[j]
+            else:
+                changed.append(i)
+        if changed:
+            pnl[changed] = matrix[changed] @ self.history.returns.T
+        self.desks, self.sensitivities, self.pnl = desks, matrix, pnl
+        return len(changed)
+
+    def append_day(self, day: date, returns: Dict[str, float]) -> None:
+        """Roll the window forward by one day, computing only the new P&L column."""
+        vector = self.history.vector(returns)
+        slot = self.history.append(day, vector)
+        self.pnl[:, slot] = self.sensitivities @ vector
+
+    @staticmethod
+    def _tail_measures(pnl: np.ndarray, confidence: float) -> np.ndarray:
+        """VaR and ES (as positive losses) for each row of a scenario P&L matrix."""
+        n = pnl.shape[1]
+        tail = max(1, int(np.ceil((1.0 - confidence) * n)))
+        worst = np.partition(pnl, tail - 1, axis=1)[:, :tail]
+        var = -worst.max(axis=1)
+        es = -worst.mean(axis=1)
+        return np.stack([var, es], axis=1)
+
+    def run(self, confidence: float = 0.99, groups: Optional[Dict[str, List[str]]] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Compute VaR and expected shortfall for every desk, every group of desks and the total.
+
+        Args:
+            confidence: VaR confidence level, e.g. 0.99.
+            groups: Optional group name -> desk names; a group's P&L is the sum of its desks'.
+
+        Returns:
+            dict: Name -> {"var": ..., "expected_shortfall": ...}, including "TOTAL".
+        """
+        if not self.history.count:
+            raise ValueError("No risk-factor history has been loaded")
+        # Until the window has filled up, only the loaded slots hold scenarios
+        pnl = self.pnl[:, ~np.isnat(self.history.dates)]
+        names = list(self.desks)
+        rows = [pnl]
+        position = {d: i for i, d in enumerate(self.desks)}
+        for group, members in (groups or {}).items():
+            names.append(group)
+            rows.append(pnl[[position[m] for m in members]].sum(axis=0, keepdims=True))
+        names.append("TOTAL")
+        rows.append(pnl.sum(axis=0, keepdims=True))
+        measures = self._tail_measures(np.vstack(rows), confidence)
+        return {
+            name: {"var": float(var), "expected_shortfall": float(es)}
+            for name, (var, es) in zip(names, measures)
+        }
+
+
+def desk_sensitivities(engine: SensitivityEngine, factors: Sequence[str]) -> Dict[str, np.ndarray]:
+    """
+    Derive bond and FX desk sensitivities from the cached cash flows of the book.
+
+    The bond desk of a currency carries its key-rate P&L per basis point; the FX
+    desk of a foreign currency carries the base-currency value of the whole net
+    position in that currency. All sensitivities are expressed in the base currency.
+
+    Args:
+        engine: Sensitivity engine for the book.
+        factors: Risk factor names, in history column order.
+
+    Returns:
+        dict: Desk name ("bonds/USD", "fx/EUR", ...) -> sensitivity vector.
+    """
+    frame = engine.frame
+    index = {name: i for i, name in enumerate(factors)}
+    key_rates = engine.key_rate_shifts(BP)   # (currencies, categories, tenors) P&L for +1bp
+    eve = engine.eve()
+    bond_columns = [j for j, name in enumerate(frame.categories) if name in BOND_CATEGORIES]
+
+    desks: Dict[str, np.ndarray] = {}
+    for i, ccy in enumerate(frame.currencies):
+        spot = FX_SPOT.get(ccy)
+        if spot is None:
+            continue
+        if bond_columns:
+            vector = np.zeros(len(factors))
+            for k, label in enumerate(engine.tenor_labels):
+                column = index.get(f"IR.{ccy}.{label}")
+                if column is not None:
+                    vector[column] = key_rates[i, bond_columns, k].sum() * spot
+            if vector.any():
+                desks[f"bonds/{ccy}"] = vector
+        column = index.get(f"FX.{ccy}{BASE_CURRENCY}")
+        if column is not None:
+            vector = np.zeros(len(factors))
+            vector[column] = eve[i].sum() * spot
+            desks[f"fx/{ccy}"] = vector
+    return desks
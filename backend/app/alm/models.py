@@ -1,11 +1,11 @@
 # app/alm/models.py
 # This file defines data models for Asset-Liability Management (ALM) functionality
 
-from datetime import datetime
-from typing import List, Optional
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
 from enum import Enum
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 class RiskType(str, Enum):
     """
@@ -17,6 +17,75 @@ class RiskType(str, Enum):
     INTEREST_RATE = "interest_rate"   # Risk from fluctuations in interest rates
     MARKET = "market"                 # Risk from changes in market conditions
     CONCENTRATION = "concentration"   # Risk from over-exposure to a single entity or sector
+    CREDIT = "credit"                 # Risk of counterparties failing to repay
+
+class AssetLiability(BaseModel):
+    """
+    Model representing one balance sheet position (an asset or a liability).
+
+    Amounts are in the position's own currency; rates are in percent.
+    """
+    id: str                                         # Unique identifier of the position
+    type: str                                       # "asset" or "liability"
+    category: str                                   # Product category (e.g. "loans", "deposits")
+    amount: float                                   # Outstanding notional
+    currency: str                                   # ISO currency code (e.g. "TND", "USD")
+    maturity_date: date                             # Contractual maturity
+    interest_rate: float                            # Contractual rate in percent
+    fixed_rate: bool                                # True for fixed rate, False for floating
+    counterparty: Optional[str] = None              # Name of the counterparty, if known
+
+class DataSource(BaseModel):
+    """
+    Model representing a system positions are extracted from.
+    """
+    name: str                                       # Unique name of the source
+    source_type: str                                # Kind of source (e.g. "database", "api", "file")
+    connection_params: Dict[str, Any]               # Connection settings understood by its connector
+    last_extraction: Optional[datetime] = None      # Watermark of the last successful extraction
+
+class StressTestScenario(BaseModel):
+    """
+    Model representing a configured stress test scenario.
+    """
+    id: str                                         # Unique identifier of the scenario
+    name: str                                       # Display name
+    description: str                                # What the scenario simulates
+    risk_type: RiskType                             # Type of risk the scenario stresses
+    parameters: Dict[str, float]                    # Scenario parameters (e.g. "shock", "haircut", "deposit_runoff")
+    created_by: str                                 # User who created the scenario
+
+class RiskAppetite(BaseModel):
+    """
+    Model representing a risk appetite limit and the current value of its metric.
+    """
+    risk_type: RiskType                             # Type of risk the limit applies to
+    metric_name: str                                # Name of the metric (e.g. "LCR")
+    threshold_warning: float                        # Value at which the metric is flagged
+    threshold_critical: float                       # Value at which the limit is breached
+    current_value: float                            # Latest value of the metric
+
+class GapAnalysisRequest(BaseModel):
+    """
+    Model representing the parameters of a gap analysis.
+    """
+    as_of_date: date                                            # Date of the positions analysed
+    time_buckets: List[str] = ["1M", "3M", "6M", "1Y"]          # Labels of the time buckets
+    is_dynamic: bool = False                                    # Include new business (dynamic) or not (static)
+    scenario_id: Optional[str] = None                           # Optional scenario to apply
+
+class GapAnalysisReport(BaseModel):
+    """
+    Model representing the outcome of a gap analysis request, bucket by bucket.
+    """
+    as_of_date: date                                # Date of the positions analysed
+    time_buckets: List[str]                         # Labels of the time buckets
+    assets_by_bucket: List[float]                   # Assets maturing in each bucket
+    liabilities_by_bucket: List[float]              # Liabilities due in each bucket
+    gap_by_bucket: List[float]                      # Assets less liabilities in each bucket
+    cumulative_gap: List[float]                     # Running total of the gap
+    is_dynamic: bool                                # Whether the analysis is dynamic
+    scenario_details: Optional[Dict[str, Any]] = None   # Scenario applied, if any
 
 class RiskAssessment(BaseModel):
     """
@@ -43,6 +112,7 @@ class StressTestResult(BaseModel):
     impact_level: float = Field(..., ge=0, le=100)  # Severity of impact (0-100)
     description: str                                # Description of the stress test scenario
     actions_recommended: List[str]                  # Actions recommended to mitigate identified risks
+    impact_metrics: Dict[str, float] = {}           # Figures behind the impact level (amounts in TND)
 
 class GapAnalysisResult(BaseModel):
     """
@@ -69,4 +139,469 @@ class Dashboard(BaseModel):
     """
     current_risk_assessment: List[RiskAssessment]   # Current risk situation assessments
     recent_stress_tests: List[StressTestResult]     # Results from recent stress tests
-    gap_analysis: List[GapAnalysisResult]           # Recent gap analysis results
\ No newline at end of file
+    gap_analysis: List[GapAnalysisResult]           # Recent gap analysis results
+
+class SensitivityBreakdown(BaseModel):
+    """
+    Model representing interest-rate sensitivities of one slice of the balance sheet.
+
+    DV01 figures are the loss in economic value for a one basis point rise in rates.
+    """
+    eve: float                                      # Economic value of equity (PV assets - PV liabilities)
+    dv01: float                                     # Value change per 1bp parallel rise, sign-flipped
+    key_rate_dv01: List[float]                      # DV01 per key-rate tenor
+    key_rate_duration: List[float]                  # Key-rate durations relative to EVE
+
+class SensitivityReport(BaseModel):
+    """
+    Model representing the EVE sensitivity report for the whole book.
+
+    Breaks EVE, DV01 and key-rate durations down by currency and by category.
+    All amounts are in the base currency (TND).
+    """
+    as_of_date: date                                # Valuation date
+    bump_bp: float                                  # Size of the bumps used, in basis points
+    key_rate_tenors: List[str]                      # Labels of the key-rate tenors (e.g. "3M", "5Y")
+    total: SensitivityBreakdown                     # Whole-book sensitivities
+    by_currency: Dict[str, SensitivityBreakdown]    # Sensitivities per currency
+    by_category: Dict[str, SensitivityBreakdown]    # Sensitivities per category
+    eve_shocks: Dict[str, float]                    # EVE change under regulatory parallel shocks
+
+class ParameterRange(BaseModel):
+    """
+    Model representing an evenly spaced range of values for one scenario parameter.
+
+    A single step is a fixed value, so it needs `stop` equal to `start`.
+    """
+    start: float                                    # First value of the range
+    stop: float                                     # Last value of the range (inclusive)
+    steps: int = Field(1, ge=1, le=201)             # Number of values, including both ends
+
+    @model_validator(mode="after")
+    def _check_single_value(self) -> "ParameterRange":
+        if self.steps == 1 and self.stop != self.start:
+            raise ValueError("A range of one step must have stop equal to start; use steps >= 2 to span a range")
+        return self
+
+class ScenarioGridRequest(BaseModel):
+    """
+    Model representing a what-if scenario grid request.
+
+    Every combination of the three parameter ranges is evaluated.
+    """
+    as_of_date: Optional[date] = None                                   # Valuation date, defaults to today
+    rate_shock_bp: ParameterRange = ParameterRange(start=0, stop=0)     # Parallel rate shock in basis points
+    deposit_runoff: ParameterRange = ParameterRange(start=0, stop=0)    # Fraction of deposits withdrawn
+    haircut: ParameterRange = ParameterRange(start=0, stop=0)           # Haircut on liquid assets
+    behavioural: bool = True                                            # Apply deposit runoff on top of the calibrated runoff
+
+class GridMetric(BaseModel):
+    """
+    Model representing one metric of a scenario grid.
+
+    Values are nested lists following `dims`; a metric only spans the grid
+    axes it depends on. Undefined cells (e.g. a ratio with no outflows) are null.
+    """
+    dims: List[str]                                 # Grid axes spanned by the values, outermost first
+    values: Any                                     # Nested lists of floats
+
+class ScenarioGridResult(BaseModel):
+    """
+    Model representing the results of a what-if scenario grid.
+    """
+    as_of_date: date                                # Valuation date
+    coords: Dict[str, List[float]]                  # Values along each grid axis
+    metrics: Dict[str, GridMetric]                  # Impact metrics keyed by name, amounts in TND
+    behavioural_runoff: Optional[float] = None      # Calibrated runoff the deposit runoff axis was applied on top of
+
+class VaRFigure(BaseModel):
+    """
+    Model representing value-at-risk figures for one desk or aggregate.
+
+    Both figures are expressed as positive losses in the base currency.
+    """
+    var: float                                      # Loss not exceeded at the confidence level
+    expected_shortfall: float                       # Average loss beyond the VaR
+
+class MarketRiskReport(BaseModel):
+    """
+    Model representing the historical-simulation market risk report.
+
+    Covers the bond and FX books, per desk, per currency and in total.
+    """
+    as_of_date: date                                # Date of the positions
+    confidence: float                               # VaR confidence level (e.g. 0.99)
+    window_days: int                                # Number of historical scenarios used
+    history_end: Optional[date]                     # Most recent risk-factor date in the window
+    by_desk: Dict[str, VaRFigure]                   # Figures per desk (e.g. "bonds/USD", "fx/EUR")
+    by_currency: Dict[str, VaRFigure]               # Figures per currency, all desks combined
+    total: VaRFigure                                # Figures for the whole market risk book
+
+class MarketFactorReturns(BaseModel):
+    """
+    Model representing one day of risk-factor returns.
+
+    Interest-rate factors are moves in basis points; FX factors are log returns.
+    """
+    as_of_date: date                                # Date of the returns
+    returns: Dict[str, float]                       # Risk factor name -> return
+
+class ExposureEntry(BaseModel):
+    """
+    Model representing the aggregated exposure to one counterparty or group.
+    """
+    name: str                                       # Counterparty or group name
+    exposure: float                                 # Exposure in the base currency
+    share: float                                    # Fraction of total exposure
+    capital_ratio: float                            # Exposure as a fraction of eligible capital
+
+class ConcentrationReport(BaseModel):
+    """
+    Model representing the concentration risk report.
+
+    HHI values range from 0 (fully diversified) to 1 (single exposure).
+    """
+    as_of_date: date                                # Date of the positions
+    eligible_capital: float                         # Capital base for large-exposure ratios
+    total_exposure: float                           # Total asset exposure in the base currency
+    hhi: Dict[str, float]                           # HHI per dimension (counterparty, group, sector, currency)
+    top_counterparties: List[ExposureEntry]         # Largest counterparty exposures
+    top_groups: List[ExposureEntry]                 # Largest exposures to groups of connected clients
+    by_sector: Dict[str, float]                     # Exposure per sector
+    by_currency: Dict[str, float]                   # Exposure per currency
+    large_exposures: List[ExposureEntry]            # Groups at or above the large-exposure threshold
+
+class Anomaly(BaseModel):
+    """
+    Model representing one kind of anomaly found while validating positions.
+    """
+    rule: str                                       # Check that failed (e.g. "unknown_value", "negative")
+    field: str                                      # Position field checked
+    action: str                                     # "rejected" (row left out) or "corrected"
+    count: int                                      # Number of rows affected
+    rows: List[int]                                 # First affected rows, by position in the input (0-based)
+    ids: List[str]                                  # IDs of those rows
+
+class AnomalyReport(BaseModel):
+    """
+    Model representing the validation report of a position load.
+    """
+    checked: int                                    # Rows validated
+    rejected: int                                   # Rows left out of the load
+    corrected: int                                  # Rows loaded after automatic correction
+    issues: List[Anomaly]                           # Anomalies per rule and field
+
+class ExtractionResult(BaseModel):
+    """
+    Model representing the outcome of extracting positions from a data source.
+    """
+    source: str                                     # Data source name
+    as_of_date: date                                # Date the changes take effect
+    incremental: bool                               # True if only changes since the watermark were read
+    received: int                                   # Rows read from the source
+    inserted: int                                   # New positions
+    updated: int                                    # Amended positions
+    deleted: int                                    # Removed positions
+    unchanged: int                                  # Rows identical to the stored version
+    watermark: Optional[datetime]                   # Source time the next extraction resumes from
+    anomalies: AnomalyReport                        # Validation report of the rows read
+
+class NIIScenario(BaseModel):
+    """
+    Model representing the projected net interest income under one rate scenario.
+
+    Monthly figures are in the base currency, month 0 being the month after the as-of date.
+    """
+    interest_income: List[float]                    # Interest earned on assets per month
+    interest_expense: List[float]                   # Interest paid on liabilities per month
+    nii: List[float]                                # Net interest income per month
+    total_nii: float                                # NII over the whole horizon
+    change_vs_base: float                           # Horizon NII minus that of the base scenario
+    by_currency: Dict[str, float]                   # Horizon NII per position currency
+
+class NIIProjection(BaseModel):
+    """
+    Model representing a multi-period NII projection under the standard rate scenarios.
+    """
+    as_of_date: date                                # Date of the positions
+    horizon_months: int                             # Number of months projected
+    rollover: bool                                  # True if maturing balances are rolled over
+    months: List[str]                               # Projected months (YYYY-MM)
+    scenarios: Dict[str, NIIScenario]               # Projection per scenario, "base" first
+
+class ReverseStressRequest(BaseModel):
+    """
+    Model representing a reverse stress test request.
+
+    The search looks for the least severe combination of the scenario parameters
+    that pushes a risk appetite metric past its critical threshold. Setting the
+    largest move of a parameter to 0 leaves it out of the search.
+    """
+    as_of_date: Optional[date] = None                               # Valuation date, defaults to today
+    metric_name: str                                                # Risk appetite metric to break (e.g. "LCR")
+    threshold: Optional[float] = None                               # Overrides the critical threshold of the metric
+    rate_shock_bp: float = Field(500.0, ge=0, le=2000)              # Largest parallel rate shock searched, up or down
+    deposit_runoff: float = Field(1.0, ge=0, le=1)                  # Largest fraction of deposits withdrawn
+    haircut: float = Field(1.0, ge=0, le=1)                         # Largest haircut on liquid assets
+    tolerance: float = Field(0.001, gt=0, lt=1)                     # Resolution of the severity found
+    max_evaluations: int = Field(60, ge=10, le=500)                 # Budget of scenario evaluations
+
+class StressEvaluation(BaseModel):
+    """
+    Model representing one scenario evaluated during a reverse stress search.
+    """
+    scenario: Dict[str, float]                      # Parameter values
+    value: Optional[float]                          # Metric value, null if undefined
+    breach: bool                                    # True if the value is past the threshold
+
+class ReverseStressResult(BaseModel):
+    """
+    Model representing the outcome of a reverse stress test.
+
+    Severity is the largest parameter move as a fraction of its searched range.
+    """
+    as_of_date: date                                # Valuation date
+    metric_name: str                                # Metric searched on
+    threshold: float                                # Threshold the metric had to cross
+    higher_is_worse: bool                           # Direction in which the metric deteriorates
+    base_value: Optional[float]                     # Metric value without stress
+    breached: bool                                  # False if no scenario within the bounds breaches
+    severity: Optional[float]                       # Severity of the least severe breaching scenario
+    scenario: Optional[Dict[str, float]]            # Parameters of that scenario
+    metric_value: Optional[float]                   # Metric value under that scenario
+    converged: bool                                 # True if the severity was resolved to the tolerance
+    evaluations: int                                # Number of scenarios evaluated
+    trace: List[StressEvaluation]                   # Scenarios evaluated, in search order
+
+class AccountType(str, Enum):
+    """
+    Enumeration of customer account types, matching the frontend account store.
+    """
+    CHECKING = "Checking"
+    SAVINGS = "Savings"
+    LOAN = "Loan"
+    MORTGAGE = "Mortgage"
+    INVESTMENT = "Investment"
+    CERTIFICATE = "Certificate"
+    CREDIT_LINE = "Credit Line"
+    OTHER = "Other"
+
+class RiskLevel(str, Enum):
+    """
+    Enumeration of account risk levels, from the 0-100 account scores.
+    """
+    LOW = "Low"                       # Score of 80 or more
+    MEDIUM = "Medium"                 # Score from 60 to 80
+    HIGH = "High"                     # Score from 40 to 60
+    CRITICAL = "Critical"             # Score below 40
+
+class Account(BaseModel):
+    """
+    Model representing a customer account scored for risk.
+
+    Negative balances are amounts owed by the customer (loans, drawn credit lines).
+    """
+    id: str                                         # Unique identifier
+    account_number: str                             # Account number
+    account_type: AccountType                       # Kind of account
+    account_name: str                               # Display name
+    currency: str                                   # Currency code
+    balance: float                                  # Current balance
+    available_balance: Optional[float] = None       # Balance available for withdrawal
+    interest_rate: Optional[float] = None           # Interest rate in percent
+    maturity_date: Optional[date] = None            # Maturity of term accounts
+
+class AccountRiskAssessment(BaseModel):
+    """
+    Model representing the precomputed score of one account for one type of risk.
+
+    Scores follow the frontend risk store: 0-100, higher meaning safer.
+    """
+    account_id: str                                 # Account scored
+    risk_type: RiskType                             # Credit, liquidity or interest rate
+    score: float = Field(..., ge=0, le=100)         # Score, 100 being the safest
+    level: RiskLevel                                # Level derived from the score
+    scored_on: date                                 # Date the score is valid for
+    last_updated: datetime                          # When the score was computed
+    next_review_date: date                          # When the account is due for review
+
+class PortfolioRiskMetrics(BaseModel):
+    """
+    Model representing the account risk scores aggregated over the portfolio.
+
+    Averages follow the frontend risk store, including its overall weighting.
+    Categories not scored per account are listed in unscored_categories; their
+    averages are 0 and their weights still count towards the overall score.
+    """
+    scored_on: Optional[date]                       # Date the scores are valid for
+    accounts: int                                   # Number of accounts scored
+    credit_risk_score: float                        # Average credit score
+    market_risk_score: float                        # Average market score
+    liquidity_risk_score: float                     # Average liquidity score
+    operational_risk_score: float                   # Average operational score
+    interest_rate_risk_score: float                 # Average interest-rate score
+    overall_risk_score: float                       # Weighted average of the category scores
+    unscored_categories: List[str] = []             # Categories with no per-account scores
+    levels: Dict[str, Dict[str, int]]               # Number of accounts per risk type and level
+
+class TransactionType(str, Enum):
+    """
+    Enumeration of transaction types, matching the frontend transaction store.
+    """
+    DEPOSIT = "Deposit"
+    WITHDRAWAL = "Withdrawal"
+    TRANSFER = "Transfer"
+    INTEREST = "Interest"
+    FEE = "Fee"
+    LOAN_DISBURSEMENT = "Loan Disbursement"
+    LOAN_PAYMENT = "Loan Payment"
+
+class TransactionStatus(str, Enum):
+    """
+    Enumeration of transaction statuses, matching the frontend transaction store.
+    """
+    PENDING = "Pending"
+    COMPLETED = "Completed"
+    FAILED = "Failed"
+    CANCELLED = "Cancelled"
+
+class Transaction(BaseModel):
+    """
+    Model representing a transaction between customer accounts.
+
+    The amount leaves `from_account_id` and enters `to_account_id`; either may be
+    missing for flows to or from outside the bank (e.g. a cash deposit or a fee).
+    """
+    id: str                                                 # Unique identifier
+    type: TransactionType                                   # Kind of transaction
+    status: TransactionStatus = TransactionStatus.COMPLETED # Only completed transactions count in flows
+    from_account_id: Optional[str] = None                   # Account debited
+    to_account_id: Optional[str] = None                     # Account credited
+    amount: float = Field(..., gt=0)                        # Amount moved, in the transaction currency
+    currency: str                                           # Currency code
+    description: str = ""                                   # Free-text description
+    date: datetime                                          # When the transaction took place
+    reference: str = ""                                     # External reference
+
+class FlowBucket(BaseModel):
+    """
+    Model representing the flows of one day or month.
+    """
+    period: str                                     # Day (YYYY-MM-DD) or month (YYYY-MM)
+    inflow: float                                   # Amounts credited
+    outflow: float                                  # Amounts debited, as a positive number
+    net: float                                      # Inflow minus outflow
+    count: int                                      # Number of completed transaction legs
+    balance: float                                  # Balance implied by all flows up to the end of the period
+
+class FlowSeries(BaseModel):
+    """
+    Model representing the flow and balance series of an account or product.
+
+    Only periods with activity are listed; the balance carries over in between.
+    Balances are implied by the recorded transactions, starting from zero.
+    """
+    account_id: Optional[str]                       # Account, for an account series
+    product: Optional[str]                          # Account type, for a product series
+    currency: Optional[str]                         # Currency of a product series
+    granularity: str                                # "day" or "month"
+    start: date                                     # First day covered
+    end: date                                       # Last day covered
+    opening_balance: float                          # Balance before `start`
+    buckets: List[FlowBucket]                       # Periods with activity, in order
+
+class FTPFigures(BaseModel):
+    """
+    Model representing transfer pricing figures of one slice of the balance sheet.
+
+    Rates are balance-weighted, in percent. Asset margins are the client rate less
+    the transfer rate and premium; liability margins are the reverse.
+    """
+    balance: float                                  # Balance in the base currency
+    client_rate: float                              # Contractual rate
+    transfer_rate: float                            # Funding curve rate
+    liquidity_premium: float                        # Liquidity premium add-on
+    margin: float                                   # Net interest margin after transfer pricing
+    margin_income: float                            # Annual margin in the base currency
+
+class FTPReport(BaseModel):
+    """
+    Model representing the funds transfer pricing margin report of the book.
+    """
+    as_of_date: date                                # Date of the positions
+    method: str                                     # "matched_maturity", "repricing_term" or "pooled"
+    liquidity_premium: bool                         # True if liquidity premiums are included
+    priced: int                                     # Positions priced in this run
+    reused: int                                     # Positions keeping the rate locked in an earlier run
+    by_category: Dict[str, FTPFigures]              # Figures per category
+    by_currency: Dict[str, FTPFigures]              # Figures per currency
+    total: FTPFigures                               # Figures for the whole book
+
+class BehaviouralSegment(BaseModel):
+    """
+    Model representing the calibrated behaviour of one product segment (account type and currency).
+
+    Non-maturity deposits carry a core share and a decay rate: the volatile share
+    leaves straight away and the core runs off exponentially. Loans carry a
+    prepayment rate on top of their scheduled amortization.
+    """
+    product: str                                    # Account type
+    currency: str                                   # Currency of the segment
+    category: str                                   # Position category the segment's behaviour applies to
+    balance: float                                  # Latest balance (absolute), in the segment currency
+    core_share: Optional[float] = None              # Stable share of deposits, 0 to 1
+    decay_rate: Optional[float] = None              # Monthly decay rate of core deposits
+    prepayment_rate: Optional[float] = None         # Annual conditional prepayment rate (CPR) of loans
+    observations: int                               # Months of history fitted
+    iterations: int                                 # Fit iterations (few when started from the previous fit)
+    rmse: Optional[float] = None                    # Root mean square error of the deposit fit
+
+class BehaviouralCalibration(BaseModel):
+    """
+    Model representing the behavioural calibration of every product segment on a date.
+    """
+    calibration_date: date                          # Date of the calibration
+    deposit_runoff: Optional[float] = None          # Calibrated one-month runoff of non-maturity deposits
+    segments: List[BehaviouralSegment]              # Calibrated segments
+
+class SandboxRequest(BaseModel):
+    """
+    Model representing a request to open a what-if sandbox.
+    """
+    as_of_date: Optional[date] = None               # Date of the base positions, defaults to today
+
+class Sandbox(BaseModel):
+    """
+    Model representing a what-if sandbox: hypothetical position changes laid over the positions of a date.
+    """
+    id: str                                         # Sandbox ID
+    as_of_date: date                                # Date of the base positions
+    created: datetime                               # Time the sandbox was opened
+    added: int                                      # Positions added or amended
+    removed: int                                    # Base positions removed
+
+class WhatIfFigure(BaseModel):
+    """
+    Model representing a metric of the base positions and of the sandbox.
+
+    Undefined values (e.g. a coverage ratio with no outflows) are null.
+    """
+    base: Optional[float] = None                    # Value for the base positions
+    what_if: Optional[float] = None                 # Value with the sandbox changes applied
+    delta: Optional[float] = None                   # What-if value less base value
+
+class WhatIfResult(BaseModel):
+    """
+    Model representing the gap, NII and liquidity impact of a sandbox's changes.
+    """
+    sandbox_id: str                                 # Sandbox evaluated
+    as_of_date: date                                # Date of the base positions
+    horizon_months: int                             # NII horizon
+    deposit_runoff: float                           # Deposit runoff of the liquidity figures, on top of the calibrated runoff
+    haircut: float                                  # Haircut on liquid assets of the liquidity figures
+    gap_periods: List[str]                          # Gap periods, in order
+    gap: List[WhatIfFigure]                         # Gap per period, in TND
+    nii: Dict[str, WhatIfFigure]                    # Horizon NII per rate scenario, "base" first
+    liquidity_buffer: WhatIfFigure                  # Liquid assets after haircut
+    deposit_outflows: WhatIfFigure                  # Deposit runoff
+    liquidity_coverage: WhatIfFigure                # Liquidity buffer over deposit outflows
@@ -0,0 +1,66 @@
+# app/alm/overlay.py
+# This file implements what-if overlays: hypothetical position changes evaluated against an untouched base snapshot
+
+from typing import Callable, Iterable, Sequence
+
+import numpy as np
+
+from .columnar import PositionFrame
+
+# Number of columns of a stored position row (POSITION_FIELDS)
+POSITION_ROW_LENGTH = 9
+
+
+class Overlay:
+    """
+    A layer of added, amended and removed positions over a base snapshot.
+
+    The base frame is shared with every other user of the snapshot and is never
+    copied or modified. The overlay only holds two small frames: `added` (new
+    positions and the new versions of amended ones) and `removed` (the base rows
+    the overlay hides: removed positions and the old versions of amended ones).
+
+    For a metric that is a sum of per-position contributions (gap buckets, NII,
+    liquidity buffer and outflows...), the what-if value is
+
+        metric(base) + metric(added) - metric(removed)
+
+    so a what-if run only evaluates the overlay's positions next to a base
+    result computed once for every sandbox.
+    """
+
+    def __init__(self, base: PositionFrame, rows: Sequence[tuple], hidden_ids: Iterable[str]):
+        """
+        Args:
+            base: Snapshot the overlay applies to.
+            rows: Added or amended positions, as stored rows.
+            hidden_ids: IDs of the base positions the overlay removes or amends.
+        """
+        hidden = set(hidden_ids)
+        self.base = base
+        columns = list(zip(*rows)) if rows else [[] for _ in range(POSITION_ROW_LENGTH)]
+        self.added = PositionFrame.from_columns(base.as_of_date, *columns)
+        hide = np.fromiter((id in hidden for id in base.ids), dtype=bool, count=len(base)) if hidden else np.zeros(len(base), dtype=bool)
+        self.removed = base.take(hide)
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.removed)
+
+    def apply(self, base_value: np.ndarray, contribution: Callable[[PositionFrame], np.ndarray]) -> np.ndarray:
+        """
+        What-if value of an additive metric.
+
+        Args:
+            base_value: Metric of the base snapshot.
+            contribution: Metric of a frame of positions; only called on the
+                overlay's (non-empty) frames.
+
+        Returns:
+            np.ndarray: The base value plus the added positions' contribution less the removed ones'.
+        """
+        value = np.asarray(base_value, dtype=np.float64)
+        if len(self.added):
+            value = value + contribution(self.added)
+        if len(self.removed):
+            value = value - contribution(self.removed)
+        return value
@@ -0,0 +1,31 @@
+# app/alm/repository/__init__.py
+# This package implements the persistence layer behind ALMService: one repository per domain, with an embedded SQLite backend
+
+from .accounts import ACCOUNT_COLUMNS, ACCOUNT_FIELDS, AccountRepository, SQLiteAccountRepository, account_to_row
+from .base import DEFAULT_DB_PATH, MERGE_BATCH_SIZE, OPEN_END, SQLiteDatabase, row_hash
+from .behaviour import BEHAVIOUR_FIELDS, BehaviourRepository, SQLiteBehaviourRepository
+from .ftp import FTPRepository, SQLiteFTPRepository
+from .positions import (
+    POSITION_COLUMNS, POSITION_FIELDS, SNAPSHOT_SQL, VALID_AT_SQL, PositionChanges, PositionRepository,
+    SQLitePositionRepository, position_to_row, row_to_position, storage_row,
+)
+from .reference import ReferenceDataRepository, SQLiteReferenceDataRepository
+from .sandboxes import SandboxRepository, SQLiteSandboxRepository
+from .sources import SourceRepository, SQLiteSourceRepository
+from .store import ALMRepository, SQLiteRepository
+from .transactions import (
+    TRANSACTION_COLUMNS, TRANSACTION_FIELDS, SQLiteTransactionRepository, TransactionRepository,
+    row_to_transaction, transaction_to_row,
+)
+
+__all__ = [
+    "ACCOUNT_COLUMNS", "ACCOUNT_FIELDS", "BEHAVIOUR_FIELDS", "DEFAULT_DB_PATH", "MERGE_BATCH_SIZE", "OPEN_END",
+    "POSITION_COLUMNS", "POSITION_FIELDS", "SNAPSHOT_SQL", "TRANSACTION_COLUMNS", "TRANSACTION_FIELDS", "VALID_AT_SQL",
+    "ALMRepository", "AccountRepository", "BehaviourRepository", "FTPRepository", "PositionChanges",
+    "PositionRepository", "ReferenceDataRepository", "SandboxRepository", "SourceRepository", "TransactionRepository",
+    "SQLiteAccountRepository", "SQLiteBehaviourRepository", "SQLiteDatabase", "SQLiteFTPRepository",
+    "SQLitePositionRepository", "SQLiteReferenceDataRepository", "SQLiteRepository", "SQLiteSandboxRepository",
+    "SQLiteSourceRepository", "SQLiteTransactionRepository",
+    "account_to_row", "position_to_row", "row_hash", "row_to_position", "row_to_transaction", "storage_row",
+    "transaction_to_row",
+]
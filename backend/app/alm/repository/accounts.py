@@ -0,0 +1,241 @@
+# app/alm/repository/accounts.py
+# This file implements the store of accounts and their persisted risk scores
+
+import itertools
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from ..models import Account, AccountRiskAssessment, RiskType
+from .base import MERGE_BATCH_SIZE, SQLiteRepositoryBase, row_hash
+
+ACCOUNT_FIELDS = [
+    "id", "account_number", "account_type", "account_name", "currency",
+    "balance", "available_balance", "interest_rate", "maturity_date",
+]
+ACCOUNT_COLUMNS = ", ".join(ACCOUNT_FIELDS)
+ACCOUNT_RISK_COLUMNS = "account_id, risk_type, score, level, scored_on, last_updated, next_review_date"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    id                 TEXT PRIMARY KEY,
+    account_number     TEXT NOT NULL,
+    account_type       TEXT NOT NULL,
+    account_name       TEXT NOT NULL,
+    currency           TEXT NOT NULL,
+    balance            REAL NOT NULL,
+    available_balance  REAL,
+    interest_rate      REAL,
+    maturity_date      TEXT,
+    row_hash           BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_accounts_maturity ON accounts (maturity_date);
+
+CREATE TABLE IF NOT EXISTS account_risk (
+    account_id        TEXT NOT NULL REFERENCES accounts (id) ON DELETE CASCADE,
+    risk_type         TEXT NOT NULL,
+    score             REAL NOT NULL,
+    level             TEXT NOT NULL,
+    scored_on         TEXT NOT NULL,
+    last_updated      TEXT NOT NULL,
+    next_review_date  TEXT NOT NULL,
+    PRIMARY KEY (account_id, risk_type)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_account_risk_level ON account_risk (risk_type, level, score);
+"""
+
+
+def account_to_row(a: Account) -> tuple:
+    """Stored row of an Account (in ACCOUNT_FIELDS order)."""
+    return (
+        a.id, a.account_number, a.account_type.value, a.account_name, a.currency, float(a.balance),
+        a.available_balance, a.interest_rate, a.maturity_date.isoformat() if a.maturity_date else None,
+    )
+
+
+class AccountRepository(ABC):
+    """
+    Storage interface of the accounts and their risk scores.
+
+    Besides the scores, the store keeps the date they were last brought up to
+    date and the portfolio summary computed from them.
+    """
+
+    @abstractmethod
+    def merge_accounts(self, rows: Iterable[tuple]) -> List[tuple]:
+        ...
+
+    @abstractmethod
+    def delete_accounts(self, ids: Sequence[str]) -> int:
+        ...
+
+    @abstractmethod
+    def iter_account_rows(
+        self,
+        maturity_windows: Optional[Sequence[Tuple[date, date]]] = None,
+        batch_size: int = 65_536,
+    ) -> Iterator[List[tuple]]:
+        ...
+
+    @abstractmethod
+    def save_account_risk(self, rows: Iterable[tuple]) -> None:
+        ...
+
+    @abstractmethod
+    def list_account_risk(
+        self,
+        account_id: Optional[str] = None,
+        risk_type: Optional[RiskType] = None,
+        level: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[AccountRiskAssessment]:
+        ...
+
+    @abstractmethod
+    def summarize_account_risk(self) -> List[tuple]:
+        ...
+
+    @abstractmethod
+    def risk_scored_on(self) -> Optional[date]:
+        ...
+
+    @abstractmethod
+    def set_risk_scored_on(self, scored_on: date) -> None:
+        ...
+
+    @abstractmethod
+    def load_risk_summary(self) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def save_risk_summary(self, summary: Dict[str, Any]) -> None:
+        ...
+
+
+class SQLiteAccountRepository(SQLiteRepositoryBase, AccountRepository):
+    """SQLite implementation of the account store.  The scoring date and portfolio summary are kept in the settings table."""
+
+    SCHEMA = SCHEMA
+
+    def merge_accounts(self, rows: Iterable[tuple]) -> List[tuple]:
+        """
+        Insert or update account rows (in ACCOUNT_FIELDS order), skipping unchanged ones.
+
+        Rows are compared with the stored accounts by a hash of their fields, so
+        only new and amended accounts are written. Their scores are kept until
+        rescored. Returns the rows written.
+        """
+        changed: List[tuple] = []
+        rows = iter(rows)
+        conn = self._connection()
+        with conn:
+            while True:
+                batch = {row[0]: row for row in itertools.islice(rows, MERGE_BATCH_SIZE)}
+                if not batch:
+                    break
+                stored = dict(conn.execute(
+                    f"SELECT id, row_hash FROM accounts WHERE id IN ({', '.join('?' * len(batch))})", list(batch)
+                ))
+                writes = []
+                for id, row in batch.items():
+                    digest = row_hash(row)
+                    if stored.get(id) != digest:
+                        writes.append((*row, digest))
+                        changed.append(row)
+                # Upsert rather than replace, which would cascade to the stored scores
+                conn.executemany(
+                    f"INSERT INTO accounts ({ACCOUNT_COLUMNS}, row_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (id) DO UPDATE SET account_number = excluded.account_number, "
+                    "account_type = excluded.account_type, account_name = excluded.account_name, "
+                    "currency = excluded.currency, balance = excluded.balance, "
+                    "available_balance = excluded.available_balance, interest_rate = excluded.interest_rate, "
+                    "maturity_date = excluded.maturity_date, row_hash = excluded.row_hash",
+                    writes,
+                )
+        return changed
+
+    def delete_accounts(self, ids: Sequence[str]) -> int:
+        """Delete accounts and their scores. Returns the number of accounts deleted."""
+        with self._connection() as conn:
+            return conn.executemany("DELETE FROM accounts WHERE id = ?", ((id,) for id in ids)).rowcount
+
+    def iter_account_rows(
+        self,
+        maturity_windows: Optional[Sequence[Tuple[date, date]]] = None,
+        batch_size: int = 65_536,
+    ) -> Iterator[List[tuple]]:
+        """
+        Stream account rows in batches, optionally only those maturing within windows.
+
+        Args:
+            maturity_windows: (after, up to) pairs; an account is read if its
+                maturity date is after the first date and on or before the second
+                for any pair. All accounts are read if None.
+            batch_size: Rows per batch.
+        """
+        sql = f"SELECT {ACCOUNT_COLUMNS} FROM accounts"
+        params: List[str] = []
+        if maturity_windows is not None:
+            if not maturity_windows:
+                return
+            sql += " WHERE " + " OR ".join(["(maturity_date > ? AND maturity_date <= ?)"] * len(maturity_windows))
+            params = [day.isoformat() for window in maturity_windows for day in window]
+        cursor = self._connection().execute(sql, params)
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            yield batch
+
+    def save_account_risk(self, rows: Iterable[tuple]) -> None:
+        """Store account scores, rows in ACCOUNT_RISK_COLUMNS order, replacing previous scores."""
+        with self._connection() as conn:
+            conn.executemany("INSERT OR REPLACE INTO account_risk VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def list_account_risk(
+        self,
+        account_id: Optional[str] = None,
+        risk_type: Optional[RiskType] = None,
+        level: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[AccountRiskAssessment]:
+        sql = f"SELECT {ACCOUNT_RISK_COLUMNS} FROM account_risk"
+        conditions, params = [], []
+        for column, value in (("account_id", account_id), ("risk_type", risk_type and RiskType(risk_type).value), ("level", level)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY account_id, risk_type LIMIT ? OFFSET ?"
+        params += [-1 if limit is None else limit, offset]
+        return [
+            AccountRiskAssessment(
+                account_id=r[0], risk_type=RiskType(r[1]), score=r[2], level=r[3],
+                scored_on=date.fromisoformat(r[4]), last_updated=datetime.fromisoformat(r[5]),
+                next_review_date=date.fromisoformat(r[6]),
+            )
+            for r in self._connection().execute(sql, params)
+        ]
+
+    def summarize_account_risk(self) -> List[tuple]:
+        """Number of accounts and sum of scores per risk type and level, as (risk_type, level, count, total) rows."""
+        return self._connection().execute(
+            "SELECT risk_type, level, COUNT(*), SUM(score) FROM account_risk GROUP BY risk_type, level"
+        ).fetchall()
+
+    def risk_scored_on(self) -> Optional[date]:
+        """Date the account scores were last brought up to date, None before any scoring."""
+        scored_on = self.database.get_setting("account_risk_date")
+        return date.fromisoformat(scored_on) if scored_on else None
+
+    def set_risk_scored_on(self, scored_on: date) -> None:
+        self.database.set_setting("account_risk_date", scored_on.isoformat())
+
+    def load_risk_summary(self) -> Optional[Dict[str, Any]]:
+        return self.database.get_setting("account_risk_summary")
+
+    def save_risk_summary(self, summary: Dict[str, Any]) -> None:
+        self.database.set_setting("account_risk_summary", summary)
@@ -0,0 +1,128 @@
+# app/alm/repository/base.py
+# This file holds the SQLite database shared by the per-domain repositories
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, List, Optional
+
+# Default database file, in the backend directory whatever the working directory
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))), "alm.sqlite3")
+
+# Incoming rows compared against the store per round trip when merging positions
+MERGE_BATCH_SIZE = 500
+
+# valid_to of position versions that are still current
+OPEN_END = "9999-12-31"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    key    TEXT PRIMARY KEY,
+    value  TEXT NOT NULL
+);
+"""
+
+
+def row_hash(row: tuple) -> bytes:
+    """Digest of the business fields of a stored row (everything but the id)."""
+    return hashlib.blake2b(repr(row[1:]).encode(), digest_size=16).digest()
+
+
+class SQLiteDatabase:
+    """
+    Embedded SQLite database holding the tables of every ALM repository.
+
+    - Each thread gets its own connection, opened lazily and reused (a
+      per-thread pool), since sqlite3 connections must not be shared across threads.
+    - The database runs in WAL mode so readers never block the writer.
+    - All statements are constant SQL with bound parameters, so sqlite3's
+      per-connection statement cache reuses the prepared statements.
+    - Settings and the data version live in a key/value table of their own.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: Database file, or ":memory:". Defaults to the ALM_DB_PATH
+                environment variable, read when the store is opened, then DEFAULT_DB_PATH.
+        """
+        path = path or os.environ.get("ALM_DB_PATH", DEFAULT_DB_PATH)
+        if path == ":memory:":
+            # A named shared-cache database so every thread sees the same data
+            path = f"file:alm-{id(self)}?mode=memory&cache=shared"
+        self.path = path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+            conn.execute("INSERT OR IGNORE INTO settings (key, value) VALUES ('data_version', '0')")
+
+    def open(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            uri=self.path.startswith("file:"),
+            cached_statements=256,
+            check_same_thread=check_same_thread,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Only this thread uses it, but close() may run on another one
+            conn = self.open(check_same_thread=False)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self) -> None:
+        """Close every pooled connection."""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def create(self, schema: str) -> None:
+        """Create the tables and indexes of a repository if they do not exist yet."""
+        with self.connection() as conn:
+            conn.executescript(schema)
+
+    def data_version(self) -> int:
+        row = self.connection().execute("SELECT value FROM settings WHERE key = 'data_version'").fetchone()
+        return int(row[0])
+
+    @staticmethod
+    def bump(conn: sqlite3.Connection) -> int:
+        """Increment the data version within the caller's transaction and return the new version."""
+        conn.execute("UPDATE settings SET value = CAST(value AS INTEGER) + 1 WHERE key = 'data_version'")
+        return int(conn.execute("SELECT value FROM settings WHERE key = 'data_version'").fetchone()[0])
+
+    def get_setting(self, key: str, default: Any = None) -> Any:
+        row = self.connection().execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_setting(self, key: str, value: Any) -> None:
+        with self.connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO settings VALUES (?, ?)", (key, json.dumps(value)))
+
+
+class SQLiteRepositoryBase:
+    """Base of the SQLite repositories: the tables of its SCHEMA, in a database shared with the others."""
+
+    SCHEMA = ""
+
+    def __init__(self, database: SQLiteDatabase):
+        self.database = database
+        database.create(self.SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        return self.database.connection()
@@ -0,0 +1,94 @@
+# app/alm/repository/behaviour.py
+# This file implements the store of behavioural calibrations per date and product segment
+
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .base import SQLiteRepositoryBase
+
+BEHAVIOUR_FIELDS = [
+    "product", "currency", "category", "balance", "core_share",
+    "decay_rate", "prepayment_rate", "observations", "iterations", "rmse",
+]
+BEHAVIOUR_COLUMNS = ", ".join(BEHAVIOUR_FIELDS)
+
+SCHEMA = """
+-- Behavioural model parameters per calibration date and product segment
+CREATE TABLE IF NOT EXISTS behaviour_calibrations (
+    calibration_date  TEXT NOT NULL,
+    product           TEXT NOT NULL,
+    currency          TEXT NOT NULL,
+    category          TEXT NOT NULL,
+    balance           REAL NOT NULL,
+    core_share        REAL,
+    decay_rate        REAL,
+    prepayment_rate   REAL,
+    observations      INTEGER NOT NULL,
+    iterations        INTEGER NOT NULL,
+    rmse              REAL,
+    PRIMARY KEY (calibration_date, product, currency)
+) WITHOUT ROWID;
+"""
+
+
+class BehaviourRepository(ABC):
+    """Storage interface of the behavioural calibrations, and of the account terms they are fitted against."""
+
+    @abstractmethod
+    def remaining_terms(self, as_of_date: date) -> Dict[Tuple[str, str], float]:
+        ...
+
+    @abstractmethod
+    def latest_behaviour_calibration(self, before: date) -> Optional[date]:
+        ...
+
+    @abstractmethod
+    def load_behaviour_calibration(self, calibration_date: date) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def save_behaviour_calibration(self, calibration_date: date, rows: Iterable[tuple]) -> None:
+        ...
+
+
+class SQLiteBehaviourRepository(SQLiteRepositoryBase, BehaviourRepository):
+    """SQLite implementation of the calibration store.  Remaining terms are read from the accounts table."""
+
+    SCHEMA = SCHEMA
+
+    def remaining_terms(self, as_of_date: date) -> Dict[Tuple[str, str], float]:
+        """Balance-weighted remaining term in days of the accounts of each (account type, currency) with a maturity after a date."""
+        day = as_of_date.isoformat()
+        rows = self._connection().execute(
+            "SELECT account_type, currency, SUM(ABS(balance) * (julianday(maturity_date) - julianday(?))) / SUM(ABS(balance)) "
+            "FROM accounts WHERE maturity_date > ? AND balance != 0 GROUP BY account_type, currency",
+            (day, day),
+        )
+        return {(account_type, currency): days for account_type, currency, days in rows}
+
+    def latest_behaviour_calibration(self, before: date) -> Optional[date]:
+        """Date of the latest calibration stored before a date."""
+        row = self._connection().execute(
+            "SELECT MAX(calibration_date) FROM behaviour_calibrations WHERE calibration_date < ?", (before.isoformat(),)
+        ).fetchone()
+        return date.fromisoformat(row[0]) if row[0] else None
+
+    def load_behaviour_calibration(self, calibration_date: date) -> List[Dict[str, Any]]:
+        """Calibrated segments of a date, as dicts keyed by BEHAVIOUR_FIELDS."""
+        rows = self._connection().execute(
+            f"SELECT {BEHAVIOUR_COLUMNS} FROM behaviour_calibrations WHERE calibration_date = ? ORDER BY product, currency",
+            (calibration_date.isoformat(),),
+        )
+        return [dict(zip(BEHAVIOUR_FIELDS, row)) for row in rows]
+
+    def save_behaviour_calibration(self, calibration_date: date, rows: Iterable[tuple]) -> None:
+        """Store the calibrated segments (rows in BEHAVIOUR_FIELDS order) of a date, replacing any earlier calibration of it."""
+        day = calibration_date.isoformat()
+        with self._connection() as conn:
+            conn.execute("DELETE FROM behaviour_calibrations WHERE calibration_date = ?", (day,))
+            conn.executemany(
+                f"INSERT INTO behaviour_calibrations (calibration_date, {BEHAVIOUR_COLUMNS}) "
+                f"VALUES (?, {', '.join('?' * len(BEHAVIOUR_FIELDS))})",
+                ((day, *row) for row in rows),
+            )
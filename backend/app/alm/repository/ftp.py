@@ -0,0 +1,55 @@
+# app/alm/repository/ftp.py
+# This file implements the store of transfer rates locked between FTP runs
+
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Dict, Iterable, Tuple
+
+from .base import SQLiteRepositoryBase
+
+SCHEMA = """
+-- Transfer rates locked when positions were priced, valid until repricing
+CREATE TABLE IF NOT EXISTS ftp_rates (
+    method             TEXT NOT NULL,
+    id                 TEXT NOT NULL,
+    rate               REAL NOT NULL,
+    liquidity_premium  REAL NOT NULL,
+    priced_on          TEXT NOT NULL,
+    valid_until        TEXT NOT NULL,
+    PRIMARY KEY (method, id)
+) WITHOUT ROWID;
+"""
+
+
+class FTPRepository(ABC):
+    """Storage interface of the transfer rates locked when positions are priced."""
+
+    @abstractmethod
+    def load_ftp_rates(self, method: str, as_of_date: date) -> Dict[str, Tuple[float, float]]:
+        ...
+
+    @abstractmethod
+    def save_ftp_rates(self, method: str, rows: Iterable[tuple]) -> None:
+        ...
+
+
+class SQLiteFTPRepository(SQLiteRepositoryBase, FTPRepository):
+    """SQLite implementation of the locked transfer rate store."""
+
+    SCHEMA = SCHEMA
+
+    def load_ftp_rates(self, method: str, as_of_date: date) -> Dict[str, Tuple[float, float]]:
+        """Locked (rate, liquidity premium) of each position priced with a method and still valid after a date."""
+        rows = self._connection().execute(
+            "SELECT id, rate, liquidity_premium FROM ftp_rates WHERE method = ? AND valid_until > ?",
+            (method, as_of_date.isoformat()),
+        )
+        return {id: (rate, premium) for id, rate, premium in rows}
+
+    def save_ftp_rates(self, method: str, rows: Iterable[tuple]) -> None:
+        """Lock transfer rates, as (id, rate, liquidity premium, priced on, valid until) rows, replacing earlier ones."""
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO ftp_rates VALUES (?, ?, ?, ?, ?, ?)",
+                ((method, *row) for row in rows),
+            )
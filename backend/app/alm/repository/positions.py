@@ -0,0 +1,436 @@
+# app/alm/repository/positions.py
+# This file implements the position store: dated snapshots kept as a history of position versions
+
+import itertools
+import sqlite3
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from ..columnar import PositionFrame
+from ..models import AssetLiability
+from .base import MERGE_BATCH_SIZE, OPEN_END, SQLiteRepositoryBase, row_hash
+
+POSITION_FIELDS = ["id", "type", "category", "amount", "currency", "maturity_date", "interest_rate", "fixed_rate", "counterparty"]
+POSITION_COLUMNS = ", ".join(POSITION_FIELDS)
+
+# Latest load on or before a date
+SNAPSHOT_SQL = "SELECT MAX(as_of_date) FROM snapshots WHERE as_of_date <= ?"
+
+# Position versions in effect on a date (bound twice)
+VALID_AT_SQL = "valid_to > ? AND valid_from <= ?"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS positions (
+    id             TEXT NOT NULL,
+    valid_from     TEXT NOT NULL,
+    valid_to       TEXT NOT NULL,
+    type           TEXT NOT NULL,
+    category       TEXT NOT NULL,
+    amount         REAL NOT NULL,
+    currency       TEXT NOT NULL,
+    maturity_date  TEXT NOT NULL,
+    interest_rate  REAL NOT NULL,
+    fixed_rate     INTEGER NOT NULL,
+    counterparty   TEXT,
+    source         TEXT,
+    row_hash       BLOB NOT NULL,
+    PRIMARY KEY (id, valid_from)
+) WITHOUT ROWID;
+-- Snapshot reads (valid_to > ? AND valid_from <= ?) range-scan the validity columns
+CREATE INDEX IF NOT EXISTS ix_positions_valid
+    ON positions (valid_to, valid_from);
+-- Filtered scans seek on the equality columns, then check validity from the index
+CREATE INDEX IF NOT EXISTS ix_positions_filter
+    ON positions (type, category, currency, maturity_date, valid_to);
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    as_of_date  TEXT PRIMARY KEY
+);
+"""
+
+
+def storage_row(row: Sequence) -> tuple:
+    """
+    Normalize a position row (in POSITION_FIELDS order) to the stored types.
+
+    Maturity dates may be dates or ISO strings and fixed_rate any truthy value,
+    so rows from different sources hash identically when their values agree.
+    """
+    id, type, category, amount, currency, maturity, rate, fixed, counterparty = row
+    return (
+        str(id), str(type), str(category), float(amount), str(currency),
+        maturity if isinstance(maturity, str) else maturity.isoformat(),
+        float(rate), int(bool(fixed)), counterparty or None,
+    )
+
+
+def position_to_row(p: AssetLiability) -> tuple:
+    """Stored row of an AssetLiability."""
+    return storage_row((
+        p.id, p.type, p.category, p.amount, p.currency,
+        p.maturity_date, p.interest_rate, p.fixed_rate, p.counterparty,
+    ))
+
+
+def row_to_position(r: Sequence) -> AssetLiability:
+    """AssetLiability of a stored row."""
+    return AssetLiability(
+        id=r[0], type=r[1], category=r[2], amount=r[3], currency=r[4],
+        maturity_date=date.fromisoformat(r[5]), interest_rate=r[6],
+        fixed_rate=bool(r[7]), counterparty=r[8],
+    )
+
+
+class PositionChanges:
+    """
+    Outcome of merging position rows into the store.
+
+    Changed rows are kept (in stored form) so that callers can update derived
+    data for the affected positions only.
+    """
+
+    def __init__(self, as_of_date: date):
+        self.as_of_date = as_of_date                    # Date the changes take effect
+        self.received = 0                               # Rows offered to the merge
+        self.unchanged = 0                              # Rows whose content was already stored
+        self.inserted: List[tuple] = []                 # Rows for positions new as of the date
+        self.updated: List[tuple] = []                  # New content of amended positions
+        self.deleted: List[str] = []                    # IDs of removed positions
+        self.version: Optional[int] = None              # Data version after the merge, if anything changed
+
+    def __bool__(self) -> bool:
+        return bool(self.inserted or self.updated or self.deleted)
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "received": self.received,
+            "inserted": len(self.inserted),
+            "updated": len(self.updated),
+            "deleted": len(self.deleted),
+            "unchanged": self.unchanged,
+        }
+
+
+class PositionRepository(ABC):
+    """
+    Storage interface of the positions.
+
+    Positions are stored as a history of versions: a query "as of" a date reads
+    the version of each position in effect on that date. Every write bumps a
+    data version shared by all processes using the same store, so cached
+    analytics can tell when they are stale.
+    """
+
+    @abstractmethod
+    def data_version(self) -> int:
+        ...
+
+    @abstractmethod
+    def bump_data_version(self) -> int:
+        ...
+
+    @abstractmethod
+    def snapshot_date(self, as_of_date: date) -> Optional[date]:
+        ...
+
+    @abstractmethod
+    def is_latest_snapshot(self, as_of_date: date) -> bool:
+        ...
+
+    @abstractmethod
+    def save_positions(self, as_of_date: date, positions: Iterable[AssetLiability]) -> int:
+        ...
+
+    @abstractmethod
+    def save_position_rows(self, as_of_date: date, rows: Iterable[Sequence]) -> int:
+        ...
+
+    @abstractmethod
+    def merge_positions(
+        self,
+        as_of_date: date,
+        rows: Iterable[Sequence],
+        deleted_ids: Iterable[str] = (),
+        complete: bool = False,
+        source: Optional[str] = None,
+        retained_ids: Iterable[str] = (),
+    ) -> PositionChanges:
+        ...
+
+    @abstractmethod
+    def iter_position_rows(
+        self,
+        as_of_date: date,
+        columns: Sequence[str],
+        type: Optional[str] = None,
+        categories: Optional[Sequence[str]] = None,
+        currencies: Optional[Sequence[str]] = None,
+        maturity_from: Optional[date] = None,
+        maturity_to: Optional[date] = None,
+        batch_size: int = 65_536,
+    ) -> Iterator[List[tuple]]:
+        ...
+
+    @abstractmethod
+    def load_positions(self, as_of_date: date, type: Optional[str] = None, category: Optional[str] = None) -> List[AssetLiability]:
+        ...
+
+    @abstractmethod
+    def load_frame(self, as_of_date: date) -> PositionFrame:
+        ...
+
+
+class SQLitePositionRepository(SQLiteRepositoryBase, PositionRepository):
+    """
+    SQLite implementation of the position store.
+
+    - Positions are kept as versions valid from one load date to the next
+      change (exclusive), so a load only writes the positions that changed
+      and every past snapshot remains queryable.
+    - Position loads go through executemany in batches inside one transaction.
+    - Analytics read positions column-wise straight into a PositionFrame
+      without building pydantic objects.
+    """
+
+    SCHEMA = SCHEMA
+
+    def data_version(self) -> int:
+        return self.database.data_version()
+
+    def bump_data_version(self) -> int:
+        with self._connection() as conn:
+            return self.database.bump(conn)
+
+    def snapshot_date(self, as_of_date: date) -> Optional[date]:
+        row = self._connection().execute(SNAPSHOT_SQL, (as_of_date.isoformat(),)).fetchone()
+        return date.fromisoformat(row[0]) if row[0] else None
+
+    def is_latest_snapshot(self, as_of_date: date) -> bool:
+        """True if nothing has been loaded after `as_of_date`, so its changes carry forward to every later date."""
+        row = self._connection().execute(
+            "SELECT 1 FROM snapshots WHERE as_of_date > ? LIMIT 1", (as_of_date.isoformat(),)
+        ).fetchone()
+        return row is None
+
+    def save_positions(self, as_of_date: date, positions: Iterable[AssetLiability]) -> int:
+        """Insert or replace positions as of a date in batches, in a single transaction."""
+        return self.save_position_rows(as_of_date, (position_to_row(p) for p in positions))
+
+    def save_position_rows(self, as_of_date: date, rows: Iterable[Sequence]) -> int:
+        """
+        Insert or replace raw position rows (in POSITION_FIELDS order) as of a date.
+
+        Positions not listed are left as they are. Returns the number of rows read.
+        """
+        return self.merge_positions(as_of_date, rows).received
+
+    def merge_positions(
+        self,
+        as_of_date: date,
+        rows: Iterable[Sequence],
+        deleted_ids: Iterable[str] = (),
+        complete: bool = False,
+        source: Optional[str] = None,
+        retained_ids: Iterable[str] = (),
+    ) -> PositionChanges:
+        """
+        Merge position rows into the history as of a date, in a single transaction.
+
+        Each incoming row is compared with the version in effect on the date by
+        its id and a hash of its business fields. Identical rows are skipped;
+        new and amended rows start a version valid from the date (closing the
+        previous one), and deletions close the version in effect. Work is
+        therefore proportional to the number of changes rather than the size
+        of the book, apart from hashing the incoming rows.
+
+        Args:
+            as_of_date: Date the rows are valid from.
+            rows: Position rows in POSITION_FIELDS order.
+            deleted_ids: IDs of positions removed as of the date. Consumed after `rows`.
+            complete: If True, `rows` is the full book of `source`, and any of
+                its positions missing from it are deleted too.
+            source: Name of the data source the rows come from.
+            retained_ids: IDs still present at the source but not in `rows`
+                (e.g. rejected by validation), whose stored version a complete
+                load keeps. Consumed after `rows`.
+
+        Returns:
+            PositionChanges: What was inserted, updated and deleted, and the new data version.
+        """
+        changes = PositionChanges(as_of_date)
+        day = as_of_date.isoformat()
+        rows = (storage_row(row) for row in rows)
+        conn = self._connection()
+        with conn:
+            conn.execute("INSERT OR IGNORE INTO snapshots VALUES (?)", (day,))
+            if complete:
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS merge_keys (id TEXT PRIMARY KEY) WITHOUT ROWID")
+                conn.execute("DELETE FROM temp.merge_keys")
+            while True:
+                # Last occurrence wins if a batch repeats an id
+                batch = {row[0]: row for row in itertools.islice(rows, MERGE_BATCH_SIZE)}
+                if not batch:
+                    break
+                changes.received += len(batch)
+                if complete:
+                    conn.executemany("INSERT OR IGNORE INTO temp.merge_keys VALUES (?)", ((id,) for id in batch))
+                self._merge_batch(conn, day, batch, source, changes)
+
+            deleted = list(dict.fromkeys(deleted_ids))
+            if complete:
+                conn.executemany("INSERT OR IGNORE INTO temp.merge_keys VALUES (?)", ((id,) for id in retained_ids))
+                deleted += [r[0] for r in conn.execute(
+                    f"SELECT id FROM positions WHERE {VALID_AT_SQL} AND source IS ? "
+                    "AND id NOT IN (SELECT id FROM temp.merge_keys)",
+                    (day, day, source),
+                )]
+            for start in range(0, len(deleted), MERGE_BATCH_SIZE):
+                self._delete_batch(conn, day, deleted[start:start + MERGE_BATCH_SIZE], changes)
+
+            if changes:
+                changes.version = self.database.bump(conn)
+        return changes
+
+    @staticmethod
+    def _versions(conn: sqlite3.Connection, day: str, ids: Sequence[str]) -> Tuple[Dict[str, tuple], Dict[str, str]]:
+        """Version in effect on `day` and start of the next version, for each of `ids` that has them."""
+        current: Dict[str, tuple] = {}
+        following: Dict[str, str] = {}
+        rows = conn.execute(
+            f"SELECT id, valid_from, valid_to, row_hash, source FROM positions "
+            f"WHERE id IN ({', '.join('?' * len(ids))}) AND valid_to > ? ORDER BY id, valid_from",
+            (*ids, day),
+        )
+        for id, valid_from, valid_to, digest, source in rows:
+            if valid_from <= day:
+                current[id] = (valid_from, valid_to, digest, source)
+            else:
+                following.setdefault(id, valid_from)
+        return current, following
+
+    def _merge_batch(self, conn: sqlite3.Connection, day: str, batch: Dict[str, tuple], source: Optional[str], changes: PositionChanges) -> None:
+        current, following = self._versions(conn, day, list(batch))
+        inserts, rewrites, closes, claims = [], [], [], []
+        for id, row in batch.items():
+            digest = row_hash(row)
+            version = current.get(id)
+            if version is None:
+                inserts.append((id, day, following.get(id, OPEN_END), *row[1:], source, digest))
+                changes.inserted.append(row)
+            elif version[2] == digest:
+                changes.unchanged += 1
+                if version[3] != source:
+                    # Same content now delivered by another source, which takes it over
+                    claims.append((source, id, version[0]))
+            elif version[0] == day:
+                rewrites.append((*row[1:], source, digest, id, day))
+                changes.updated.append(row)
+            else:
+                closes.append((day, id, version[0]))
+                inserts.append((id, day, version[1], *row[1:], source, digest))
+                changes.updated.append(row)
+        conn.executemany("UPDATE positions SET valid_to = ? WHERE id = ? AND valid_from = ?", closes)
+        conn.executemany(
+            f"INSERT INTO positions (id, valid_from, valid_to, {', '.join(POSITION_FIELDS[1:])}, source, row_hash) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            inserts,
+        )
+        conn.executemany(
+            "UPDATE positions SET type = ?, category = ?, amount = ?, currency = ?, maturity_date = ?, "
+            "interest_rate = ?, fixed_rate = ?, counterparty = ?, source = ?, row_hash = ? "
+            "WHERE id = ? AND valid_from = ?",
+            rewrites,
+        )
+        conn.executemany("UPDATE positions SET source = ? WHERE id = ? AND valid_from = ?", claims)
+
+    def _delete_batch(self, conn: sqlite3.Connection, day: str, ids: List[str], changes: PositionChanges) -> None:
+        current, _ = self._versions(conn, day, ids)
+        removals = [(id, day) for id, version in current.items() if version[0] == day]
+        closes = [(day, id, version[0]) for id, version in current.items() if version[0] != day]
+        conn.executemany("DELETE FROM positions WHERE id = ? AND valid_from = ?", removals)
+        conn.executemany("UPDATE positions SET valid_to = ? WHERE id = ? AND valid_from = ?", closes)
+        changes.deleted.extend(current)
+
+    def _select_positions(self, as_of_date: date, type: Optional[str], category: Optional[str]) -> List[tuple]:
+        sql = f"SELECT {POSITION_COLUMNS} FROM positions WHERE {VALID_AT_SQL}"
+        params: List[Any] = [as_of_date.isoformat()] * 2
+        if type:
+            sql += " AND type = ?"
+            params.append(type)
+        if category:
+            sql += " AND category = ?"
+            params.append(category)
+        return self._connection().execute(sql + " ORDER BY id", params).fetchall()
+
+    def iter_position_rows(
+        self,
+        as_of_date: date,
+        columns: Sequence[str],
+        type: Optional[str] = None,
+        categories: Optional[Sequence[str]] = None,
+        currencies: Optional[Sequence[str]] = None,
+        maturity_from: Optional[date] = None,
+        maturity_to: Optional[date] = None,
+        batch_size: int = 65_536,
+    ) -> Iterator[List[tuple]]:
+        """
+        Stream a projection of the positions as of a date in batches of rows.
+
+        Only the requested columns are read, and the filters are evaluated by
+        SQLite against the position indexes rather than in Python. The scan runs on its own connection, so the
+        generator may be resumed from any thread (as streaming responses do) and
+        sees one consistent snapshot of the data.
+
+        Args:
+            as_of_date: Date whose positions are read.
+            columns: Position fields to return, in order.
+            type: Optional "asset" or "liability" filter.
+            categories: Optional categories to keep.
+            currencies: Optional currencies to keep.
+            maturity_from: Optional earliest maturity date (inclusive).
+            maturity_to: Optional latest maturity date (inclusive).
+            batch_size: Rows per yielded batch.
+
+        Yields:
+            List[tuple]: Up to `batch_size` rows of the projected columns.
+        """
+        unknown = set(columns) - set(POSITION_FIELDS)
+        if unknown or not columns:
+            raise ValueError(f"Unknown or missing position columns: {sorted(unknown)}")
+        sql = f"SELECT {', '.join(columns)} FROM positions WHERE {VALID_AT_SQL}"
+        params: List[Any] = [as_of_date.isoformat()] * 2
+        if type:
+            sql += " AND type = ?"
+            params.append(type)
+        if categories:
+            sql += f" AND category IN ({', '.join('?' * len(categories))})"
+            params.extend(categories)
+        if currencies:
+            sql += f" AND currency IN ({', '.join('?' * len(currencies))})"
+            params.extend(currencies)
+        if maturity_from:
+            sql += " AND maturity_date >= ?"
+            params.append(maturity_from.isoformat())
+        if maturity_to:
+            sql += " AND maturity_date <= ?"
+            params.append(maturity_to.isoformat())
+        conn = self.database.open(check_same_thread=False)
+        try:
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            conn.close()
+
+    def load_positions(self, as_of_date: date, type: Optional[str] = None, category: Optional[str] = None) -> List[AssetLiability]:
+        return [row_to_position(r) for r in self._select_positions(as_of_date, type, category)]
+
+    def load_frame(self, as_of_date: date) -> PositionFrame:
+        """Read the positions as of a date column-wise into a PositionFrame."""
+        rows = self._select_positions(as_of_date, None, None)
+        columns = list(zip(*rows)) if rows else [()] * 9
+        return PositionFrame.from_columns(as_of_date, *columns)
@@ -0,0 +1,148 @@
+# app/alm/repository/reference.py
+# This file implements the store of reference data: stress scenarios, risk appetite, counterparties and capital
+
+import json
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..models import RiskAppetite, RiskType, StressTestScenario
+from .base import SQLiteRepositoryBase
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    id           TEXT PRIMARY KEY,
+    name         TEXT NOT NULL,
+    description  TEXT NOT NULL,
+    risk_type    TEXT NOT NULL,
+    parameters   TEXT NOT NULL,
+    created_by   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_scenarios_risk_type ON scenarios (risk_type);
+
+CREATE TABLE IF NOT EXISTS risk_appetite (
+    risk_type           TEXT NOT NULL,
+    metric_name         TEXT NOT NULL,
+    threshold_warning   REAL NOT NULL,
+    threshold_critical  REAL NOT NULL,
+    current_value       REAL NOT NULL,
+    PRIMARY KEY (risk_type, metric_name)
+);
+
+CREATE TABLE IF NOT EXISTS counterparties (
+    name        TEXT PRIMARY KEY,
+    group_name  TEXT NOT NULL,
+    sector      TEXT NOT NULL
+);
+"""
+
+
+class ReferenceDataRepository(ABC):
+    """Storage interface of the reference data the risk engines read: scenarios, risk appetite, counterparty hierarchy and eligible capital."""
+
+    @abstractmethod
+    def list_scenarios(self, risk_type: Optional[RiskType] = None) -> List[StressTestScenario]:
+        ...
+
+    @abstractmethod
+    def get_scenario(self, scenario_id: str) -> Optional[StressTestScenario]:
+        ...
+
+    @abstractmethod
+    def save_scenarios(self, scenarios: Iterable[StressTestScenario]) -> None:
+        ...
+
+    @abstractmethod
+    def list_risk_appetite(self, risk_type: Optional[RiskType] = None) -> List[RiskAppetite]:
+        ...
+
+    @abstractmethod
+    def save_risk_appetite(self, appetites: Iterable[RiskAppetite]) -> None:
+        ...
+
+    @abstractmethod
+    def load_counterparty_hierarchy(self) -> Dict[str, Tuple[str, str]]:
+        ...
+
+    @abstractmethod
+    def save_counterparty_hierarchy(self, hierarchy: Dict[str, Tuple[str, str]]) -> None:
+        ...
+
+    @abstractmethod
+    def eligible_capital(self) -> float:
+        ...
+
+    @abstractmethod
+    def set_eligible_capital(self, capital: float) -> None:
+        ...
+
+
+class SQLiteReferenceDataRepository(SQLiteRepositoryBase, ReferenceDataRepository):
+    """SQLite implementation of the reference data store.  Eligible capital is kept in the settings table."""
+
+    SCHEMA = SCHEMA
+
+    @staticmethod
+    def _scenario(r: tuple) -> StressTestScenario:
+        return StressTestScenario(
+            id=r[0], name=r[1], description=r[2], risk_type=RiskType(r[3]),
+            parameters=json.loads(r[4]), created_by=r[5],
+        )
+
+    def list_scenarios(self, risk_type: Optional[RiskType] = None) -> List[StressTestScenario]:
+        sql = "SELECT id, name, description, risk_type, parameters, created_by FROM scenarios"
+        params: Tuple = ()
+        if risk_type:
+            sql += " WHERE risk_type = ?"
+            params = (risk_type.value,)
+        return [self._scenario(r) for r in self._connection().execute(sql + " ORDER BY id", params)]
+
+    def get_scenario(self, scenario_id: str) -> Optional[StressTestScenario]:
+        row = self._connection().execute(
+            "SELECT id, name, description, risk_type, parameters, created_by FROM scenarios WHERE id = ?", (scenario_id,)
+        ).fetchone()
+        return self._scenario(row) if row else None
+
+    def save_scenarios(self, scenarios: Iterable[StressTestScenario]) -> None:
+        rows = [
+            (s.id, s.name, s.description, RiskType(s.risk_type).value, json.dumps(s.parameters), s.created_by)
+            for s in scenarios
+        ]
+        with self._connection() as conn:
+            conn.executemany("INSERT OR REPLACE INTO scenarios VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def list_risk_appetite(self, risk_type: Optional[RiskType] = None) -> List[RiskAppetite]:
+        sql = "SELECT risk_type, metric_name, threshold_warning, threshold_critical, current_value FROM risk_appetite"
+        params: Tuple = ()
+        if risk_type:
+            sql += " WHERE risk_type = ?"
+            params = (risk_type.value,)
+        return [
+            RiskAppetite(
+                risk_type=RiskType(r[0]), metric_name=r[1], threshold_warning=r[2],
+                threshold_critical=r[3], current_value=r[4],
+            )
+            for r in self._connection().execute(sql + " ORDER BY risk_type, metric_name", params)
+        ]
+
+    def save_risk_appetite(self, appetites: Iterable[RiskAppetite]) -> None:
+        rows = [
+            (RiskType(a.risk_type).value, a.metric_name, a.threshold_warning, a.threshold_critical, a.current_value)
+            for a in appetites
+        ]
+        with self._connection() as conn:
+            conn.executemany("INSERT OR REPLACE INTO risk_appetite VALUES (?, ?, ?, ?, ?)", rows)
+
+    def load_counterparty_hierarchy(self) -> Dict[str, Tuple[str, str]]:
+        rows = self._connection().execute("SELECT name, group_name, sector FROM counterparties")
+        return {name: (group, sector) for name, group, sector in rows}
+
+    def save_counterparty_hierarchy(self, hierarchy: Dict[str, Tuple[str, str]]) -> None:
+        rows = [(name, group, sector) for name, (group, sector) in hierarchy.items()]
+        with self._connection() as conn:
+            conn.executemany("INSERT OR REPLACE INTO counterparties VALUES (?, ?, ?)", rows)
+
+    def eligible_capital(self) -> float:
+        return float(self.database.get_setting("eligible_capital", 0.0))
+
+    def set_eligible_capital(self, capital: float) -> None:
+        self.database.set_setting("eligible_capital", capital)
@@ -0,0 +1,114 @@
+# app/alm/repository/sandboxes.py
+# This file implements the store of what-if sandboxes and their position overlays
+
+import itertools
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from .base import SQLiteRepositoryBase
+from .positions import POSITION_COLUMNS, POSITION_FIELDS
+
+SCHEMA = """
+-- What-if sandboxes: overlays of hypothetical position changes on the positions of a date
+CREATE TABLE IF NOT EXISTS sandboxes (
+    id          TEXT PRIMARY KEY,
+    as_of_date  TEXT NOT NULL,
+    created     TEXT NOT NULL
+);
+
+-- Positions added or amended in a sandbox, and tombstones (removed = 1) of removed base positions
+CREATE TABLE IF NOT EXISTS sandbox_positions (
+    sandbox_id     TEXT NOT NULL REFERENCES sandboxes (id) ON DELETE CASCADE,
+    id             TEXT NOT NULL,
+    removed        INTEGER NOT NULL,
+    type           TEXT,
+    category       TEXT,
+    amount         REAL,
+    currency       TEXT,
+    maturity_date  TEXT,
+    interest_rate  REAL,
+    fixed_rate     INTEGER,
+    counterparty   TEXT,
+    PRIMARY KEY (sandbox_id, id)
+) WITHOUT ROWID;
+"""
+
+
+class SandboxRepository(ABC):
+    """Storage interface of the what-if sandboxes: the positions each one adds, amends or removes."""
+
+    @abstractmethod
+    def create_sandbox(self, sandbox_id: str, as_of_date: date, created: datetime) -> None:
+        ...
+
+    @abstractmethod
+    def get_sandbox(self, sandbox_id: str) -> Optional[Tuple[date, datetime, int, int]]:
+        ...
+
+    @abstractmethod
+    def delete_sandboxes(self, ids: Sequence[str] = (), created_before: Optional[datetime] = None) -> int:
+        ...
+
+    @abstractmethod
+    def save_sandbox_positions(self, sandbox_id: str, rows: Iterable[tuple], removed_ids: Iterable[str] = ()) -> None:
+        ...
+
+    @abstractmethod
+    def load_sandbox_positions(self, sandbox_id: str) -> Tuple[List[tuple], List[str]]:
+        ...
+
+
+class SQLiteSandboxRepository(SQLiteRepositoryBase, SandboxRepository):
+    """SQLite implementation of the sandbox store."""
+
+    SCHEMA = SCHEMA
+
+    def create_sandbox(self, sandbox_id: str, as_of_date: date, created: datetime) -> None:
+        with self._connection() as conn:
+            conn.execute("INSERT INTO sandboxes VALUES (?, ?, ?)", (sandbox_id, as_of_date.isoformat(), created.isoformat()))
+
+    def get_sandbox(self, sandbox_id: str) -> Optional[Tuple[date, datetime, int, int]]:
+        """Date, creation time and number of positions added (or amended) and removed of a sandbox."""
+        row = self._connection().execute(
+            "SELECT s.as_of_date, s.created, COALESCE(SUM(p.removed = 0), 0), COALESCE(SUM(p.removed), 0) "
+            "FROM sandboxes s LEFT JOIN sandbox_positions p ON p.sandbox_id = s.id WHERE s.id = ? GROUP BY s.id",
+            (sandbox_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        as_of_date, created, added, removed = row
+        return date.fromisoformat(as_of_date), datetime.fromisoformat(created), added, removed
+
+    def delete_sandboxes(self, ids: Sequence[str] = (), created_before: Optional[datetime] = None) -> int:
+        """Delete sandboxes by ID, and those created before a time. Returns the number deleted."""
+        with self._connection() as conn:
+            deleted = conn.executemany("DELETE FROM sandboxes WHERE id = ?", ((id,) for id in ids)).rowcount
+            if created_before is not None:
+                deleted += conn.execute("DELETE FROM sandboxes WHERE created < ?", (created_before.isoformat(),)).rowcount
+        return deleted
+
+    def save_sandbox_positions(self, sandbox_id: str, rows: Iterable[tuple], removed_ids: Iterable[str] = ()) -> None:
+        """Add or amend positions (stored rows) in a sandbox and remove others, replacing earlier changes of the same IDs."""
+        empty = (None,) * len(POSITION_FIELDS[1:])
+        with self._connection() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO sandbox_positions VALUES (?, ?, ?, {', '.join('?' * len(POSITION_FIELDS[1:]))})",
+                itertools.chain(
+                    ((sandbox_id, row[0], 0, *row[1:]) for row in rows),
+                    ((sandbox_id, id, 1, *empty) for id in removed_ids),
+                ),
+            )
+
+    def load_sandbox_positions(self, sandbox_id: str) -> Tuple[List[tuple], List[str]]:
+        """
+        Read the overlay of a sandbox.
+
+        Returns:
+            Tuple[List[tuple], List[str]]: Added or amended positions as stored rows, and
+            the IDs of every base position they hide (removed or amended).
+        """
+        rows = self._connection().execute(
+            f"SELECT removed, {POSITION_COLUMNS} FROM sandbox_positions WHERE sandbox_id = ?", (sandbox_id,)
+        ).fetchall()
+        return [row[1:] for row in rows if not row[0]], [row[1] for row in rows]
@@ -0,0 +1,66 @@
+# app/alm/repository/sources.py
+# This file implements the store of data sources and their extraction watermarks
+
+import json
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Iterable, List
+
+from ..models import DataSource
+from .base import SQLiteRepositoryBase
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS data_sources (
+    name               TEXT PRIMARY KEY,
+    source_type        TEXT NOT NULL,
+    connection_params  TEXT NOT NULL,
+    last_extraction    TEXT
+);
+"""
+
+
+class SourceRepository(ABC):
+    """Storage interface of the data sources positions are extracted from."""
+
+    @abstractmethod
+    def list_datasources(self) -> List[DataSource]:
+        ...
+
+    @abstractmethod
+    def save_datasources(self, datasources: Iterable[DataSource]) -> None:
+        ...
+
+    @abstractmethod
+    def set_last_extraction(self, name: str, watermark: datetime) -> None:
+        ...
+
+
+class SQLiteSourceRepository(SQLiteRepositoryBase, SourceRepository):
+    """SQLite implementation of the data source store."""
+
+    SCHEMA = SCHEMA
+
+    def list_datasources(self) -> List[DataSource]:
+        rows = self._connection().execute(
+            "SELECT name, source_type, connection_params, last_extraction FROM data_sources ORDER BY name"
+        ).fetchall()
+        return [
+            DataSource(
+                name=r[0], source_type=r[1], connection_params=json.loads(r[2]),
+                last_extraction=datetime.fromisoformat(r[3]) if r[3] else None,
+            )
+            for r in rows
+        ]
+
+    def save_datasources(self, datasources: Iterable[DataSource]) -> None:
+        rows = [
+            (d.name, d.source_type, json.dumps(d.connection_params),
+             d.last_extraction.isoformat() if d.last_extraction else None)
+            for d in datasources
+        ]
+        with self._connection() as conn:
+            conn.executemany("INSERT OR REPLACE INTO data_sources VALUES (?, ?, ?, ?)", rows)
+
+    def set_last_extraction(self, name: str, watermark: datetime) -> None:
+        with self._connection() as conn:
+            conn.execute("UPDATE data_sources SET last_extraction = ? WHERE name = ?", (watermark.isoformat(), name))
@@ -0,0 +1,69 @@
+# app/alm/repository/store.py
+# This file groups the per-domain repositories behind ALMService into one store
+
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from .accounts import AccountRepository, SQLiteAccountRepository
+from .base import SQLiteDatabase
+from .behaviour import BehaviourRepository, SQLiteBehaviourRepository
+from .ftp import FTPRepository, SQLiteFTPRepository
+from .positions import PositionRepository, SQLitePositionRepository
+from .reference import ReferenceDataRepository, SQLiteReferenceDataRepository
+from .sandboxes import SandboxRepository, SQLiteSandboxRepository
+from .sources import SourceRepository, SQLiteSourceRepository
+from .transactions import SQLiteTransactionRepository, TransactionRepository
+
+
+class ALMRepository(ABC):
+    """
+    Data store used by ALMService: one repository per domain, over storage they share.
+
+    Each domain service is handed only the repositories it reads and writes.
+    """
+
+    positions: PositionRepository
+    sources: SourceRepository
+    reference: ReferenceDataRepository
+    accounts: AccountRepository
+    transactions: TransactionRepository
+    ftp: FTPRepository
+    behaviour: BehaviourRepository
+    sandboxes: SandboxRepository
+
+    @abstractmethod
+    def is_empty(self) -> bool:
+        ...
+
+    @abstractmethod
+    def close(self) -> None:
+        ...
+
+
+class SQLiteRepository(ALMRepository):
+    """SQLite implementation of the ALM store: every domain repository works on the tables it owns in one database."""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: Database file, or ":memory:". Defaults to the ALM_DB_PATH
+                environment variable, read when the store is opened, then DEFAULT_DB_PATH.
+        """
+        self.database = SQLiteDatabase(path)
+        self.positions = SQLitePositionRepository(self.database)
+        self.sources = SQLiteSourceRepository(self.database)
+        self.reference = SQLiteReferenceDataRepository(self.database)
+        self.accounts = SQLiteAccountRepository(self.database)
+        self.transactions = SQLiteTransactionRepository(self.database)
+        self.ftp = SQLiteFTPRepository(self.database)
+        self.behaviour = SQLiteBehaviourRepository(self.database)
+        self.sandboxes = SQLiteSandboxRepository(self.database)
+
+    def is_empty(self) -> bool:
+        conn = self.database.connection()
+        return conn.execute("SELECT 1 FROM scenarios LIMIT 1").fetchone() is None \
+            and conn.execute("SELECT 1 FROM positions LIMIT 1").fetchone() is None
+
+    def close(self) -> None:
+        """Close every pooled connection."""
+        self.database.close()
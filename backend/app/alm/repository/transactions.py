@@ -0,0 +1,266 @@
+# app/alm/repository/transactions.py
+# This file implements the append-only transaction log and the flow rollups maintained on append
+
+import itertools
+import sqlite3
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..models import Transaction
+from ..transactions import APPEND_CHUNK_SIZE, ROLLUPS, rollup_increments, transaction_legs
+from .base import MERGE_BATCH_SIZE, OPEN_END, SQLiteRepositoryBase
+
+TRANSACTION_FIELDS = [
+    "id", "type", "status", "from_account_id", "to_account_id",
+    "amount", "currency", "description", "date", "reference",
+]
+TRANSACTION_COLUMNS = ", ".join(TRANSACTION_FIELDS)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id               TEXT PRIMARY KEY,
+    type             TEXT NOT NULL,
+    status           TEXT NOT NULL,
+    from_account_id  TEXT,
+    to_account_id    TEXT,
+    amount           REAL NOT NULL,
+    currency         TEXT NOT NULL,
+    description      TEXT NOT NULL,
+    date             TEXT NOT NULL,
+    reference        TEXT NOT NULL
+);
+
+-- One signed leg per account and transaction, clustered by account and day
+CREATE TABLE IF NOT EXISTS transaction_legs (
+    account_id      TEXT NOT NULL,
+    day             TEXT NOT NULL,
+    transaction_id  TEXT NOT NULL,
+    amount          REAL NOT NULL,
+    PRIMARY KEY (account_id, day, transaction_id)
+) WITHOUT ROWID;
+
+-- Flow rollups of completed legs; balance is the running total up to the end of the period
+CREATE TABLE IF NOT EXISTS account_daily (
+    account_id TEXT NOT NULL,
+    period     TEXT NOT NULL,
+    inflow     REAL NOT NULL,
+    outflow    REAL NOT NULL,
+    count      INTEGER NOT NULL,
+    balance    REAL NOT NULL,
+    PRIMARY KEY (account_id, period)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS account_monthly (
+    account_id TEXT NOT NULL,
+    period     TEXT NOT NULL,
+    inflow     REAL NOT NULL,
+    outflow    REAL NOT NULL,
+    count      INTEGER NOT NULL,
+    balance    REAL NOT NULL,
+    PRIMARY KEY (account_id, period)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS product_daily (
+    product    TEXT NOT NULL,
+    currency   TEXT NOT NULL,
+    period     TEXT NOT NULL,
+    inflow     REAL NOT NULL,
+    outflow    REAL NOT NULL,
+    count      INTEGER NOT NULL,
+    balance    REAL NOT NULL,
+    PRIMARY KEY (product, currency, period)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS product_monthly (
+    product    TEXT NOT NULL,
+    currency   TEXT NOT NULL,
+    period     TEXT NOT NULL,
+    inflow     REAL NOT NULL,
+    outflow    REAL NOT NULL,
+    count      INTEGER NOT NULL,
+    balance    REAL NOT NULL,
+    PRIMARY KEY (product, currency, period)
+) WITHOUT ROWID;
+"""
+
+
+def transaction_to_row(t: Transaction) -> tuple:
+    """Stored row of a Transaction (in TRANSACTION_FIELDS order)."""
+    return (
+        t.id, t.type.value, t.status.value, t.from_account_id, t.to_account_id,
+        float(t.amount), t.currency, t.description, t.date.isoformat(), t.reference,
+    )
+
+
+def row_to_transaction(r: Sequence) -> Transaction:
+    """Transaction of a stored row."""
+    return Transaction(**dict(zip(TRANSACTION_FIELDS, r)))
+
+
+class TransactionRepository(ABC):
+    """Storage interface of the transaction log and its daily and monthly flow rollups."""
+
+    @abstractmethod
+    def append_transactions(self, rows: Iterable[tuple]) -> Tuple[int, int]:
+        ...
+
+    @abstractmethod
+    def list_account_transactions(
+        self,
+        account_id: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[Transaction]:
+        ...
+
+    @abstractmethod
+    def flow_buckets(self, rollup: str, key: Sequence[str], start: str, end: str) -> Tuple[float, List[tuple]]:
+        ...
+
+    @abstractmethod
+    def list_flow_keys(self, rollup: str) -> List[tuple]:
+        ...
+
+
+class SQLiteTransactionRepository(SQLiteRepositoryBase, TransactionRepository):
+    """SQLite implementation of the transaction log.  Product rollups read the account types from the accounts table."""
+
+    SCHEMA = SCHEMA
+
+    def append_transactions(self, rows: Iterable[tuple]) -> Tuple[int, int]:
+        """
+        Append transaction rows (in TRANSACTION_FIELDS order) and update the flow rollups, in a single transaction.
+
+        The log is append-only: rows whose id is already stored are skipped, so a
+        batch can safely be replayed. Each chunk of new rows is split into account
+        legs and aggregated per rollup bucket with NumPy, and only those buckets
+        are written. Running balances of later buckets are shifted when a row is
+        back-dated; rows appended in date order touch no later buckets.
+
+        Returns:
+            Tuple[int, int]: Number of rows appended and of duplicates skipped.
+        """
+        appended = duplicates = 0
+        rows = iter(rows)
+        conn = self._connection()
+        with conn:
+            while True:
+                chunk = list(itertools.islice(rows, APPEND_CHUNK_SIZE))
+                if not chunk:
+                    break
+                new: Dict[str, tuple] = {}
+                for start in range(0, len(chunk), MERGE_BATCH_SIZE):
+                    batch = {row[0]: row for row in chunk[start:start + MERGE_BATCH_SIZE] if row[0] not in new}
+                    stored = {r[0] for r in conn.execute(
+                        f"SELECT id FROM transactions WHERE id IN ({', '.join('?' * len(batch))})", list(batch)
+                    )}
+                    new.update((id, row) for id, row in batch.items() if id not in stored)
+                duplicates += len(chunk) - len(new)
+                if not new:
+                    continue
+                appended += len(new)
+                conn.executemany(
+                    f"INSERT INTO transactions ({TRANSACTION_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    new.values(),
+                )
+                self._post_legs(conn, transaction_legs(list(new.values())))
+        return appended, duplicates
+
+    def _post_legs(self, conn: sqlite3.Connection, legs: Dict) -> None:
+        conn.executemany(
+            "INSERT INTO transaction_legs VALUES (?, ?, ?, ?)",
+            zip(legs["account_id"].tolist(), legs["day"].tolist(), legs["transaction_id"].tolist(), legs["amount"].tolist()),
+        )
+        accounts = sorted(set(legs["account_id"][legs["completed"]].tolist()))
+        products: Dict[str, str] = {}
+        for start in range(0, len(accounts), MERGE_BATCH_SIZE):
+            batch = accounts[start:start + MERGE_BATCH_SIZE]
+            products.update(conn.execute(
+                f"SELECT id, account_type FROM accounts WHERE id IN ({', '.join('?' * len(batch))})", batch
+            ))
+        for table, increments in rollup_increments(legs, products).items():
+            self._post_rollup(conn, table, ROLLUPS[table][0], increments)
+
+    @staticmethod
+    def _post_rollup(conn: sqlite3.Connection, table: str, key_columns: Sequence[str], increments: List[tuple]) -> None:
+        """Add per-bucket increments (sorted by key and period) to a rollup, keeping running balances consistent."""
+        n = len(key_columns)
+        match = " AND ".join(f"{column} = ?" for column in key_columns)
+        columns = ", ".join(key_columns)
+        # Later buckets already stored carry the new flows in their balance
+        conn.executemany(
+            f"UPDATE {table} SET balance = balance + ? WHERE {match} AND period > ?",
+            ((inflow - outflow, *key, period) for *key, period, inflow, outflow, _ in increments),
+        )
+        # A new bucket starts from the balance of the bucket before it; increments are in period order
+        conn.executemany(
+            f"INSERT INTO {table} ({columns}, period, inflow, outflow, count, balance) "
+            f"VALUES ({'?, ' * n}?, ?, ?, ?, ? + COALESCE("
+            f"(SELECT balance FROM {table} WHERE {match} AND period < ? ORDER BY period DESC LIMIT 1), 0)) "
+            f"ON CONFLICT ({columns}, period) DO UPDATE SET inflow = inflow + excluded.inflow, "
+            "outflow = outflow + excluded.outflow, count = count + excluded.count, "
+            "balance = balance + excluded.inflow - excluded.outflow",
+            (
+                (*key, period, inflow, outflow, count, inflow - outflow, *key, period)
+                for *key, period, inflow, outflow, count in increments
+            ),
+        )
+
+    def list_account_transactions(
+        self,
+        account_id: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[Transaction]:
+        """Transactions debiting or crediting an account, by date, read through the account/day index."""
+        columns = ", ".join(f"t.{field}" for field in TRANSACTION_FIELDS)
+        rows = self._connection().execute(
+            f"SELECT {columns} FROM transaction_legs l JOIN transactions t ON t.id = l.transaction_id "
+            "WHERE l.account_id = ? AND l.day >= ? AND l.day <= ? ORDER BY l.day, t.date, t.id LIMIT ? OFFSET ?",
+            (
+                account_id,
+                start.isoformat() if start else "",
+                end.isoformat() if end else OPEN_END,
+                -1 if limit is None else limit,
+                offset,
+            ),
+        )
+        return [row_to_transaction(r) for r in rows]
+
+    def flow_buckets(self, rollup: str, key: Sequence[str], start: str, end: str) -> Tuple[float, List[tuple]]:
+        """
+        Read a range of a rollup.
+
+        Args:
+            rollup: Rollup table name (see ROLLUPS).
+            key: Values of its key columns.
+            start: First period (inclusive).
+            end: Last period (inclusive).
+
+        Returns:
+            Tuple[float, List[tuple]]: Balance before `start`, and the
+            (period, inflow, outflow, count, balance) rows of the range.
+        """
+        key_columns, _ = ROLLUPS[rollup]
+        match = " AND ".join(f"{column} = ?" for column in key_columns)
+        conn = self._connection()
+        opening = conn.execute(
+            f"SELECT balance FROM {rollup} WHERE {match} AND period < ? ORDER BY period DESC LIMIT 1", (*key, start)
+        ).fetchone()
+        rows = conn.execute(
+            f"SELECT period, inflow, outflow, count, balance FROM {rollup} "
+            f"WHERE {match} AND period >= ? AND period <= ? ORDER BY period",
+            (*key, start, end),
+        ).fetchall()
+        return (opening[0] if opening else 0.0), rows
+
+    def list_flow_keys(self, rollup: str) -> List[tuple]:
+        """Distinct keys (e.g. product and currency) with buckets in a rollup."""
+        key_columns, _ = ROLLUPS[rollup]
+        columns = ", ".join(key_columns)
+        return self._connection().execute(f"SELECT DISTINCT {columns} FROM {rollup} ORDER BY {columns}").fetchall()
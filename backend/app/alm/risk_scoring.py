@@ -0,0 +1,171 @@
+# app/alm/risk_scoring.py
+# This file implements vectorized credit, liquidity and interest-rate risk scoring of customer accounts
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .models import AccountType, RiskLevel, RiskType
+
+# Risk types scored per account
+SCORED_RISK_TYPES = (RiskType.CREDIT, RiskType.LIQUIDITY, RiskType.INTEREST_RATE)
+
+# Weights of the category averages in the overall portfolio score, as in the frontend risk store
+PORTFOLIO_WEIGHTS = {"credit": 0.3, "market": 0.2, "liquidity": 0.2, "operational": 0.1, "interest_rate": 0.2}
+
+# Lowest score of each level, from the safest; lower scores are critical
+LEVEL_FLOORS = ((80.0, RiskLevel.LOW), (60.0, RiskLevel.MEDIUM), (40.0, RiskLevel.HIGH))
+
+# Time until an account is due for review after being scored
+REVIEW_PERIOD = timedelta(days=90)
+
+# Score adjustments by account type
+CREDIT_TYPE_PENALTY = {AccountType.LOAN: 20, AccountType.MORTGAGE: 15, AccountType.CREDIT_LINE: 10}
+LIQUIDITY_TYPE_ADJUSTMENT = {
+    AccountType.INVESTMENT: -20, AccountType.MORTGAGE: -25, AccountType.CHECKING: 10, AccountType.SAVINGS: 10,
+}
+INTEREST_RATE_TYPE_PENALTY = {AccountType.MORTGAGE: 25, AccountType.LOAN: 25}
+
+# Interest-rate score penalties: (rate above, in percent) and (days to maturity above), largest first
+RATE_PENALTIES = ((5.0, 20), (3.0, 10))
+MATURITY_PENALTIES = ((5 * 365, 30), (365, 15))
+
+
+def _type_lookup(types: np.ndarray, table: Dict[AccountType, int]) -> np.ndarray:
+    out = np.zeros(len(types))
+    for account_type, value in table.items():
+        out[types == account_type.value] = value
+    return out
+
+
+def _tiered(values: np.ndarray, tiers: Sequence[Tuple[float, int]]) -> np.ndarray:
+    """Penalty of the first tier each value exceeds, 0 if none (or the value is missing)."""
+    return np.select([values > bound for bound, _ in tiers], [penalty for _, penalty in tiers], 0)
+
+
+def score_accounts(rows: Sequence[tuple], as_of_date: date) -> Dict[RiskType, np.ndarray]:
+    """
+    Score accounts with the rules of the frontend risk store, all accounts at once.
+
+    Scores run from 0 to 100, higher being safer:
+
+    - Credit: 100, less a penalty for loans, mortgages and credit lines, 30 for a
+      negative balance and another 20 for a balance below -500,000.
+    - Liquidity: 100, less 20 for investments and 25 for mortgages, plus 10 for
+      checking and savings, less 30 if the available balance is below 10% of the balance.
+    - Interest rate: 100, less 25 for mortgages and loans, 10 or 20 for a rate above
+      3% or 5%, and 15 or 30 for a maturity over one or five years away.
+
+    Missing (or zero) available balances and rates do not count, as in the frontend.
+
+    Args:
+        rows: Account rows in ACCOUNT_FIELDS order.
+        as_of_date: Date maturities are measured from.
+
+    Returns:
+        Dict[RiskType, np.ndarray]: Scores per risk type, aligned with `rows`.
+    """
+    if not rows:
+        return {risk_type: np.zeros(0) for risk_type in SCORED_RISK_TYPES}
+    _, _, types, _, _, balance, available, rate, maturity = zip(*rows)
+    types = np.array(types, dtype=str)
+    balance = np.array(balance, dtype=np.float64)
+    available = np.array(available, dtype=np.float64)      # None -> NaN
+    rate = np.array(rate, dtype=np.float64)
+    maturity = np.array(maturity, dtype="datetime64[D]")   # None -> NaT
+    days_to_maturity = (maturity - np.datetime64(as_of_date, "D")).astype(np.float64)
+    days_to_maturity[np.isnat(maturity)] = np.nan
+
+    credit = 100.0 - _type_lookup(types, CREDIT_TYPE_PENALTY) - 30.0 * (balance < 0) - 20.0 * (balance < -500_000)
+
+    scarce = (np.nan_to_num(available) != 0) & (available < 0.1 * balance)
+    liquidity = 100.0 + _type_lookup(types, LIQUIDITY_TYPE_ADJUSTMENT) - 30.0 * scarce
+
+    interest_rate = (
+        100.0
+        - _type_lookup(types, INTEREST_RATE_TYPE_PENALTY)
+        - _tiered(rate, RATE_PENALTIES)
+        - _tiered(days_to_maturity, MATURITY_PENALTIES)
+    )
+    return {
+        RiskType.CREDIT: np.clip(credit, 0.0, 100.0),
+        RiskType.LIQUIDITY: np.clip(liquidity, 0.0, 100.0),
+        RiskType.INTEREST_RATE: np.clip(interest_rate, 0.0, 100.0),
+    }
+
+
+def risk_levels(scores: np.ndarray) -> np.ndarray:
+    """Risk level of each score."""
+    return np.select(
+        [scores >= floor for floor, _ in LEVEL_FLOORS],
+        [level.value for _, level in LEVEL_FLOORS],
+        RiskLevel.CRITICAL.value,
+    )
+
+
+def assessment_rows(rows: Sequence[tuple], as_of_date: date, now: Optional[datetime] = None) -> List[tuple]:
+    """Stored assessments (in ACCOUNT_RISK_COLUMNS order) of every scored risk type of each account."""
+    now = now or datetime.now()
+    ids = [row[0] for row in rows]
+    scored_on = as_of_date.isoformat()
+    last_updated = now.isoformat()
+    review = (now + REVIEW_PERIOD).date().isoformat()
+    out: List[tuple] = []
+    for risk_type, scores in score_accounts(rows, as_of_date).items():
+        out.extend(zip(
+            ids,
+            [risk_type.value] * len(ids),
+            scores.tolist(),
+            risk_levels(scores).tolist(),
+            [scored_on] * len(ids),
+            [last_updated] * len(ids),
+            [review] * len(ids),
+        ))
+    return out
+
+
+def maturity_windows(previous: date, current: date) -> List[Tuple[date, date]]:
+    """
+    Maturity dates whose interest-rate score differs when scored on `current` instead of `previous`.
+
+    The score only depends on the date through the maturity tiers, so only accounts
+    crossing a tier boundary in between need rescoring. Returns (after, up to) pairs.
+    """
+    start, end = sorted((previous, current))
+    return [(start + timedelta(days=days), end + timedelta(days=days)) for days, _ in MATURITY_PENALTIES]
+
+
+def portfolio_metrics(summary: Iterable[tuple]) -> Dict:
+    """
+    Aggregate per-account scores the way the frontend risk store does.
+
+    Args:
+        summary: (risk_type, level, count, total score) rows.
+
+    Returns:
+        dict: Number of accounts, average score per category, the weighted overall
+        score, the categories not scored per account and the number of accounts
+        per risk type and level.
+    """
+    counts: Dict[str, int] = {}
+    totals: Dict[str, float] = {}
+    levels: Dict[str, Dict[str, int]] = {risk_type.value: {} for risk_type in SCORED_RISK_TYPES}
+    for risk_type, level, count, total in summary:
+        counts[risk_type] = counts.get(risk_type, 0) + count
+        totals[risk_type] = totals.get(risk_type, 0.0) + total
+        levels.setdefault(risk_type, {})[level] = count
+    accounts = max(counts.values(), default=0)
+    averages = {
+        category: totals.get(category, 0.0) / accounts if accounts else 0.0
+        for category in PORTFOLIO_WEIGHTS
+    }
+    return {
+        "accounts": accounts,
+        **{f"{category}_risk_score": value for category, value in averages.items()},
+        "overall_risk_score": sum(PORTFOLIO_WEIGHTS[category] * value for category, value in averages.items()),
+        "unscored_categories": [
+            category for category in PORTFOLIO_WEIGHTS if category not in {t.value for t in SCORED_RISK_TYPES}
+        ],
+        "levels": levels,
+    }
@@ -1,17 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import asyncio
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 from typing import List, Optional
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from .models import (
     AssetLiability, 
     GapAnalysisRequest, 
-    GapAnalysisResult,
+    GapAnalysisReport,
     StressTestScenario, 
     StressTestResult,
     RiskAppetite,
     RiskType,
-    DataSource
+    DataSource,
+    SensitivityReport,
+    ScenarioGridRequest,
+    ScenarioGridResult,
+    MarketRiskReport,
+    MarketFactorReturns,
+    ConcentrationReport,
+    Dashboard,
+    NIIProjection,
+    ReverseStressRequest,
+    ReverseStressResult,
+    Account,
+    AccountRiskAssessment,
+    PortfolioRiskMetrics,
+    RiskLevel,
+    Transaction,
+    FlowSeries,
+    FTPReport,
+    BehaviouralCalibration,
+    SandboxRequest,
+    Sandbox,
+    WhatIfResult
 )
 from .service import ALMService
+from .dashboard import etag_matches
+from .compression import CompressionMetrics, negotiate
+from .export import FILE_EXTENSIONS, MEDIA_TYPES
+from .concurrency import AdmissionControl, AdmissionRejected, SingleFlight
 from ..auth.dependencies import get_current_user
 
 # Define API router for ALM endpoints
@@ -19,6 +48,78 @@ router = APIRouter(prefix="/api/alm", tags=["ALM"])
 # Initialize ALM service
 alm_service = ALMService()
 
+# Bytes on the wire and compression CPU time per endpoint, recorded by the compression middleware
+compression_metrics = CompressionMetrics()
+
+# Identical concurrent requests to the heavy endpoints share one computation
+inflight = SingleFlight()
+# Concurrency limits and wait-queue caps of the heavy endpoints
+admission = {
+    "gap-analysis": AdmissionControl("gap-analysis", max_concurrent=4, max_queued=32),
+    "stress-test": AdmissionControl("stress-test", max_concurrent=2, max_queued=16),
+    "scenario-grid": AdmissionControl("scenario-grid", max_concurrent=2, max_queued=16),
+    "alco-report": AdmissionControl("alco-report", max_concurrent=2, max_queued=16),
+    "nii": AdmissionControl("nii", max_concurrent=2, max_queued=16),
+    "ftp": AdmissionControl("ftp", max_concurrent=2, max_queued=16),
+    "behaviour": AdmissionControl("behaviour", max_concurrent=2, max_queued=16),
+    "what-if": AdmissionControl("what-if", max_concurrent=4, max_queued=32),
+    "sensitivity": AdmissionControl("sensitivity", max_concurrent=4, max_queued=32),
+    "concentration": AdmissionControl("concentration", max_concurrent=4, max_queued=32),
+    "market-risk": AdmissionControl("market-risk", max_concurrent=2, max_queued=16),
+}
+
+async def _run_heavy(endpoint: str, func, *args):
+    """
+    Run a heavy service call, coalesced with identical in-flight requests and subject to admission control.
+
+    Raises:
+        HTTPException: If the request is shed (status code 429 or 503, with a Retry-After header).
+    """
+    # Request bodies are keyed by their JSON form, since pydantic models are not hashable
+    params = tuple(arg.model_dump_json() if isinstance(arg, BaseModel) else arg for arg in args)
+    # The data version is read from the store, so not on the event loop
+    version = await asyncio.to_thread(lambda: alm_service.data_version)
+    key = (endpoint, version, *params)
+    try:
+        return await inflight.run(key, lambda: admission[endpoint].run(func, *args))
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+@router.get("/dashboard", response_model=Dashboard)
+async def get_dashboard(
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get the ALM dashboard: current risk assessments, recent stress tests and gap analysis.
+
+    The dashboard is materialized and refreshed in the background when the underlying
+    data changes, together with its compressed encodings. Responses carry an ETag per
+    encoding; clients sending a matching If-None-Match header receive 304 Not Modified
+    without a body.
+
+    Args:
+        request (Request): The incoming request, used to read the Accept-Encoding and If-None-Match headers.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        Response: The JSON-encoded Dashboard, or an empty 304 response.
+    """
+    if alm_service.dashboard_ready:
+        snapshot = alm_service.get_dashboard_snapshot()
+    else:
+        # The first build computes every risk engine; keep it off the event loop
+        snapshot = await asyncio.to_thread(alm_service.get_dashboard_snapshot)
+    body, encoding, etag = snapshot.representation(negotiate(request.headers.get("accept-encoding")))
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+        # Lets the compression middleware account for the bytes saved
+        request.state.uncompressed_length = len(snapshot.body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @router.get("/datasources", response_model=List[DataSource])
 async def get_datasources(current_user: dict = Depends(get_current_user)):
     """
@@ -30,31 +131,39 @@ async def get_datasources(current_user: dict = Depends(get_current_user)):
     Returns:
         List[DataSource]: A list of DataSource objects representing the configured data sources.
     """
-    return alm_service.get_datasources()
+    return alm_service.sources.get_datasources()
 
 @router.post("/extract-data")
 async def extract_data(
     source_id: str, 
     as_of_date: date = Query(None), 
+    corrections: List[str] = Query([]),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Trigger data extraction from a specified data source.
 
+    After the first load, only the changes since the source's last extraction are
+    read, and only the positions that actually changed are written. Rows are
+    validated on the way in; rejected rows are left out and reported.
+
     Args:
-        source_id (str): The ID of the data source to extract data from.
+        source_id (str): The name of the data source to extract data from.
         as_of_date (date, optional): The date to extract data as of. Defaults to the current date.
+        corrections (List[str], optional): Automatic corrections to apply ("normalize_codes", "absolute_amount").
         current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
 
     Returns:
-        dict: A dictionary containing the status ("success") and the extracted data.  Raises an HTTPException if extraction fails.
+        dict: A dictionary containing the status ("success"), the number of rows read and the extraction result.
 
     Raises:
-        HTTPException: If data extraction encounters an error (status code 500).
+        HTTPException: If the source is unknown, has no connector or a correction is unknown (status code 400), or if data extraction encounters an error (status code 500).
     """
     try:
-        result = alm_service.extract_data(source_id, as_of_date or date.today())
-        return {"status": "success", "extracted_items": result}
+        result = alm_service.sources.extract_data(source_id, as_of_date or date.today(), corrections)
+        return {"status": "success", "extracted_items": result.received, "result": result}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Data extraction failed: {str(e)}")
 
@@ -75,7 +184,7 @@ async def get_assets(
     Returns:
         List[AssetLiability]: A list of AssetLiability objects representing the assets.
     """
-    return alm_service.get_assets(as_of_date or date.today(), category)
+    return alm_service.positions.get_assets(as_of_date or date.today(), category)
 
 @router.get("/liabilities", response_model=List[AssetLiability])
 async def get_liabilities(
@@ -94,9 +203,281 @@ async def get_liabilities(
     Returns:
         List[AssetLiability]: A list of AssetLiability objects representing the liabilities.
     """
-    return alm_service.get_liabilities(as_of_date or date.today(), category)
+    return alm_service.positions.get_liabilities(as_of_date or date.today(), category)
+
+@router.put("/positions")
+async def upsert_position(
+    position: AssetLiability,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Add a new asset or liability, or amend an existing one with the same ID.
+
+    Args:
+        position (AssetLiability): The position to store.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        dict: A dictionary containing the status ("success") and the position ID.
+    """
+    alm_service.positions.upsert_position(position)
+    return {"status": "success", "id": position.id}
+
+@router.delete("/positions/{position_id}")
+async def remove_position(
+    position_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Remove an asset or liability.
+
+    Args:
+        position_id (str): The ID of the position to remove.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        dict: A dictionary containing the status ("success") and the position ID.
+
+    Raises:
+        HTTPException: If no position has that ID (status code 404).
+    """
+    if not alm_service.positions.remove_position(position_id):
+        raise HTTPException(status_code=404, detail=f"Position {position_id} not found")
+    return {"status": "success", "id": position_id}
+
+@router.put("/accounts")
+async def upsert_accounts(
+    accounts: List[Account],
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Add or amend customer accounts in bulk; new and changed accounts are rescored.
+
+    Args:
+        accounts (List[Account]): The accounts to store, matched by ID.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        dict: A dictionary containing the status ("success") and the number of accounts received and rescored.
+    """
+    counts = alm_service.accounts.upsert_accounts(accounts)
+    return {"status": "success", **counts}
+
+@router.delete("/accounts/{account_id}")
+async def remove_account(
+    account_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Remove a customer account and its risk scores.
+
+    Args:
+        account_id (str): The ID of the account to remove.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        dict: A dictionary containing the status ("success") and the account ID.
+
+    Raises:
+        HTTPException: If no account has that ID (status code 404).
+    """
+    if not alm_service.accounts.remove_account(account_id):
+        raise HTTPException(status_code=404, detail=f"Account {account_id} not found")
+    return {"status": "success", "id": account_id}
+
+@router.get("/accounts/risk", response_model=List[AccountRiskAssessment])
+async def get_account_risk(
+    risk_type: Optional[RiskType] = None,
+    level: Optional[RiskLevel] = None,
+    limit: int = Query(1000, ge=1, le=10_000),
+    offset: int = Query(0, ge=0),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get precomputed risk scores of all accounts, a page at a time.
+
+    Args:
+        risk_type (RiskType, optional): Only scores of this risk type.
+        level (RiskLevel, optional): Only scores at this risk level.
+        limit (int, optional): Maximum number of scores returned. Defaults to 1000.
+        offset (int, optional): Number of scores skipped, for paging. Defaults to 0.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        List[AccountRiskAssessment]: Scores ordered by account and risk type.
+    """
+    return alm_service.accounts.get_account_risk(None, risk_type, level and level.value, limit, offset)
+
+@router.get("/accounts/risk/portfolio", response_model=PortfolioRiskMetrics)
+async def get_portfolio_risk(current_user: dict = Depends(get_current_user)):
+    """
+    Get the account risk scores aggregated over the portfolio.
+
+    Args:
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        PortfolioRiskMetrics: Average scores per category, overall score and accounts per level.
+    """
+    return alm_service.accounts.get_portfolio_risk()
+
+@router.get("/accounts/{account_id}/risk", response_model=List[AccountRiskAssessment])
+async def get_account_risk_by_id(
+    account_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get the precomputed risk scores of one account.
+
+    Args:
+        account_id (str): The ID of the account.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        List[AccountRiskAssessment]: The account's credit, liquidity and interest-rate scores.
+
+    Raises:
+        HTTPException: If no account has that ID (status code 404).
+    """
+    assessments = alm_service.accounts.get_account_risk(account_id)
+    if not assessments:
+        raise HTTPException(status_code=404, detail=f"Account {account_id} not found")
+    return assessments
+
+@router.post("/transactions")
+async def append_transactions(
+    transactions: List[Transaction],
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Record transactions in the append-only log and update the flow rollups.
 
-@router.post("/gap-analysis", response_model=GapAnalysisResult)
+    Args:
+        transactions (List[Transaction]): The transactions to record. IDs already recorded are skipped.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        dict: A dictionary containing the status ("success") and the number of transactions received, appended and skipped.
+
+    Raises:
+        HTTPException: If a transaction is inconsistent (status code 400).
+    """
+    try:
+        counts = alm_service.transactions.append_transactions(transactions)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "success", **counts}
+
+@router.get("/accounts/{account_id}/transactions", response_model=List[Transaction])
+async def get_account_transactions(
+    account_id: str,
+    start: date = Query(None),
+    end: date = Query(None),
+    limit: int = Query(1000, ge=1, le=10_000),
+    offset: int = Query(0, ge=0),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get the transactions debiting or crediting an account, oldest first.
+
+    Args:
+        account_id (str): The ID of the account.
+        start (date, optional): First day included. Defaults to the beginning of the history.
+        end (date, optional): Last day included. Defaults to the end of the history.
+        limit (int, optional): Maximum number of transactions returned. Defaults to 1000.
+        offset (int, optional): Number of transactions skipped, for paging. Defaults to 0.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        List[Transaction]: The account's transactions in the range.
+    """
+    return alm_service.transactions.get_account_transactions(account_id, start, end, limit, offset)
+
+@router.get("/accounts/{account_id}/flows", response_model=FlowSeries)
+async def get_account_flows(
+    account_id: str,
+    granularity: str = Query("day"),
+    start: date = Query(None),
+    end: date = Query(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get the daily or monthly flow and balance series of an account.
+
+    Args:
+        account_id (str): The ID of the account.
+        granularity (str, optional): "day" or "month". Defaults to "day".
+        start (date, optional): First day covered. Defaults to one year before `end`.
+        end (date, optional): Last day covered. Defaults to the current date.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        FlowSeries: The opening balance and the periods with activity.
+
+    Raises:
+        HTTPException: If the granularity or range is invalid (status code 400).
+    """
+    end = end or date.today()
+    try:
+        return alm_service.transactions.get_flow_series(granularity, start or end - timedelta(days=365), end, account_id=account_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/products/{product}/flows", response_model=FlowSeries)
+async def get_product_flows(
+    product: str,
+    currency: str,
+    granularity: str = Query("day"),
+    start: date = Query(None),
+    end: date = Query(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get the daily or monthly flow and balance series of all accounts of one type in one currency.
+
+    Args:
+        product (str): The account type (e.g. "Savings").
+        currency (str): The currency of the flows.
+        granularity (str, optional): "day" or "month". Defaults to "day".
+        start (date, optional): First day covered. Defaults to one year before `end`.
+        end (date, optional): Last day covered. Defaults to the current date.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        FlowSeries: The opening balance and the periods with activity.
+
+    Raises:
+        HTTPException: If the granularity or range is invalid (status code 400).
+    """
+    end = end or date.today()
+    try:
+        return alm_service.transactions.get_flow_series(granularity, start or end - timedelta(days=365), end, product=product, currency=currency)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/concentration", response_model=ConcentrationReport)
+async def get_concentration_report(
+    as_of_date: date = Query(None),
+    top_n: int = Query(10, ge=1, le=500),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get exposure concentration by counterparty, group, sector and currency.
+
+    Args:
+        as_of_date (date, optional): The date of the positions. Defaults to the current date.
+        top_n (int, optional): Number of counterparties and groups to rank. Defaults to 10.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        ConcentrationReport: HHI, top exposures and large exposures.
+
+    Raises:
+        HTTPException: If the server is overloaded (status code 429 or 503).
+    """
+    return await _run_heavy("concentration", alm_service.get_concentration_report, as_of_date or date.today(), top_n)
+
+@router.post("/gap-analysis", response_model=GapAnalysisReport)
 async def perform_gap_analysis(
     request: GapAnalysisRequest,
     current_user: dict = Depends(get_current_user)
@@ -109,9 +490,270 @@ async def perform_gap_analysis(
         current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
 
     Returns:
-        GapAnalysisResult: The result of the gap analysis.
+        GapAnalysisReport: The result of the gap analysis.
+
+    Raises:
+        HTTPException: If the time buckets or the scenario are invalid (status code 400), or the server is overloaded (status code 429 or 503).
+    """
+    try:
+        return await _run_heavy("gap-analysis", alm_service.perform_gap_analysis, request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/sensitivity", response_model=SensitivityReport)
+async def get_sensitivity(
+    as_of_date: date = Query(None),
+    bump_bp: float = Query(1.0, gt=0),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get EVE, DV01 and key-rate durations per currency and per category.
+
+    Args:
+        as_of_date (date, optional): The valuation date. Defaults to the current date.
+        bump_bp (float, optional): Size of the parallel and key-rate bumps in basis points. Defaults to 1.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        SensitivityReport: The interest-rate sensitivity report.
+
+    Raises:
+        HTTPException: If the server is overloaded (status code 429 or 503).
+    """
+    return await _run_heavy("sensitivity", alm_service.compute_sensitivities, as_of_date or date.today(), bump_bp)
+
+@router.get("/nii", response_model=NIIProjection)
+async def project_nii(
+    as_of_date: date = Query(None),
+    horizon_months: int = Query(12, ge=12, le=60),
+    rollover: bool = Query(True),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Project monthly net interest income under the base case and the six standard rate scenarios.
+
+    Args:
+        as_of_date (date, optional): The date of the positions. Defaults to the current date.
+        horizon_months (int, optional): Number of months to project, 12 to 60. Defaults to 12.
+        rollover (bool, optional): Roll maturing balances over instead of letting them run off. Defaults to True.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        NIIProjection: Monthly interest income, expense and NII per scenario.
+
+    Raises:
+        HTTPException: If the request is shed under load (429 or 503).
+    """
+    return await _run_heavy("nii", alm_service.project_nii, as_of_date or date.today(), horizon_months, rollover)
+
+@router.get("/ftp", response_model=FTPReport)
+async def run_ftp(
+    as_of_date: date = Query(None),
+    method: str = Query("matched_maturity"),
+    liquidity_premium: bool = Query(True),
+    incremental: bool = Query(True),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Transfer price the book and get margins by category and currency.
+
+    Args:
+        as_of_date (date, optional): The date of the positions. Defaults to the current date.
+        method (str, optional): "matched_maturity", "repricing_term" or "pooled". Defaults to "matched_maturity".
+        liquidity_premium (bool, optional): Include liquidity premium add-ons. Defaults to True.
+        incremental (bool, optional): Only price positions without a locked rate (new business). Defaults to True.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        FTPReport: Transfer rates and margins aggregated over the book.
+
+    Raises:
+        HTTPException: If the method is unknown (status code 400) or the server is overloaded (429 or 503).
+    """
+    try:
+        return await _run_heavy("ftp", alm_service.ftp.run_ftp, as_of_date or date.today(), method, liquidity_premium, incremental)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/behaviour/calibration", response_model=BehaviouralCalibration)
+async def calibrate_behaviour(
+    as_of_date: date = Query(None),
+    refit: bool = Query(False),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get deposit decay and loan prepayment parameters calibrated per product segment.
+
+    Args:
+        as_of_date (date, optional): The calibration date. Defaults to the current date.
+        refit (bool, optional): Fit again even if the date is already calibrated. Defaults to False.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        BehaviouralCalibration: The calibrated parameters of every segment.
+
+    Raises:
+        HTTPException: If the server is overloaded (status code 429 or 503).
+    """
+    return await _run_heavy("behaviour", alm_service.behaviour.calibrate_behaviour, as_of_date or date.today(), refit)
+
+@router.post("/sandboxes", response_model=Sandbox)
+async def create_sandbox(
+    request: SandboxRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Open a what-if sandbox over the positions of a date.
+
+    Sandbox changes are only seen by what-if runs of that sandbox; the positions themselves are left untouched.
+
+    Args:
+        request (SandboxRequest): The date of the base positions.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        Sandbox: The new, empty sandbox.
+    """
+    return alm_service.sandboxes.create_sandbox(request.as_of_date)
+
+@router.get("/sandboxes/{sandbox_id}", response_model=Sandbox)
+async def get_sandbox(
+    sandbox_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get a what-if sandbox.
+
+    Args:
+        sandbox_id (str): The ID of the sandbox.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        Sandbox: The sandbox and the number of positions it changes.
+
+    Raises:
+        HTTPException: If there is no such sandbox (status code 404).
+    """
+    sandbox = alm_service.sandboxes.get_sandbox(sandbox_id)
+    if sandbox is None:
+        raise HTTPException(status_code=404, detail=f"Sandbox {sandbox_id} not found")
+    return sandbox
+
+@router.delete("/sandboxes/{sandbox_id}")
+async def delete_sandbox(
+    sandbox_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Discard a what-if sandbox.
+
+    Args:
+        sandbox_id (str): The ID of the sandbox.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        dict: A dictionary containing the status ("success") and the sandbox ID.
+
+    Raises:
+        HTTPException: If there is no such sandbox (status code 404).
+    """
+    if not alm_service.sandboxes.delete_sandbox(sandbox_id):
+        raise HTTPException(status_code=404, detail=f"Sandbox {sandbox_id} not found")
+    return {"status": "success", "id": sandbox_id}
+
+@router.put("/sandboxes/{sandbox_id}/positions", response_model=Sandbox)
+async def upsert_sandbox_positions(
+    sandbox_id: str,
+    positions: List[AssetLiability],
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Add hypothetical positions to a sandbox, or amend positions with the same ID.
+
+    Args:
+        sandbox_id (str): The ID of the sandbox.
+        positions (List[AssetLiability]): The positions to add or amend.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        Sandbox: The updated sandbox.
+
+    Raises:
+        HTTPException: If there is no such sandbox (status code 404).
+    """
+    sandbox = alm_service.sandboxes.upsert_sandbox_positions(sandbox_id, positions)
+    if sandbox is None:
+        raise HTTPException(status_code=404, detail=f"Sandbox {sandbox_id} not found")
+    return sandbox
+
+@router.delete("/sandboxes/{sandbox_id}/positions/{position_id}", response_model=Sandbox)
+async def remove_sandbox_position(
+    sandbox_id: str,
+    position_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Remove a position from the book of a sandbox.
+
+    Args:
+        sandbox_id (str): The ID of the sandbox.
+        position_id (str): The ID of the base or sandbox position to remove.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        Sandbox: The updated sandbox.
+
+    Raises:
+        HTTPException: If there is no such sandbox (status code 404).
+    """
+    sandbox = alm_service.sandboxes.remove_sandbox_position(sandbox_id, position_id)
+    if sandbox is None:
+        raise HTTPException(status_code=404, detail=f"Sandbox {sandbox_id} not found")
+    return sandbox
+
+@router.get("/sandboxes/{sandbox_id}/what-if", response_model=WhatIfResult)
+async def run_what_if(
+    sandbox_id: str,
+    horizon_months: int = Query(12, ge=1, le=60),
+    deposit_runoff: float = Query(0.0, ge=0.0, le=1.0),
+    haircut: float = Query(0.0, ge=0.0, le=1.0),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Compare gap, NII and liquidity coverage of a sandbox with those of its base positions.
+
+    Args:
+        sandbox_id (str): The ID of the sandbox.
+        horizon_months (int, optional): Number of months of NII. Defaults to 12.
+        deposit_runoff (float, optional): Deposit runoff on top of the calibrated runoff. Defaults to 0.
+        haircut (float, optional): Haircut on liquid assets. Defaults to 0.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        WhatIfResult: Base, what-if and change of each metric.
+
+    Raises:
+        HTTPException: If there is no such sandbox (status code 404) or the server is overloaded (429 or 503).
     """
-    return alm_service.perform_gap_analysis(request)
+    result = await _run_heavy("what-if", alm_service.sandboxes.run_what_if, sandbox_id, horizon_months, deposit_runoff, haircut)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Sandbox {sandbox_id} not found")
+    return result
+
+@router.get("/metrics/compression")
+async def get_compression_metrics(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get bytes on the wire and compression CPU time per endpoint and content coding since startup.
+
+    Args:
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        dict: Figures per endpoint ("METHOD /path"), in total and per encoding.
+    """
+    return compression_metrics.report()
 
 @router.get("/stress-test/scenarios", response_model=List[StressTestScenario])
 async def get_stress_test_scenarios(
@@ -146,8 +788,220 @@ async def run_stress_test(
 
     Returns:
         StressTestResult: The result of the stress test.
+
+    Raises:
+        HTTPException: If the scenario does not exist (status code 404) or the server is overloaded (status code 429 or 503).
     """
-    return alm_service.run_stress_test(scenario_id, as_of_date or date.today())
+    try:
+        return await _run_heavy("stress-test", alm_service.run_stress_test, scenario_id, as_of_date or date.today())
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.post("/stress-test/grid", response_model=ScenarioGridResult)
+async def run_scenario_grid(
+    request: ScenarioGridRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Evaluate a what-if grid of rate shock, deposit runoff and haircut combinations.
+
+    Args:
+        request (ScenarioGridRequest): The parameter ranges spanning the grid.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        ScenarioGridResult: The impact metrics over the grid.
+
+    Raises:
+        HTTPException: If the grid is too large (status code 400) or the server is overloaded (429 or 503).
+    """
+    try:
+        return await _run_heavy("scenario-grid", alm_service.run_scenario_grid, request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/stress-test/reverse", response_model=ReverseStressResult)
+async def run_reverse_stress_test(
+    request: ReverseStressRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Find the least severe rate shock, deposit runoff and haircut combination that breaches a risk appetite metric.
+
+    Args:
+        request (ReverseStressRequest): The metric, parameter bounds and search settings.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        ReverseStressResult: The breaching scenario found, if any, and the scenarios evaluated.
+
+    Raises:
+        HTTPException: If the metric cannot be stressed (status code 400) or the server is overloaded (429 or 503).
+    """
+    try:
+        return await _run_heavy("stress-test", alm_service.run_reverse_stress_test, request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/market-risk/var", response_model=MarketRiskReport)
+async def get_market_var(
+    as_of_date: date = Query(None),
+    confidence: float = Query(0.99, gt=0, lt=1),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get historical-simulation VaR and expected shortfall for the bond and FX books.
+
+    Args:
+        as_of_date (date, optional): The date of the positions. Defaults to the current date.
+        confidence (float, optional): The VaR confidence level. Defaults to 0.99.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        MarketRiskReport: VaR and expected shortfall per desk, per currency and in total.
+
+    Raises:
+        HTTPException: If no risk-factor history is available (status code 400) or the server is overloaded (status code 429 or 503).
+    """
+    try:
+        return await _run_heavy("market-risk", alm_service.get_market_var, as_of_date or date.today(), confidence)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/market-risk/history")
+async def append_market_returns(
+    returns: MarketFactorReturns,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Append one day of risk-factor returns to the rolling VaR window.
+
+    Args:
+        returns (MarketFactorReturns): The day's factor returns.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        dict: A dictionary containing the status ("success") and the number of days in the window.
+
+    Raises:
+        HTTPException: If the date is not after the last loaded day or a factor is unknown (status code 400).
+    """
+    try:
+        window_days = alm_service.append_market_returns(returns)
+        return {"status": "success", "window_days": window_days}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _file_response(chunks, format: str, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{FILE_EXTENSIONS[format]}"'},
+    )
+
+@router.get("/export/positions")
+async def export_positions(
+    as_of_date: date = Query(None),
+    format: str = "arrow",
+    columns: Optional[List[str]] = Query(None),
+    type: Optional[str] = None,
+    category: Optional[List[str]] = Query(None),
+    currency: Optional[List[str]] = Query(None),
+    maturity_from: Optional[date] = None,
+    maturity_to: Optional[date] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Stream positions as an Arrow IPC stream or a Parquet file.
+
+    Args:
+        as_of_date (date, optional): The date of the positions. Defaults to the current date.
+        format (str, optional): "arrow" or "parquet". Defaults to "arrow".
+        columns (List[str], optional): Position fields to export. Defaults to all fields.
+        type (str, optional): Only export assets or liabilities.
+        category (List[str], optional): Only export these categories.
+        currency (List[str], optional): Only export these currencies.
+        maturity_from (date, optional): Only export positions maturing on or after this date.
+        maturity_to (date, optional): Only export positions maturing on or before this date.
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        StreamingResponse: The encoded positions.
+
+    Raises:
+        HTTPException: If the format or a column is unknown (status code 400).
+    """
+    as_of_date = as_of_date or date.today()
+    try:
+        chunks = alm_service.positions.export_positions(
+            as_of_date, format, columns,
+            type=type, categories=category, currencies=currency,
+            maturity_from=maturity_from, maturity_to=maturity_to,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _file_response(chunks, format, f"positions_{as_of_date.isoformat()}")
+
+@router.get("/export/results/{table}")
+async def export_results(
+    table: str,
+    as_of_date: date = Query(None),
+    format: str = "arrow",
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Stream an analytics result table ("gap", "sensitivity" or "concentration") as Arrow IPC or Parquet.
+
+    Args:
+        table (str): The result table to export.
+        as_of_date (date, optional): The date of the positions. Defaults to the current date.
+        format (str, optional): "arrow" or "parquet". Defaults to "arrow".
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        StreamingResponse: The encoded result table.
+
+    Raises:
+        HTTPException: If the table or format is unknown (status code 400).
+    """
+    as_of_date = as_of_date or date.today()
+    try:
+        chunks = alm_service.export_result_table(table, as_of_date, format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _file_response(chunks, format, f"{table}_{as_of_date.isoformat()}")
+
+@router.post("/import/positions")
+async def import_positions(
+    file: UploadFile = File(...),
+    format: str = "arrow",
+    as_of_date: date = Query(None),
+    corrections: List[str] = Query([]),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Load positions from an Arrow IPC stream or Parquet file, such as one produced by /export/positions.
+
+    Rows are validated as they are read; rejected rows are left out and reported.
+
+    Args:
+        file (UploadFile): The position file.
+        format (str, optional): "arrow" or "parquet". Defaults to "arrow".
+        as_of_date (date, optional): The date the positions are valid from. Defaults to the date stored in the file, then to the current date.
+        corrections (List[str], optional): Automatic corrections to apply ("normalize_codes", "absolute_amount").
+        current_user (dict, optional): The currently authenticated user. Provided by the get_current_user dependency.
+
+    Returns:
+        dict: A dictionary containing the status ("success"), the number of rows read and the anomaly report.
+
+    Raises:
+        HTTPException: If the format or a correction is unknown, or the file lacks position columns (status code 400).
+    """
+    try:
+        count, anomalies = alm_service.positions.import_positions(file.file, format, as_of_date, corrections)
+        return {"status": "success", "imported": count, "anomalies": anomalies}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/risk-appetite", response_model=List[RiskAppetite])
 async def get_risk_appetite(
@@ -206,6 +1060,9 @@ async def generate_alco_report(
 
     Returns:
         dict: A dictionary containing the URL of the generated report.
+
+    Raises:
+        HTTPException: If the server is overloaded (status code 429 or 503).
     """
-    report_url = alm_service.generate_alco_report(as_of_date or date.today(), format)
+    report_url = await _run_heavy("alco-report", alm_service.generate_alco_report, as_of_date or date.today(), format)
     return {"report_url": report_url}
\ No newline at end of file
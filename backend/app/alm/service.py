@@ -1,29 +1,179 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable, Iterator, Sequence, Tuple
 from datetime import date, datetime
 import logging
+import threading
+
+import numpy as np
+
 from .models import (
     AssetLiability,
     GapAnalysisRequest,
-    GapAnalysisResult,
+    GapAnalysisReport,
     StressTestScenario,
     StressTestResult,
     RiskAppetite,
     RiskType,
-    DataSource
+    DataSource,
+    SensitivityReport,
+    ScenarioGridRequest,
+    ScenarioGridResult,
+    MarketRiskReport,
+    MarketFactorReturns,
+    ConcentrationReport,
+    Dashboard,
+    NIIProjection,
+    NIIScenario,
+    ReverseStressRequest,
+    ReverseStressResult,
+    RiskAssessment
+)
+from .sensitivity import BP
+from .scenario_grid import evaluate_grid
+from .market_risk import HistoricalVaR, RiskFactorHistory, default_risk_factors, desk_sensitivities
+from .curves import FX_SPOT
+from .dashboard import SCORE_THRESHOLDS, MaterializedView, Snapshot, appetite_score
+from .repository import ALMRepository, SQLiteRepository
+from .behaviour import stressed_runoff
+from .extraction import SourceConnector
+from .gap import DASHBOARD_GAP_PERIODS, bucket_years, gap_by_period
+from .nii import NIIEngine, parallel_scenario, regulatory_scenarios
+from .reverse_stress import ReverseStressSearch
+from .services import (
+    AccountService, BehaviourService, FTPService, PositionService, SandboxService, SourceService, TransactionService,
 )
+from . import export
+
+# Largest number of combinations a single scenario grid may hold
+MAX_GRID_POINTS = 1_000_000
+
+# Risk appetite metrics a reverse stress test can search on
+REVERSE_STRESS_METRICS = ("LCR", "NII Sensitivity to 100bp")
+
+# Result tables available for columnar export
+RESULT_TABLES = ("gap", "sensitivity", "concentration")
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+
 class ALMService:
-    """Service for handling Asset Liability Management (ALM) operations.  This class uses mock data for demonstration; a production system would connect to a database."""
+    """
+    Service for handling Asset Liability Management (ALM) operations.
+
+    Each domain (positions, data sources, accounts, transactions, transfer pricing,
+    behaviour and what-if sandboxes) has its own service over its own repositories;
+    this service composes them and runs the risk analytics that read across them.
+    Data is persisted through an ALMRepository (SQLite by default), seeded with
+    demonstration data on first use.
+    """
+
+    def __init__(self, repository: Optional[ALMRepository] = None, connectors: Optional[Dict[str, SourceConnector]] = None):
+        # The store and the domain services over it are opened (and seeded if empty) on first use, so importing the service touches no file
+        self._repository = repository
+        self._repository_ready = False
+        self._repository_lock = threading.Lock()
+        # Connectors by data source name, handed to the data source service
+        self._connectors = dict(connectors or {})
+        # Rolling risk-factor history and the VaR engine built on it, with the (as-of date, data version) of its desks
+        self._market_var = HistoricalVaR(self._initialize_mock_market_history())
+        self._market_var_key: Optional[Tuple[date, int]] = None
+        self._market_lock = threading.Lock()
+        # Serialized dashboard, rebuilt in the background when the data version or the day changes
+        self._dashboard = MaterializedView(
+            build=lambda: self.build_dashboard(date.today()).model_dump_json().encode(),
+            version=lambda: (self.data_version, date.today()),
+            name="dashboard",
+        )
+
+    @property
+    def repository(self) -> ALMRepository:
+        """The data store, opened on first use; restarting a worker reuses what is already there."""
+        if not self._repository_ready:
+            with self._repository_lock:
+                if not self._repository_ready:
+                    repository = self._repository or SQLiteRepository()
+                    if repository.is_empty():
+                        self._seed(repository, self._initialize_mock_data())
+                    self._open_services(repository)
+                    self._repository = repository
+                    self._repository_ready = True
+        return self._repository
+
+    def _open_services(self, repository: ALMRepository) -> None:
+        """Build the domain services, each over the repositories it reads and writes."""
+        self._positions = PositionService(repository.positions, repository.reference)
+        self._sources = SourceService(repository.sources, self._positions, self._connectors)
+        self._accounts = AccountService(repository.accounts)
+        self._transactions = TransactionService(repository.transactions)
+        self._ftp = FTPService(repository.ftp, self._positions)
+        self._behaviour = BehaviourService(repository.behaviour, repository.transactions)
+        self._sandboxes = SandboxService(repository.sandboxes, self._positions, self._behaviour)
+
+    @property
+    def positions(self) -> PositionService:
+        """Positions of the book and the analytics caches built from them."""
+        self.repository
+        return self._positions
+
+    @property
+    def sources(self) -> SourceService:
+        """Data sources and the extraction of their positions."""
+        self.repository
+        return self._sources
+
+    @property
+    def accounts(self) -> AccountService:
+        """Accounts and their risk scores."""
+        self.repository
+        return self._accounts
+
+    @property
+    def transactions(self) -> TransactionService:
+        """The transaction log and its flow series."""
+        self.repository
+        return self._transactions
+
+    @property
+    def ftp(self) -> FTPService:
+        """Funds transfer pricing of the book."""
+        self.repository
+        return self._ftp
+
+    @property
+    def behaviour(self) -> BehaviourService:
+        """Behavioural calibrations of deposits and loans."""
+        self.repository
+        return self._behaviour
+
+    @property
+    def sandboxes(self) -> SandboxService:
+        """What-if sandboxes over the positions of a date."""
+        self.repository
+        return self._sandboxes
+
+    def close(self) -> None:
+        """Stop the calibration threads and close the store, if it was opened."""
+        if self._repository_ready:
+            self._behaviour.close()
+            self._repository.close()
+
+    @property
+    def data_version(self) -> int:
+        """Version of the stored data, shared by every worker using the same repository."""
+        return self.repository.positions.data_version()
 
-    def __init__(self):
-        # Initialize mock data. In a real application, this would involve database connection.
-        self.mock_data = self._initialize_mock_data()
+    @staticmethod
+    def _seed(repository: ALMRepository, data: Dict[str, Any]) -> None:
+        """Write initial reference data and positions to an empty repository."""
+        repository.sources.save_datasources(data["datasources"])
+        repository.reference.save_scenarios(data["scenarios"])
+        repository.reference.save_risk_appetite(data["risk_appetite"])
+        repository.reference.save_counterparty_hierarchy(data["counterparty_hierarchy"])
+        repository.reference.set_eligible_capital(data["eligible_capital"])
+        repository.positions.save_positions(date.today(), data["assets"] + data["liabilities"])
 
     def _initialize_mock_data(self) -> Dict[str, Any]:
-        """Initialize mock data for demonstration purposes.  This creates sample assets, liabilities, scenarios, and risk appetite data."""
+        """Initialize mock data for demonstration purposes.  This creates sample assets, liabilities, scenarios, and risk appetite data used to seed an empty repository."""
         today = date.today()
         return {
             "datasources": [
@@ -71,7 +221,7 @@ class ALMService:
                     category="deposits",
                     amount=800000.0,
                     currency="TND",
-                    maturity_date=date(today.year, today.month + 3, 1),
+                    maturity_date=date(today.year + (today.month + 2) // 12, (today.month + 2) % 12 + 1, 1),
                     interest_rate=2.5,
                     fixed_rate=True,
                     counterparty="Retail Customers"
@@ -121,93 +271,500 @@ class ALMService:
                     threshold_critical=15,
                     current_value=7.5
                 )
-            ]
+            ],
+            # Counterparty -> (group of connected clients, sector)
+            "counterparty_hierarchy": {
+                "Corporate Client 1": ("Corporate Group A", "corporate"),
+                "Government": ("Republic of Tunisia", "sovereign"),
+                "Retail Customers": ("Retail Customers", "retail"),
+                "Central Bank": ("Central Bank of Tunisia", "sovereign")
+            },
+            "eligible_capital": 400000.0
+        }
+
+    def _initialize_mock_market_history(self, days: int = 250) -> RiskFactorHistory:
+        """Generate a synthetic year of daily risk-factor returns for demonstration purposes."""
+        history = RiskFactorHistory(default_risk_factors(), window=days)
+        rng = np.random.default_rng(42)
+        is_rate = np.array([name.startswith("IR.") for name in history.factors])
+        # Rates move mostly in parallel per day (bp); FX returns are independent log returns
+        level = rng.normal(0.0, 4.0, size=(days, 1))
+        returns = np.where(is_rate, level + rng.normal(0.0, 1.5, size=(days, len(history.factors))),
+                           rng.normal(0.0, 0.004, size=(days, len(history.factors))))
+        start = np.busday_offset(np.datetime64(date.today(), "D"), -days, roll="backward")
+        for i in range(days):
+            history.append(np.busday_offset(start, i).item(), returns[i])
+        return history
+
+    def compute_sensitivities(self, as_of_date: date, bump_bp: float = 1.0) -> SensitivityReport:
+        """Compute EVE, DV01 and key-rate durations per currency and category."""
+        engine = self.positions.get_sensitivity_engine(as_of_date)
+        return SensitivityReport(as_of_date=as_of_date, bump_bp=bump_bp, **engine.run(bump_bp))
+
+    def project_nii(self, as_of_date: date, horizon_months: int = 12, rollover: bool = True) -> NIIProjection:
+        """
+        Project monthly NII under the base case and the six standard rate scenarios.
+
+        Args:
+            as_of_date: Date of the positions.
+            horizon_months: Number of months to project.
+            rollover: Roll maturing balances over (constant balance sheet) instead of letting them run off.
+
+        Returns:
+            NIIProjection: Monthly income, expense and NII per scenario.
+        """
+        engine = NIIEngine(self.positions.get_position_frame(as_of_date), rollover=rollover)
+        result = engine.project(horizon_months, regulatory_scenarios())
+        start = np.datetime64(as_of_date, "M") + 1
+        months = [str(start + i) for i in range(horizon_months)]
+        totals = result["nii"].sum(axis=1)
+        scenarios = {
+            name: NIIScenario(
+                interest_income=result["interest_income"][s].tolist(),
+                interest_expense=result["interest_expense"][s].tolist(),
+                nii=result["nii"][s].tolist(),
+                total_nii=float(totals[s]),
+                change_vs_base=float(totals[s] - totals[0]),
+                by_currency={ccy: float(values[s]) for ccy, values in result["by_currency"].items()},
+            )
+            for s, name in enumerate(result["scenarios"])
+        }
+        return NIIProjection(
+            as_of_date=as_of_date,
+            horizon_months=horizon_months,
+            rollover=rollover,
+            months=months,
+            scenarios=scenarios,
+        )
+
+    def run_scenario_grid(self, request: ScenarioGridRequest) -> ScenarioGridResult:
+        """
+        Evaluate a rate shock x deposit runoff x haircut grid in one broadcast computation.
+
+        With `behavioural` set and deposits calibrated, each deposit runoff of the grid
+        withdraws that share of what remains after the calibrated one-month runoff.
+        """
+        as_of_date = request.as_of_date or date.today()
+        coords = {
+            name: np.linspace(r.start, r.stop, r.steps)
+            for name, r in (
+                ("rate_shock_bp", request.rate_shock_bp),
+                ("deposit_runoff", request.deposit_runoff),
+                ("haircut", request.haircut),
+            )
+        }
+        n_points = int(np.prod([len(v) for v in coords.values()]))
+        if n_points > MAX_GRID_POINTS:
+            raise ValueError(f"Scenario grid has {n_points} points, the maximum is {MAX_GRID_POINTS}")
+
+        behavioural = self.behaviour.behavioural_runoff(as_of_date) if request.behavioural else None
+        metrics = evaluate_grid(
+            self.positions.get_sensitivity_engine(as_of_date),
+            coords["rate_shock_bp"],
+            coords["deposit_runoff"] if behavioural is None else stressed_runoff(behavioural, coords["deposit_runoff"]),
+            coords["haircut"],
+        )
+        return ScenarioGridResult(
+            as_of_date=as_of_date,
+            coords={name: values.tolist() for name, values in coords.items()},
+            behavioural_runoff=behavioural,
+            metrics={
+                name: {
+                    "dims": metric["dims"],
+                    # Non-finite cells (undefined ratios) are sent as null
+                    "values": np.where(np.isfinite(metric["values"]), metric["values"], None).tolist(),
+                }
+                for name, metric in metrics.items()
+            },
+        )
+
+    def get_concentration_report(self, as_of_date: date, top_n: int = 10) -> ConcentrationReport:
+        """Report exposure concentration by counterparty, group, sector and currency."""
+        capital = self.repository.reference.eligible_capital()
+        with self.positions.concentration(as_of_date) as engine:
+            report = engine.report(top_n, capital)
+        return ConcentrationReport(as_of_date=as_of_date, eligible_capital=capital, **report)
+
+    def get_market_var(self, as_of_date: date, confidence: float = 0.99) -> MarketRiskReport:
+        """
+        Compute historical VaR and expected shortfall for the bond and FX books.
+
+        Desk sensitivities are derived again only when the as-of date or the data version
+        differs from the last call, and then only desks whose sensitivities changed are revalued.
+        """
+        self.positions.sync_caches()
+        with self._market_lock:
+            key = (as_of_date, self.positions.cache_version)
+            if key != self._market_var_key:
+                factors = self._market_var.history.factors
+                self._market_var.set_sensitivities(desk_sensitivities(self.positions.get_sensitivity_engine(as_of_date), factors))
+                self._market_var_key = key
+            desks = list(self._market_var.desks)
+            groups: Dict[str, List[str]] = {}
+            for desk in desks:
+                groups.setdefault(desk.split("/")[1], []).append(desk)
+            figures = self._market_var.run(confidence, groups)
+        return MarketRiskReport(
+            as_of_date=as_of_date,
+            confidence=confidence,
+            window_days=len(self._market_var.history),
+            history_end=self._market_var.history.last_date,
+            by_desk={desk: figures[desk] for desk in desks},
+            by_currency={ccy: figures[ccy] for ccy in groups},
+            total=figures["TOTAL"],
+        )
+
+    def append_market_returns(self, returns: MarketFactorReturns) -> int:
+        """Roll the market risk window forward by one day of factor returns.  Returns the window size."""
+        with self._market_lock:
+            self._market_var.append_day(returns.as_of_date, returns.returns)
+            window_days = len(self._market_var.history)
+        self._dashboard.refresh()
+        return window_days
+
+    @property
+    def dashboard_ready(self) -> bool:
+        """True once the dashboard has been materialized, so reading it no longer builds it."""
+        return self._dashboard.ready
+
+    def get_dashboard_snapshot(self) -> Snapshot:
+        """Return the materialized dashboard.  This is a cache read, except for the very first call, which builds it."""
+        return self._dashboard.get()
+
+    def build_dashboard(self, as_of_date: date) -> Dashboard:
+        """Assemble the dashboard aggregate (risk scores, stress tests and gap analysis) from the risk engines."""
+        now = datetime.now()
+        capital = self.repository.reference.eligible_capital()
+        engine = self.positions.get_sensitivity_engine(as_of_date)
+
+        def assessment(risk_type: RiskType, score: float, description: str, action: str) -> RiskAssessment:
+            if score >= 80:
+                recommendations = ["Escalate to ALCO: critical threshold breached", action]
+            elif score >= 50:
+                recommendations = ["Monitor closely: warning threshold exceeded", action]
+            else:
+                recommendations = ["Within risk appetite"]
+            return RiskAssessment(
+                risk_type=risk_type,
+                risk_score=score,
+                analysis_date=now,
+                description=description,
+                recommendations=recommendations,
+            )
+
+        assessments = []
+        lcr = next((r for r in self.get_risk_appetite(RiskType.LIQUIDITY) if r.metric_name == "LCR"), None)
+        if lcr is not None:
+            assessments.append(assessment(
+                RiskType.LIQUIDITY,
+                appetite_score(lcr.current_value, lcr.threshold_warning, lcr.threshold_critical),
+                f"LCR at {lcr.current_value:.2f} (warning {lcr.threshold_warning:.2f}, critical {lcr.threshold_critical:.2f})",
+                "Increase the high-quality liquid asset buffer or lengthen funding",
+            ))
+        # Native-currency grids are converted before they are summed
+        eve = engine.base_pv.sum()
+        eve_loss = max(0.0, -min(
+            engine.in_base_currency(engine.parallel_shift(0.02)).sum(),
+            engine.in_base_currency(engine.parallel_shift(-0.02)).sum(),
+        ))
+        assessments.append(assessment(
+            RiskType.INTEREST_RATE,
+            appetite_score(eve_loss / capital, *SCORE_THRESHOLDS["eve_loss"]),
+            f"Worst EVE loss under +/-200bp is {eve_loss:,.0f} ({eve_loss / capital:.1%} of capital, EVE {eve:,.0f})",
+            "Reduce repricing mismatch with swaps or by adjusting new business tenors",
+        ))
+        try:
+            var = self.get_market_var(as_of_date).total.var
+            assessments.append(assessment(
+                RiskType.MARKET,
+                appetite_score(var / capital, *SCORE_THRESHOLDS["var"]),
+                f"1-day 99% historical VaR of the bond and FX books is {var:,.0f} ({var / capital:.1%} of capital)",
+                "Reduce open FX positions or bond book duration",
+            ))
+        except ValueError:
+            logger.warning("No risk-factor history, market risk omitted from dashboard")
+        concentration = self.get_concentration_report(as_of_date, top_n=1)
+        largest = concentration.top_groups[0] if concentration.top_groups else None
+        if largest is not None:
+            assessments.append(assessment(
+                RiskType.CONCENTRATION,
+                appetite_score(largest.capital_ratio, *SCORE_THRESHOLDS["large_exposure"]),
+                f"Largest group exposure is {largest.name} at {largest.capital_ratio:.1%} of capital; counterparty HHI {concentration.hhi['counterparty']:.3f}",
+                "Reduce or collateralize exposure to the largest groups",
+            ))
+
+        stress_tests = [
+            self._stress_result(i, scenario, as_of_date, now)
+            for i, scenario in enumerate(self.get_stress_test_scenarios(), start=1)
+        ]
+
+        gap = self._maturity_gap(as_of_date)
+        gap_analysis = [
+            {
+                "id": i + 1,
+                "analysis_date": now,
+                "period": period,
+                "assets": gap["assets"][i],
+                "liabilities": gap["liabilities"][i],
+                "gap": gap["gap"][i],
+                "relative_gap": gap["relative_gap"][i],
+                "description": None,
+            }
+            for i, period in enumerate(gap["period"])
+        ]
+
+        return Dashboard(
+            current_risk_assessment=assessments,
+            recent_stress_tests=stress_tests,
+            gap_analysis=gap_analysis,
+        )
+
+    def _maturity_gap(self, as_of_date: date) -> Dict[str, Any]:
+        """Assets, liabilities and gap (in TND) running off within each dashboard period."""
+        frame = self.positions.get_position_frame(as_of_date)
+        assets, liabilities = gap_by_period(frame, self.behaviour.behaviour_parameters(as_of_date))
+        spot = np.array([FX_SPOT.get(ccy, 1.0) for ccy in frame.currencies])
+        total_assets = (frame.amount * spot[frame.currency_codes])[frame.is_asset].sum()
+        gap = assets - liabilities
+        return {
+            "period": [period for period, _ in DASHBOARD_GAP_PERIODS],
+            "assets": assets.tolist(),
+            "liabilities": liabilities.tolist(),
+            "gap": gap.tolist(),
+            "relative_gap": (100.0 * gap / total_assets if total_assets else np.zeros_like(gap)).tolist(),
         }
 
-    def get_datasources(self) -> List[DataSource]:
-        """Retrieve all configured data sources."""
-        return self.mock_data["datasources"]
-
-    def extract_data(self, source_id: str, as_of_date: date) -> int:
-        """Extract data from a specified source.  This is a placeholder; a real implementation would connect to the data source."""
-        logger.info(f"Extracting data from source {source_id} as of {as_of_date}")
-        # Simulate data extraction
-        return 150
-
-    def get_assets(self, as_of_date: date, category: Optional[str] = None) -> List[AssetLiability]:
-        """Retrieve all assets as of a given date, optionally filtered by category."""
-        assets = self.mock_data["assets"]
-        if category:
-            assets = [a for a in assets if a.category == category]
-        return assets
-
-    def get_liabilities(self, as_of_date: date, category: Optional[str] = None) -> List[AssetLiability]:
-        """Retrieve all liabilities as of a given date, optionally filtered by category."""
-        liabilities = self.mock_data["liabilities"]
-        if category:
-            liabilities = [l for l in liabilities if l.category == category]
-        return liabilities
-
-    def perform_gap_analysis(self, request: GapAnalysisRequest) -> GapAnalysisResult:
-        """Perform gap analysis (static or dynamic).  This is a simplified mock implementation."""
-        assets = self.get_assets(request.as_of_date)
-        liabilities = self.get_liabilities(request.as_of_date)
-
-        # Mock gap calculation
-        assets_by_bucket = [1000000, 800000, 600000, 400000]
-        liabilities_by_bucket = [800000, 700000, 500000, 300000]
-        gap_by_bucket = [a - l for a, l in zip(assets_by_bucket, liabilities_by_bucket)]
-        cumulative_gap = []
-        running_sum = 0
-        for gap in gap_by_bucket:
-            running_sum += gap
-            cumulative_gap.append(running_sum)
-
-        return GapAnalysisResult(
+    def get_result_table(self, table: str, as_of_date: date) -> Dict[str, Sequence]:
+        """Return an analytics result as a table of columns, ready for columnar export."""
+        if table == "gap":
+            return self._maturity_gap(as_of_date)
+        if table == "sensitivity":
+            engine = self.positions.get_sensitivity_engine(as_of_date)
+            key_rates = -engine.key_rate_shifts(BP)
+            ccy, cat, tenor = np.indices(key_rates.shape).reshape(3, -1)
+            return {
+                "currency": [engine.frame.currencies[i] for i in ccy],
+                "category": [engine.frame.categories[i] for i in cat],
+                "tenor": [engine.tenor_labels[i] for i in tenor],
+                "key_rate_dv01": key_rates.ravel(),
+            }
+        if table == "concentration":
+            with self.positions.concentration(as_of_date) as engine:
+                totals = engine.indexes["counterparty"].totals
+                return {
+                    "counterparty": list(totals),
+                    "group": [engine.hierarchy.group_of(cp) for cp in totals],
+                    "sector": [engine.hierarchy.sector_of(cp) for cp in totals],
+                    "exposure": list(totals.values()),
+                }
+        raise ValueError(f"Unknown result table '{table}', expected one of {list(RESULT_TABLES)}")
+
+    def export_result_table(self, table: str, as_of_date: date, format: str) -> Iterator[bytes]:
+        """Stream an analytics result table as Arrow IPC or Parquet."""
+        return export.export_table(self.get_result_table(table, as_of_date), format)
+
+    def perform_gap_analysis(self, request: GapAnalysisRequest) -> GapAnalysisReport:
+        """
+        Perform a gap analysis of the book over the requested time buckets.
+
+        Each bucket holds the assets and liabilities (in TND) running off between the end
+        of the previous bucket and its own end, with the calibrated deposit retention and
+        loan prepayment applied as in the dashboard gap. New business is not projected,
+        so a dynamic analysis currently shows the same buckets as a static one.
+
+        Args:
+            request: As-of date, bucket labels ("2W", "3M", "1Y", ...) in increasing order,
+                and optionally the scenario the analysis refers to.
+
+        Returns:
+            GapAnalysisReport: Amounts, gap and cumulative gap per bucket.
+
+        Raises:
+            ValueError: If a bucket label is malformed, the buckets are not increasing, or the scenario is unknown.
+        """
+        bounds = np.array([bucket_years(label) for label in request.time_buckets])
+        if np.any(np.diff(bounds) <= 0):
+            raise ValueError("Time buckets must be in increasing order")
+        scenario_details = None
+        if request.scenario_id:
+            scenario = self.repository.reference.get_scenario(request.scenario_id)
+            if scenario is None:
+                raise ValueError(f"Scenario {request.scenario_id} not found")
+            scenario_details = {"id": scenario.id, "name": scenario.name, "parameters": scenario.parameters}
+
+        frame = self.positions.get_position_frame(request.as_of_date)
+        assets, liabilities = gap_by_period(frame, self.behaviour.behaviour_parameters(request.as_of_date), bounds)
+        gap = assets - liabilities
+        return GapAnalysisReport(
             as_of_date=request.as_of_date,
             time_buckets=request.time_buckets,
-            assets_by_bucket=assets_by_bucket,
-            liabilities_by_bucket=liabilities_by_bucket,
-            gap_by_bucket=gap_by_bucket,
-            cumulative_gap=cumulative_gap,
+            assets_by_bucket=assets.tolist(),
+            liabilities_by_bucket=liabilities.tolist(),
+            gap_by_bucket=gap.tolist(),
+            cumulative_gap=np.cumsum(gap).tolist(),
             is_dynamic=request.is_dynamic,
-            scenario_details={"name": "Base Scenario"} if request.scenario_id else None
+            scenario_details=scenario_details,
         )
 
     def get_stress_test_scenarios(self, risk_type: Optional[RiskType] = None) -> List[StressTestScenario]:
         """Retrieve all stress test scenarios, optionally filtered by risk type."""
-        scenarios = self.mock_data["scenarios"]
-        if risk_type:
-            scenarios = [s for s in scenarios if s.risk_type == risk_type]
-        return scenarios
+        return self.repository.reference.list_scenarios(risk_type)
+
+    def _stress_result(self, id: int, scenario: StressTestScenario, as_of_date: date, now: datetime) -> StressTestResult:
+        """
+        Apply a stress scenario to the book.
+
+        Rate scenarios ("shock", in percent) revalue all cash flows under the parallel shift; their
+        impact level is the EVE change in percent of eligible capital. Liquidity scenarios ("haircut",
+        "deposit_runoff") set the haircut liquidity buffer against deposit outflows, the scenario runoff
+        coming on top of the calibrated one; their impact level is the share of outflows in the total.
+        """
+        engine = self.positions.get_sensitivity_engine(as_of_date)
+        if "shock" in scenario.parameters:
+            delta = float(engine.in_base_currency(engine.parallel_shift(scenario.parameters["shock"] / 100.0)).sum())
+            capital = self.repository.reference.eligible_capital()
+            impact = 100.0 * abs(delta) / capital if capital else 100.0
+            detail = f"EVE change of {delta:,.0f}"
+            metrics = {"eve_change": delta, "eve_impact_pct": round(100.0 * delta / capital, 2) if capital else 0.0}
+        else:
+            behavioural = self.behaviour.behavioural_runoff(as_of_date) or 0.0
+            grid = evaluate_grid(
+                engine,
+                [0.0],
+                [stressed_runoff(behavioural, scenario.parameters.get("deposit_runoff", 0.0))],
+                [scenario.parameters.get("haircut", 0.0)],
+            )
+            buffer = float(grid["liquidity_buffer"]["values"][0, 0])
+            outflows = float(grid["deposit_outflows"]["values"][0])
+            impact = 100.0 * outflows / (buffer + outflows) if buffer + outflows > 0 else 0.0
+            detail = f"liquidity buffer {buffer:,.0f} against outflows of {outflows:,.0f}"
+            metrics = {"liquidity_buffer": buffer, "deposit_outflows": outflows, "net_liquidity": buffer - outflows}
+        return StressTestResult(
+            id=id,
+            scenario_name=scenario.name,
+            execution_date=now,
+            risk_type=scenario.risk_type,
+            impact_level=min(100.0, impact),
+            description=f"{scenario.description}: {detail}",
+            actions_recommended=["Review with ALCO"] if impact >= 50 else [],
+            impact_metrics=metrics,
+        )
 
     def run_stress_test(self, scenario_id: str, as_of_date: date) -> StressTestResult:
-        """Run a stress test based on a specific scenario. This is a placeholder; a production system would perform complex calculations."""
-        scenarios = self.mock_data["scenarios"]
-        scenario = next((s for s in scenarios if s.id == scenario_id), None)
-        if not scenario:
+        """
+        Run a stress test based on a specific scenario.
+
+        The result is the one shown on the dashboard for the scenario; rate scenarios also
+        report their 12-month NII impact ("nii_impact_pct", in percent of the unstressed NII).
+
+        Raises:
+            ValueError: If the scenario does not exist.
+        """
+        scenarios = self.get_stress_test_scenarios()
+        index = next((i for i, s in enumerate(scenarios, start=1) if s.id == scenario_id), None)
+        if index is None:
             raise ValueError(f"Scenario with ID {scenario_id} not found")
+        scenario = scenarios[index - 1]
 
-        # Mock stress test results
-        return StressTestResult(
-            scenario_id=scenario_id,
-            run_date=datetime.now(),
-            impact_metrics={
-                "capital_impact_pct": -2.5,
-                "nii_impact_pct": -5.8,
-                "liquidity_buffer_impact_pct": -10.2
+        result = self._stress_result(index, scenario, as_of_date, datetime.now())
+        if "shock" in scenario.parameters:
+            engine = NIIEngine(self.positions.get_position_frame(as_of_date))
+            nii = engine.project(
+                12, {"base": parallel_scenario(0.0), "shocked": parallel_scenario(scenario.parameters["shock"] * 100.0)}
+            )["nii"].sum(axis=1)
+            result.impact_metrics["nii_impact_pct"] = round(float(100.0 * (nii[1] - nii[0]) / abs(nii[0])), 2) if nii[0] else 0.0
+        return result
+
+    def _stress_metric(self, metric_name: str, as_of_date: date) -> Callable[[Dict[str, float]], float]:
+        """
+        Build the function evaluating a risk appetite metric under a rate shock / runoff / haircut scenario.
+
+        "LCR" is approximated, as in the dashboard stress tests, by the haircut liquidity
+        buffer over deposit outflows, the scenario runoff coming on top of the calibrated one.
+        "NII Sensitivity to 100bp" is the 12-month NII lost under the scenario's parallel
+        rate shock, in percent of the unstressed NII.
+
+        Raises:
+            ValueError: If the metric cannot be stressed.
+        """
+        if metric_name == "LCR":
+            engine = self.positions.get_sensitivity_engine(as_of_date)
+            behavioural = self.behaviour.behavioural_runoff(as_of_date) or 0.0
+
+            def coverage(scenario: Dict[str, float]) -> float:
+                runoff = stressed_runoff(behavioural, scenario["deposit_runoff"])
+                grid = evaluate_grid(engine, [scenario["rate_shock_bp"]], [runoff], [scenario["haircut"]])
+                return float(grid["liquidity_coverage"]["values"][0, 0, 0])
+            return coverage
+        if metric_name == "NII Sensitivity to 100bp":
+            engine = NIIEngine(self.positions.get_position_frame(as_of_date))
+            base = engine.project(12, {"base": parallel_scenario(0.0)})["nii"].sum()
+
+            def nii_loss(scenario: Dict[str, float]) -> float:
+                shocked = engine.project(12, {"shocked": parallel_scenario(scenario["rate_shock_bp"])})["nii"].sum()
+                return 100.0 * (base - shocked) / abs(base) if base else 0.0
+            return nii_loss
+        raise ValueError(f"Metric '{metric_name}' cannot be reverse stress tested, expected one of {list(REVERSE_STRESS_METRICS)}")
+
+    def run_reverse_stress_test(self, request: ReverseStressRequest) -> ReverseStressResult:
+        """
+        Search for the least severe scenario that pushes a risk appetite metric past its critical threshold.
+
+        Args:
+            request: Metric, optional threshold override, parameter bounds and search settings.
+
+        Returns:
+            ReverseStressResult: The breaching scenario found and the evaluations made.
+
+        Raises:
+            ValueError: If the metric is unknown or cannot be stressed.
+        """
+        as_of_date = request.as_of_date or date.today()
+        appetite = next((a for a in self.get_risk_appetite() if a.metric_name == request.metric_name), None)
+        if appetite is None:
+            raise ValueError(f"No risk appetite defined for metric '{request.metric_name}'")
+        threshold = appetite.threshold_critical if request.threshold is None else request.threshold
+        # Same convention as the appetite scores: the metric deteriorates from warning towards critical
+        higher_is_worse = appetite.threshold_critical >= appetite.threshold_warning
+
+        search = ReverseStressSearch(
+            self._stress_metric(request.metric_name, as_of_date),
+            threshold,
+            higher_is_worse,
+            bounds={
+                "rate_shock_bp": (-request.rate_shock_bp, request.rate_shock_bp),
+                "deposit_runoff": (0.0, request.deposit_runoff),
+                "haircut": (0.0, request.haircut),
             },
-            affected_assets=["A001", "A002"],
-            affected_liabilities=["L001", "L002"],
-            report_summary=f"Stress test for scenario '{scenario.name}' shows moderate impact on capital and NII."
+            tolerance=request.tolerance,
+            max_evaluations=request.max_evaluations,
+        )
+        result = search.run()
+
+        def finite(value: Optional[float]) -> Optional[float]:
+            return value if value is not None and np.isfinite(value) else None
+
+        return ReverseStressResult(
+            as_of_date=as_of_date,
+            metric_name=request.metric_name,
+            threshold=threshold,
+            higher_is_worse=higher_is_worse,
+            base_value=finite(result["base_value"]),
+            breached=result["breached"],
+            severity=result["severity"],
+            scenario=result["scenario"],
+            metric_value=finite(result["metric_value"]),
+            converged=result["converged"],
+            evaluations=result["evaluations"],
+            trace=[
+                {"scenario": scenario, "value": finite(value), "breach": search.breaches(value)}
+                for scenario, value in search.trace
+            ],
         )
 
     def get_risk_appetite(self, risk_type: Optional[RiskType] = None) -> List[RiskAppetite]:
         """Retrieve current risk appetite thresholds and values."""
-        risk_appetites = self.mock_data["risk_appetite"]
-        if risk_type:
-            risk_appetites = [r for r in risk_appetites if r.risk_type == risk_type]
-        return risk_appetites
+        return self.repository.reference.list_risk_appetite(risk_type)
 
     def generate_regulatory_report(self, report_type: str, as_of_date: date, format: str) -> str:
         """Generate a regulatory report. This is a placeholder;  a real implementation would generate a report file."""
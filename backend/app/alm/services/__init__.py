@@ -0,0 +1,15 @@
+# app/alm/services/__init__.py
+# This package holds the per-domain services composed by ALMService, each over its own repositories
+
+from .accounts import AccountService
+from .behaviour import BehaviourService
+from .ftp import FTPService
+from .positions import PositionService
+from .sandboxes import SandboxService
+from .sources import SourceService
+from .transactions import TransactionService
+
+__all__ = [
+    "AccountService", "BehaviourService", "FTPService", "PositionService", "SandboxService", "SourceService",
+    "TransactionService",
+]
@@ -0,0 +1,94 @@
+# app/alm/services/accounts.py
+# This file implements the account service: persisted account risk scores, kept up to date incrementally
+
+import logging
+import threading
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+
+from ..models import Account, AccountRiskAssessment, PortfolioRiskMetrics, RiskType
+from ..repository import AccountRepository, account_to_row
+from ..risk_scoring import assessment_rows, maturity_windows, portfolio_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AccountService:
+    """Accounts and their risk scores.  Accounts are scored when stored, and rescored only when their score can have moved."""
+
+    def __init__(self, repository: AccountRepository):
+        self.repository = repository
+        # Serializes account rescoring, so a day rollover is applied once
+        self._lock = threading.Lock()
+
+    def _score_accounts(self, rows: Sequence[tuple], as_of_date: date) -> int:
+        """Score account rows and store their assessments. Returns the number of accounts scored."""
+        if rows:
+            self.repository.save_account_risk(assessment_rows(rows, as_of_date))
+        return len(rows)
+
+    def _store_risk_summary(self, scored_on: date) -> None:
+        """Precompute the portfolio aggregates served by get_portfolio_risk."""
+        metrics = portfolio_metrics(self.repository.summarize_account_risk())
+        self.repository.save_risk_summary({"scored_on": scored_on.isoformat(), **metrics})
+
+    def _refresh_account_risk(self, as_of_date: date) -> None:
+        """Rescore the accounts whose interest-rate score moved since the scores were last brought up to date. Caller holds the lock."""
+        scored_on = self.repository.risk_scored_on()
+        if scored_on == as_of_date:
+            return
+        if scored_on is not None:
+            windows = maturity_windows(scored_on, as_of_date)
+            rescored = sum(
+                self._score_accounts(rows, as_of_date)
+                for rows in self.repository.iter_account_rows(maturity_windows=windows)
+            )
+            logger.info(f"Rescored {rescored} accounts crossing a maturity tier since {scored_on}")
+        self.repository.set_risk_scored_on(as_of_date)
+        self._store_risk_summary(as_of_date)
+
+    def upsert_accounts(self, accounts: List[Account]) -> Dict[str, int]:
+        """
+        Store accounts and score those that are new or changed.
+
+        Args:
+            accounts: Accounts to add or amend, matched by ID.
+
+        Returns:
+            dict: Number of accounts received and rescored.
+        """
+        today = date.today()
+        with self._lock:
+            self._refresh_account_risk(today)
+            changed = self.repository.merge_accounts(account_to_row(a) for a in accounts)
+            rescored = self._score_accounts(changed, today)
+            if rescored:
+                self._store_risk_summary(today)
+        return {"received": len(accounts), "rescored": rescored}
+
+    def remove_account(self, account_id: str) -> bool:
+        """Delete an account and its scores. Returns False if no account has that ID."""
+        with self._lock:
+            if not self.repository.delete_accounts([account_id]):
+                return False
+            self._store_risk_summary(self.repository.risk_scored_on() or date.today())
+        return True
+
+    def get_account_risk(
+        self,
+        account_id: Optional[str] = None,
+        risk_type: Optional[RiskType] = None,
+        level: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[AccountRiskAssessment]:
+        """Return precomputed account scores, optionally for one account, risk type or level, a page at a time."""
+        with self._lock:
+            self._refresh_account_risk(date.today())
+        return self.repository.list_account_risk(account_id, risk_type, level, limit, offset)
+
+    def get_portfolio_risk(self) -> PortfolioRiskMetrics:
+        """Return the precomputed portfolio aggregates of the account scores."""
+        with self._lock:
+            self._refresh_account_risk(date.today())
+        return PortfolioRiskMetrics(**self.repository.load_risk_summary())
@@ -0,0 +1,101 @@
+# app/alm/services/behaviour.py
+# This file implements the behaviour service: deposit decay and loan prepayment calibrated per product segment
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..behaviour import (
+    DAYS_PER_MONTH, PRODUCT_CATEGORIES, calibrate_segment, deposit_runoff, history_window, monthly_series, segment_parameters,
+)
+from ..models import BehaviouralCalibration, BehaviouralSegment
+from ..repository import BEHAVIOUR_FIELDS, BehaviourRepository, TransactionRepository
+
+# Product segments read and fitted concurrently by a behavioural calibration
+CALIBRATION_WORKERS = 4
+
+logger = logging.getLogger(__name__)
+
+
+class BehaviourService:
+    """Behavioural calibrations, fitted from the monthly product rollups of the transaction log and stored per date."""
+
+    def __init__(self, repository: BehaviourRepository, transactions: TransactionRepository):
+        self.repository = repository
+        self._transactions = transactions
+        # One calibration at a time, segments fitted on long-lived threads (each keeps its connection)
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=CALIBRATION_WORKERS, thread_name_prefix="calibration")
+
+    def close(self) -> None:
+        """Stop the calibration threads."""
+        self._pool.shutdown(wait=False)
+
+    def _fit_behaviour(self, calibration_date: date) -> List[Dict[str, Any]]:
+        """Fit every modelled product segment, starting from the latest earlier calibration, and store the results."""
+        previous_date = self.repository.latest_behaviour_calibration(calibration_date)
+        previous = {
+            (segment["product"], segment["currency"]): segment
+            for segment in (self.repository.load_behaviour_calibration(previous_date) if previous_date else [])
+        }
+        periods = history_window(calibration_date)
+        terms = self.repository.remaining_terms(calibration_date)
+        keys = [key for key in self._transactions.list_flow_keys("product_monthly") if key[0] in PRODUCT_CATEGORIES]
+
+        def fit(key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+            opening, rows = self._transactions.flow_buckets("product_monthly", key, periods[0], periods[-1])
+            days = terms.get(key)
+            return calibrate_segment(
+                *key,
+                *monthly_series(periods, opening, rows),
+                remaining_months=None if days is None else days / DAYS_PER_MONTH,
+                previous=previous.get(key),
+            )
+
+        segments = [segment for segment in self._pool.map(fit, keys) if segment is not None]
+        self.repository.save_behaviour_calibration(
+            calibration_date, (tuple(segment[field] for field in BEHAVIOUR_FIELDS) for segment in segments)
+        )
+        logger.info(f"Calibrated {len(segments)} product segments on {calibration_date}, starting from {previous_date or 'scratch'}")
+        return segments
+
+    def _behaviour_segments(self, calibration_date: date, refit: bool = False) -> List[Dict[str, Any]]:
+        """Calibrated segments of a date, fitted on first use."""
+        with self._lock:
+            segments = [] if refit else self.repository.load_behaviour_calibration(calibration_date)
+            return segments or self._fit_behaviour(calibration_date)
+
+    def behaviour_parameters(self, as_of_date: date) -> Dict[Tuple[str, str], Dict[str, float]]:
+        """Calibrated behavioural parameters per (category, currency); empty without product history."""
+        return segment_parameters(self._behaviour_segments(as_of_date))
+
+    def behavioural_runoff(self, as_of_date: date) -> Optional[float]:
+        """Calibrated one-month runoff of non-maturity deposits, None if none are calibrated."""
+        return deposit_runoff(self.behaviour_parameters(as_of_date))
+
+    def calibrate_behaviour(self, calibration_date: date, refit: bool = False) -> BehaviouralCalibration:
+        """
+        Calibrate deposit decay and loan prepayment per product segment from historical balances.
+
+        Segments are account types in one currency, and their history is read from the
+        monthly product rollups. Calibrations are stored per date and reused; fitting
+        starts from the latest earlier calibration, so daily recalibration only moves
+        the parameters by what the new history changed. The calibrated parameters are
+        used by the maturity gap, the dashboard and reverse stress tests, the scenario
+        grid and what-if sandboxes.
+
+        Args:
+            calibration_date: Date of the calibration; its month is the last month of history.
+            refit: Fit again even if the date is already calibrated.
+
+        Returns:
+            BehaviouralCalibration: Parameters of every calibrated segment.
+        """
+        segments = self._behaviour_segments(calibration_date, refit)
+        return BehaviouralCalibration(
+            calibration_date=calibration_date,
+            deposit_runoff=deposit_runoff(segment_parameters(segments)),
+            segments=[BehaviouralSegment(**segment) for segment in segments],
+        )
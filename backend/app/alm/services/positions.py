@@ -0,0 +1,180 @@
+# app/alm/services/positions.py
+# This file implements the position service: the book as of a date and the analytics caches derived from it
+
+import threading
+from contextlib import contextmanager
+from datetime import date
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from ..columnar import PositionFrame
+from ..concentration import ConcentrationEngine, CounterpartyHierarchy
+from ..models import AnomalyReport, AssetLiability
+from ..repository import PositionChanges, PositionRepository, ReferenceDataRepository, position_to_row, row_to_position
+from ..sensitivity import SensitivityEngine, generate_cash_flows, patch_cash_flows
+from .. import export
+
+
+class PositionService:
+    """
+    Positions of the book, and the analytics caches built from them.
+
+    Columnar snapshots and sensitivity engines are cached per as-of date, and the
+    concentration aggregates for one date. The caches follow the data version of
+    the store: writes made through this service patch them in place, writes made
+    by another worker drop them.
+    """
+
+    def __init__(self, repository: PositionRepository, reference: ReferenceDataRepository):
+        self.repository = repository
+        # Counterparty hierarchy of the concentration aggregates
+        self._reference = reference
+        # Data version the caches below were built from
+        self._cache_version = repository.data_version()
+        # Guards the caches below: heavy endpoints fill and patch them from worker threads
+        self._cache_lock = threading.RLock()
+        # Columnar snapshots and sensitivity engines, cached per as-of date
+        self._frames: Dict[date, PositionFrame] = {}
+        self._sensitivity_engines: Dict[date, SensitivityEngine] = {}
+        # Concentration aggregates of one as-of date, maintained incrementally once loaded
+        self._concentration: Optional[ConcentrationEngine] = None
+        self._concentration_date: Optional[date] = None
+
+    @property
+    def cache_version(self) -> int:
+        """Data version the cached analytics were built from."""
+        return self._cache_version
+
+    def sync_caches(self) -> None:
+        """Drop the caches if the stored data changed since they were built (possibly in another worker)."""
+        version = self.repository.data_version()
+        with self._cache_lock:
+            if version != self._cache_version:
+                self._clear_caches(version)
+
+    def invalidate_caches(self) -> None:
+        """Drop derived data after the underlying positions have changed."""
+        with self._cache_lock:
+            self._clear_caches(self.repository.bump_data_version())
+
+    def _clear_caches(self, version: int) -> None:
+        self._frames.clear()
+        self._sensitivity_engines.clear()
+        self._concentration = None
+        self._cache_version = version
+
+    def _apply_changes(self, changes: PositionChanges) -> None:
+        """
+        Bring the caches up to date after a merge of our own, touching only the affected positions.
+
+        Caches for dates before the changes are unaffected. If the changes are the
+        latest load, they hold for every later date too, so cached frames, cash
+        flows and concentration aggregates are patched in place; otherwise the
+        caches from that date on are dropped. If another writer got in between,
+        everything is reset.
+        """
+        if changes.version is None:
+            return
+        with self._cache_lock:
+            if changes.version != self._cache_version + 1:
+                self._clear_caches(changes.version)
+                return
+            self._cache_version = changes.version
+            rows = changes.inserted + changes.updated
+            latest = self.repository.is_latest_snapshot(changes.as_of_date)
+            for as_of_date in [d for d in self._frames if d >= changes.as_of_date]:
+                engine = self._sensitivity_engines.pop(as_of_date, None)
+                frame = self._frames.pop(as_of_date, None)
+                if not latest or frame is None:
+                    continue
+                frame, keep = frame.with_changes(rows, changes.deleted)
+                self._frames[as_of_date] = frame
+                if engine is not None:
+                    self._sensitivity_engines[as_of_date] = SensitivityEngine(patch_cash_flows(engine.cash_flows, frame, keep))
+            if self._concentration is not None and self._concentration_date >= changes.as_of_date:
+                if not latest:
+                    self._concentration = None
+                    return
+                for position_id in changes.deleted:
+                    self._concentration.remove(position_id)
+                for row in rows:
+                    self._concentration.upsert(row_to_position(row))
+
+    def merge_positions(self, as_of_date: date, rows: Iterable[Sequence], deleted_ids: Iterable[str] = (), **options) -> PositionChanges:
+        """
+        Merge position rows into the store as of a date and update the caches for the changed positions only.
+
+        Options are those of PositionRepository.merge_positions (complete, source, retained_ids).
+        """
+        self.sync_caches()
+        changes = self.repository.merge_positions(as_of_date, rows, deleted_ids, **options)
+        self._apply_changes(changes)
+        return changes
+
+    def get_assets(self, as_of_date: date, category: Optional[str] = None) -> List[AssetLiability]:
+        """Retrieve all assets as of a given date, optionally filtered by category."""
+        return self.repository.load_positions(as_of_date, "asset", category)
+
+    def get_liabilities(self, as_of_date: date, category: Optional[str] = None) -> List[AssetLiability]:
+        """Retrieve all liabilities as of a given date, optionally filtered by category."""
+        return self.repository.load_positions(as_of_date, "liability", category)
+
+    def get_position_frame(self, as_of_date: date) -> PositionFrame:
+        """Return the columnar snapshot of all assets and liabilities, reading it from the repository on first use."""
+        self.sync_caches()
+        with self._cache_lock:
+            frame = self._frames.get(as_of_date)
+            if frame is None:
+                frame = self._frames[as_of_date] = self.repository.load_frame(as_of_date)
+            return frame
+
+    def get_sensitivity_engine(self, as_of_date: date) -> SensitivityEngine:
+        """Return the sensitivity engine for a date.  Cash flows are generated once per as-of date and reused for every bump."""
+        self.sync_caches()
+        with self._cache_lock:
+            engine = self._sensitivity_engines.get(as_of_date)
+            if engine is None:
+                cash_flows = generate_cash_flows(self.get_position_frame(as_of_date))
+                engine = self._sensitivity_engines[as_of_date] = SensitivityEngine(cash_flows)
+            return engine
+
+    def concentration_engine(self, as_of_date: date) -> ConcentrationEngine:
+        """Concentration aggregates of a date, rebuilt when the date changes (the caches follow the data version)."""
+        self.sync_caches()
+        with self._cache_lock:
+            if self._concentration is None or self._concentration_date != as_of_date:
+                engine = ConcentrationEngine(CounterpartyHierarchy(self._reference.load_counterparty_hierarchy()))
+                engine.load(self.get_position_frame(as_of_date))
+                self._concentration, self._concentration_date = engine, as_of_date
+            return self._concentration
+
+    @contextmanager
+    def concentration(self, as_of_date: date) -> Iterator[ConcentrationEngine]:
+        """Read the concentration aggregates of a date.  They are patched in place by position edits, so they are held under the cache lock."""
+        with self._cache_lock:
+            yield self.concentration_engine(as_of_date)
+
+    def _current_snapshot(self, as_of_date: Optional[date]) -> date:
+        """Snapshot date that single-position edits apply to: the latest on or before `as_of_date`."""
+        as_of_date = as_of_date or date.today()
+        return self.repository.snapshot_date(as_of_date) or as_of_date
+
+    def upsert_position(self, position: AssetLiability, as_of_date: Optional[date] = None) -> None:
+        """Add or replace a single asset or liability.  Cached analytics are updated for that position only."""
+        self.merge_positions(self._current_snapshot(as_of_date), [position_to_row(position)])
+
+    def remove_position(self, position_id: str, as_of_date: Optional[date] = None) -> bool:
+        """Remove a single asset or liability.  Returns False if no position has that ID."""
+        return bool(self.merge_positions(self._current_snapshot(as_of_date), [], [position_id]).deleted)
+
+    def export_positions(self, as_of_date: date, format: str, columns: Optional[List[str]] = None, **filters) -> Iterator[bytes]:
+        """Stream positions as Arrow IPC or Parquet, with projection and filters pushed down to the repository."""
+        return export.export_positions(self.repository, as_of_date, format, columns, **filters)
+
+    def import_positions(
+        self, source: BinaryIO, format: str, as_of_date: Optional[date] = None, corrections: Sequence[str] = ()
+    ) -> Tuple[int, AnomalyReport]:
+        """Validate and load an Arrow IPC or Parquet position file.  Returns the number of positions loaded and the anomaly report."""
+        self.sync_caches()
+        changes, validator = export.import_positions(self.repository, source, format, as_of_date, corrections=corrections)
+        self._apply_changes(changes)
+        return changes.received, AnomalyReport(**validator.report.to_dict())
@@ -0,0 +1,151 @@
+# app/alm/services/sandboxes.py
+# This file implements the sandbox service: what-if changes evaluated against the positions of a date without copying them
+
+import uuid
+import weakref
+from datetime import date, datetime, timedelta
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from ..behaviour import stressed_runoff
+from ..columnar import PositionFrame
+from ..gap import DASHBOARD_GAP_PERIODS, gap_by_period
+from ..models import AssetLiability, Sandbox, WhatIfFigure, WhatIfResult
+from ..nii import NIIEngine, regulatory_scenarios
+from ..overlay import Overlay
+from ..repository import SandboxRepository, position_to_row
+from ..scenario_grid import evaluate_grid
+from ..sensitivity import SensitivityEngine, generate_cash_flows
+from .behaviour import BehaviourService
+from .positions import PositionService
+
+# What-if sandboxes are discarded this long after they were opened
+SANDBOX_TTL = timedelta(days=1)
+
+
+class SandboxService:
+    """What-if sandboxes: hypothetical position changes over the positions of a date, and their effect on gap, NII and liquidity."""
+
+    def __init__(self, repository: SandboxRepository, positions: PositionService, behaviour: BehaviourService):
+        self.repository = repository
+        self._positions = positions
+        self._behaviour = behaviour
+        # Base results shared by every what-if sandbox, per frame and metric; dropped with the frame
+        self._base_results: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def _base_result(self, frame: PositionFrame, key: tuple, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        """Result of an additive metric on a base frame, computed once and reused while the frame is cached."""
+        results = self._base_results.setdefault(frame, {})
+        if key not in results:
+            results[key] = compute()
+        return results[key]
+
+    def create_sandbox(self, as_of_date: Optional[date] = None) -> Sandbox:
+        """Open an empty what-if sandbox over the positions of a date. Sandboxes expire after SANDBOX_TTL."""
+        now = datetime.now()
+        self.repository.delete_sandboxes(created_before=now - SANDBOX_TTL)
+        sandbox_id = uuid.uuid4().hex
+        self.repository.create_sandbox(sandbox_id, as_of_date or date.today(), now)
+        return self.get_sandbox(sandbox_id)
+
+    def get_sandbox(self, sandbox_id: str) -> Optional[Sandbox]:
+        """Return a sandbox, None if there is no such sandbox."""
+        found = self.repository.get_sandbox(sandbox_id)
+        if found is None:
+            return None
+        as_of_date, created, added, removed = found
+        return Sandbox(id=sandbox_id, as_of_date=as_of_date, created=created, added=added, removed=removed)
+
+    def delete_sandbox(self, sandbox_id: str) -> bool:
+        """Discard a sandbox. Returns False if there is no such sandbox."""
+        return bool(self.repository.delete_sandboxes([sandbox_id]))
+
+    def upsert_sandbox_positions(self, sandbox_id: str, positions: List[AssetLiability]) -> Optional[Sandbox]:
+        """Add positions to a sandbox, or amend those with the ID of a base or sandbox position. None if there is no such sandbox."""
+        if self.repository.get_sandbox(sandbox_id) is None:
+            return None
+        self.repository.save_sandbox_positions(sandbox_id, [position_to_row(p) for p in positions])
+        return self.get_sandbox(sandbox_id)
+
+    def remove_sandbox_position(self, sandbox_id: str, position_id: str) -> Optional[Sandbox]:
+        """Remove a position from a sandbox's book, whether it is a base or a sandbox position. None if there is no such sandbox."""
+        if self.repository.get_sandbox(sandbox_id) is None:
+            return None
+        self.repository.save_sandbox_positions(sandbox_id, [], [position_id])
+        return self.get_sandbox(sandbox_id)
+
+    def run_what_if(
+        self,
+        sandbox_id: str,
+        horizon_months: int = 12,
+        deposit_runoff: float = 0.0,
+        haircut: float = 0.0,
+    ) -> Optional[WhatIfResult]:
+        """
+        Compare gap, NII and liquidity coverage of a sandbox with those of its base positions.
+
+        The base positions are never copied: every metric here is a sum over positions,
+        so the sandbox value is the base result (computed once and shared by all
+        sandboxes on the same positions) plus the contribution of the sandbox's added
+        positions less that of the base positions it removes or amends. Liquidity
+        coverage is the ratio of two such sums.
+
+        Args:
+            sandbox_id: Sandbox to evaluate.
+            horizon_months: Number of months of NII.
+            deposit_runoff: Deposit runoff, on top of the calibrated runoff.
+            haircut: Haircut on liquid assets.
+
+        Returns:
+            Optional[WhatIfResult]: Base, what-if and change of each metric; None if there is no such sandbox.
+        """
+        found = self.repository.get_sandbox(sandbox_id)
+        if found is None:
+            return None
+        as_of_date = found[0]
+        frame = self._positions.get_position_frame(as_of_date)
+        overlay = Overlay(frame, *self.repository.load_sandbox_positions(sandbox_id))
+
+        parameters = self._behaviour.behaviour_parameters(as_of_date)
+        behaviour_key = tuple(sorted((key, tuple(sorted(p.items()))) for key, p in parameters.items()))
+        gap = self._base_result(frame, ("gap", behaviour_key), lambda: np.subtract(*gap_by_period(frame, parameters)))
+        what_if_gap = overlay.apply(gap, lambda f: np.subtract(*gap_by_period(f, parameters)))
+
+        scenarios = regulatory_scenarios()
+
+        def nii(f: PositionFrame) -> np.ndarray:
+            return NIIEngine(f).project(horizon_months, scenarios)["nii"].sum(axis=1)
+        base_nii = self._base_result(frame, ("nii", horizon_months), lambda: nii(frame))
+        what_if_nii = overlay.apply(base_nii, nii)
+
+        runoff = stressed_runoff(self._behaviour.behavioural_runoff(as_of_date) or 0.0, deposit_runoff)
+
+        def liquidity(engine: SensitivityEngine) -> np.ndarray:
+            grid = evaluate_grid(engine, [0.0], [runoff], [haircut])
+            return np.array([grid["liquidity_buffer"]["values"][0, 0], grid["deposit_outflows"]["values"][0]])
+        base_liquidity = self._base_result(
+            frame, ("liquidity", runoff, haircut), lambda: liquidity(self._positions.get_sensitivity_engine(as_of_date))
+        )
+        what_if_liquidity = overlay.apply(base_liquidity, lambda f: liquidity(SensitivityEngine(generate_cash_flows(f))))
+
+        def figure(base: float, what_if: float) -> WhatIfFigure:
+            values = [value if np.isfinite(value) else None for value in (float(base), float(what_if), float(what_if - base))]
+            return WhatIfFigure(base=values[0], what_if=values[1], delta=values[2])
+
+        def coverage(buffer: float, outflows: float) -> float:
+            return buffer / outflows if outflows > 0 else np.nan
+
+        return WhatIfResult(
+            sandbox_id=sandbox_id,
+            as_of_date=as_of_date,
+            horizon_months=horizon_months,
+            deposit_runoff=deposit_runoff,
+            haircut=haircut,
+            gap_periods=[period for period, _ in DASHBOARD_GAP_PERIODS],
+            gap=[figure(b, w) for b, w in zip(gap, what_if_gap)],
+            nii={name: figure(base_nii[s], what_if_nii[s]) for s, name in enumerate(scenarios)},
+            liquidity_buffer=figure(base_liquidity[0], what_if_liquidity[0]),
+            deposit_outflows=figure(base_liquidity[1], what_if_liquidity[1]),
+            liquidity_coverage=figure(coverage(*base_liquidity), coverage(*what_if_liquidity)),
+        )
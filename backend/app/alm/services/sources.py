@@ -0,0 +1,59 @@
+# app/alm/services/sources.py
+# This file implements the data source service: incremental position extraction with validation
+
+import logging
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+
+from ..extraction import SourceConnector, connector_for
+from ..models import AnomalyReport, DataSource, ExtractionResult
+from ..repository import SourceRepository
+from ..validation import PositionValidator
+from .positions import PositionService
+
+logger = logging.getLogger(__name__)
+
+
+class SourceService:
+    """Data sources of the book, and the extraction of their positions into the position store."""
+
+    def __init__(self, repository: SourceRepository, positions: PositionService, connectors: Optional[Dict[str, SourceConnector]] = None):
+        self.repository = repository
+        self._positions = positions
+        # Connectors by data source name; other sources are built from their connection parameters
+        self._connectors = dict(connectors or {})
+
+    def get_datasources(self) -> List[DataSource]:
+        """Retrieve all configured data sources."""
+        return self.repository.list_datasources()
+
+    def extract_data(self, source_id: str, as_of_date: date, corrections: Sequence[str] = ()) -> ExtractionResult:
+        """Extract positions from a data source, validate them and merge them into the store.  After the first load, only changes since the source's watermark are read."""
+        source = next((d for d in self.repository.list_datasources() if d.name == source_id), None)
+        if source is None:
+            raise ValueError(f"Unknown data source '{source_id}'")
+        connector = self._connectors.get(source.name) or connector_for(source.connection_params)
+        logger.info(f"Extracting data from source {source_id} as of {as_of_date} (since {source.last_extraction})")
+
+        validator = PositionValidator(as_of_date, corrections)
+        extract = connector.extract(source.last_extraction, as_of_date)
+        # Rejected rows are left out, but a complete load keeps their stored versions rather than deleting them
+        changes = self._positions.merge_positions(
+            as_of_date,
+            validator.rows(extract.rows),
+            extract.deleted_ids,
+            complete=extract.complete,
+            source=source.name,
+            retained_ids=validator.rejected_ids,
+        )
+        if extract.watermark is not None:
+            self.repository.set_last_extraction(source.name, extract.watermark)
+        logger.info(f"Extraction from {source_id}: {changes.summary()}")
+        return ExtractionResult(
+            source=source.name,
+            as_of_date=as_of_date,
+            incremental=not extract.complete,
+            watermark=extract.watermark,
+            anomalies=AnomalyReport(**validator.report.to_dict()),
+            **changes.summary()
+        )
@@ -0,0 +1,103 @@
+# app/alm/services/transactions.py
+# This file implements the transaction service: the append-only log and the flow series read from its rollups
+
+from datetime import date
+from typing import Dict, List, Optional
+
+from ..models import FlowSeries, Transaction
+from ..repository import TransactionRepository, transaction_to_row
+from ..transactions import GRANULARITIES
+
+
+class TransactionService:
+    """Account transactions, and daily or monthly flows and balances of accounts and products."""
+
+    def __init__(self, repository: TransactionRepository):
+        self.repository = repository
+
+    def append_transactions(self, transactions: List[Transaction]) -> Dict[str, int]:
+        """
+        Append transactions to the log and roll their flows up.
+
+        Args:
+            transactions: Transactions to record. IDs already recorded are skipped.
+
+        Returns:
+            dict: Number of transactions received, appended and skipped as duplicates.
+
+        Raises:
+            ValueError: If a transaction involves no account, or the same account twice.
+        """
+        for t in transactions:
+            if t.from_account_id is None and t.to_account_id is None:
+                raise ValueError(f"Transaction {t.id} debits and credits no account")
+            if t.from_account_id == t.to_account_id:
+                raise ValueError(f"Transaction {t.id} debits and credits the same account")
+        appended, duplicates = self.repository.append_transactions(transaction_to_row(t) for t in transactions)
+        return {"received": len(transactions), "appended": appended, "duplicates": duplicates}
+
+    def get_account_transactions(
+        self,
+        account_id: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[Transaction]:
+        """Return the transactions of an account between two dates (inclusive), oldest first."""
+        return self.repository.list_account_transactions(account_id, start, end, limit, offset)
+
+    def get_flow_series(
+        self,
+        granularity: str,
+        start: date,
+        end: date,
+        account_id: Optional[str] = None,
+        product: Optional[str] = None,
+        currency: Optional[str] = None,
+    ) -> FlowSeries:
+        """
+        Return daily or monthly flows and balances of an account, or of a product in one currency.
+
+        Buckets are read straight from the rollups maintained on append, so the cost
+        grows with the number of buckets in the range, not with the transactions.
+
+        Args:
+            granularity: "day" or "month".
+            start: First day covered.
+            end: Last day covered.
+            account_id: Account of the series.
+            product: Account type of the series, if no account is given.
+            currency: Currency of a product series.
+
+        Returns:
+            FlowSeries: The opening balance and the buckets with activity.
+
+        Raises:
+            ValueError: If the granularity is unknown or the series is not fully specified.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity '{granularity}', expected one of {list(GRANULARITIES)}")
+        if account_id is None and (product is None or currency is None):
+            raise ValueError("A flow series needs an account, or a product and a currency")
+        if start > end:
+            raise ValueError("The series start must not be after its end")
+        suffix, length = GRANULARITIES[granularity]
+        if account_id is not None:
+            rollup, key = f"account_{suffix}", (account_id,)
+        else:
+            rollup, key = f"product_{suffix}", (product, currency)
+        opening, rows = self.repository.flow_buckets(rollup, key, start.isoformat()[:length], end.isoformat()[:length])
+        return FlowSeries(
+            account_id=account_id,
+            product=None if account_id is not None else product,
+            currency=None if account_id is not None else currency,
+            granularity=granularity,
+            start=start,
+            end=end,
+            opening_balance=opening,
+            buckets=[
+                {"period": period, "inflow": inflow, "outflow": outflow, "net": inflow - outflow, "count": count, "balance": balance}
+                for period, inflow, outflow, count, balance in rows
+            ],
+        )
@@ -0,0 +1,112 @@
+# app/alm/transactions.py
+# This file turns batches of transactions into account legs and rollup increments, column-wise
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .models import AccountType, TransactionStatus
+
+# Rollup tables: name -> (key columns, length of the ISO date prefix naming a period)
+ROLLUPS: Dict[str, Tuple[Tuple[str, ...], int]] = {
+    "account_daily": (("account_id",), 10),
+    "account_monthly": (("account_id",), 7),
+    "product_daily": (("product", "currency"), 10),
+    "product_monthly": (("product", "currency"), 7),
+}
+
+# Rollup name suffix and ISO date prefix length of each series granularity
+GRANULARITIES = {"day": ("daily", 10), "month": ("monthly", 7)}
+
+# Product of legs on accounts that are not registered
+UNKNOWN_PRODUCT = AccountType.OTHER.value
+
+# Transactions aggregated per pass when appending
+APPEND_CHUNK_SIZE = 50_000
+
+
+def transaction_legs(rows: Sequence[tuple]) -> Dict[str, np.ndarray]:
+    """
+    Split transactions into one signed leg per account involved.
+
+    Args:
+        rows: Transaction rows in TRANSACTION_FIELDS order.
+
+    Returns:
+        dict: Columns "transaction_id", "account_id", "day" (ISO date), "amount"
+        (negative for the account debited), "currency" and "completed".
+    """
+    ids, _, status, debited, credited, amount, currency, _, when, _ = (np.array(c, dtype=object) for c in zip(*rows))
+    amount = amount.astype(np.float64)
+    day = np.array([str(value)[:10] for value in when], dtype=object)
+    has_debit = np.array([account is not None for account in debited], dtype=bool)
+    has_credit = np.array([account is not None for account in credited], dtype=bool)
+    return {
+        "transaction_id": np.concatenate([ids[has_debit], ids[has_credit]]),
+        "account_id": np.concatenate([debited[has_debit], credited[has_credit]]),
+        "day": np.concatenate([day[has_debit], day[has_credit]]),
+        "amount": np.concatenate([-amount[has_debit], amount[has_credit]]),
+        "currency": np.concatenate([currency[has_debit], currency[has_credit]]),
+        "completed": np.concatenate([status[has_debit], status[has_credit]]) == TransactionStatus.COMPLETED.value,
+    }
+
+
+def _aggregate(keys: Sequence[np.ndarray], period: np.ndarray, amount: np.ndarray) -> List[tuple]:
+    """
+    Aggregate legs into per-bucket increments, sorted by key and period.
+
+    Args:
+        keys: Key columns of the rollup (e.g. account id).
+        period: Period of each leg.
+        amount: Signed amount of each leg.
+
+    Returns:
+        List[tuple]: (*key, period, inflow, outflow, count) per bucket with legs.
+    """
+    if not len(amount):
+        return []
+    columns = [np.asarray(key, dtype=str) for key in keys] + [np.asarray(period, dtype=str)]
+    order = np.lexsort(columns[::-1])
+    columns = [column[order] for column in columns]
+    amount = amount[order]
+    changed = np.zeros(len(amount), dtype=bool)
+    changed[0] = True
+    for column in columns:
+        changed[1:] |= column[1:] != column[:-1]
+    starts = np.flatnonzero(changed)
+    inflow = np.add.reduceat(np.where(amount > 0, amount, 0.0), starts)
+    outflow = np.add.reduceat(np.where(amount < 0, -amount, 0.0), starts)
+    count = np.diff(np.append(starts, len(amount)))
+    return list(zip(
+        *(column[starts].tolist() for column in columns),
+        inflow.tolist(),
+        outflow.tolist(),
+        count.tolist(),
+    ))
+
+
+def rollup_increments(legs: Dict[str, np.ndarray], products: Dict[str, str]) -> Dict[str, List[tuple]]:
+    """
+    Increments of every rollup from the completed legs of a batch.
+
+    Args:
+        legs: Legs as returned by transaction_legs.
+        products: Account type of each registered account; legs on other
+            accounts count towards UNKNOWN_PRODUCT.
+
+    Returns:
+        dict: Rollup name -> (*key, period, inflow, outflow, count) per bucket, sorted by key and period.
+    """
+    completed = legs["completed"]
+    accounts = legs["account_id"][completed]
+    keys = {
+        "account_id": accounts,
+        "product": np.array([products.get(account, UNKNOWN_PRODUCT) for account in accounts.tolist()], dtype=object),
+        "currency": legs["currency"][completed],
+    }
+    days = legs["day"][completed].astype(str)
+    amount = legs["amount"][completed]
+    return {
+        table: _aggregate([keys[column] for column in key_columns], days.astype(f"<U{length}"), amount)
+        for table, (key_columns, length) in ROLLUPS.items()
+    }
@@ -0,0 +1,241 @@
+# app/alm/validation.py
+# This file implements vectorized validation and correction of position rows before they are loaded
+
+import itertools
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .curves import FX_SPOT
+
+# Allowed values of the enumerated position fields
+POSITION_TYPES = ("asset", "liability")
+POSITION_CATEGORIES = (
+    "bonds", "cash", "interbank", "loans", "mortgages", "securities",
+    "borrowings", "deposits", "equity", "savings", "other",
+)
+
+# Plausible contractual rates, in percent
+RATE_RANGE = (-5.0, 50.0)
+
+# Longest plausible residual maturity
+MAX_MATURITY_YEARS = 100
+
+# Rows validated per vectorized pass
+CHUNK_SIZE = 50_000
+
+# Row references kept per issue in the anomaly report
+MAX_ROW_REFERENCES = 20
+
+# Optional corrections, applied before the checks they relate to
+CORRECTIONS = {
+    "normalize_codes": "Trim type, category and currency, lower-casing type and category and upper-casing currency",
+    "absolute_amount": "Take the absolute value of negative amounts (the sign is carried by the type)",
+}
+
+_TRUE = ("true", "t", "yes", "y", "1", "1.0")
+_FALSE = ("false", "f", "no", "n", "0", "0.0")
+
+
+def _floats(values: np.ndarray) -> np.ndarray:
+    """Convert to float64, with NaN wherever a value is missing or not numeric."""
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        out = np.full(len(values), np.nan)
+        for i, value in enumerate(values):
+            try:
+                out[i] = float(value)
+            except (TypeError, ValueError):
+                pass
+        return out
+
+
+def _dates(values: np.ndarray) -> np.ndarray:
+    """Convert dates or ISO strings to datetime64[D], with NaT wherever a value is missing or malformed."""
+    try:
+        return np.asarray(values, dtype="datetime64[D]")
+    except (TypeError, ValueError):
+        out = np.full(len(values), np.datetime64("NaT", "D"))
+        for i, value in enumerate(values):
+            try:
+                out[i] = np.datetime64(value, "D")
+            except (TypeError, ValueError):
+                pass
+        return out
+
+
+class ValidationReport:
+    """
+    Compact summary of the anomalies found in a load.
+
+    Issues are counted per rule, with the first few offending rows referenced
+    by their position in the input (0-based) and their id.
+    """
+
+    def __init__(self):
+        self.checked = 0
+        self.rejected = 0
+        self.corrected = 0
+        self._issues: Dict[Tuple[str, str, str], Dict] = {}
+
+    def record(self, rule: str, field: str, action: str, rows: np.ndarray, ids: np.ndarray) -> None:
+        """Count the rows hit by a rule; `action` is "rejected" or "corrected"."""
+        if not len(rows):
+            return
+        issue = self._issues.setdefault(
+            (rule, field, action), {"rule": rule, "field": field, "action": action, "count": 0, "rows": [], "ids": []}
+        )
+        issue["count"] += len(rows)
+        room = MAX_ROW_REFERENCES - len(issue["rows"])
+        if room > 0:
+            issue["rows"].extend(int(i) for i in rows[:room])
+            issue["ids"].extend(str(i) for i in ids[:room])
+
+    def to_dict(self) -> Dict:
+        return {
+            "checked": self.checked,
+            "rejected": self.rejected,
+            "corrected": self.corrected,
+            "issues": list(self._issues.values()),
+        }
+
+
+class PositionValidator:
+    """
+    Validates and optionally corrects position rows in column chunks.
+
+    Rows (in POSITION_FIELDS order) are transposed into NumPy columns a chunk
+    at a time, and every check is one array expression over the chunk: types,
+    ranges, enumerations and date consistency. Valid and corrected rows come
+    out in stored form; rejected rows are dropped and reported, with their ids
+    kept in `rejected_ids`.
+    """
+
+    def __init__(
+        self,
+        as_of_date: date,
+        corrections: Sequence[str] = (),
+        currencies: Optional[Sequence[str]] = None,
+        categories: Sequence[str] = POSITION_CATEGORIES,
+        rate_range: Tuple[float, float] = RATE_RANGE,
+        max_maturity_years: int = MAX_MATURITY_YEARS,
+        chunk_size: int = CHUNK_SIZE,
+    ):
+        unknown = set(corrections) - set(CORRECTIONS)
+        if unknown:
+            raise ValueError(f"Unknown corrections {sorted(unknown)}, expected some of {sorted(CORRECTIONS)}")
+        self.as_of_date = as_of_date
+        self.corrections = set(corrections)
+        self.currencies = np.array(sorted(currencies or FX_SPOT), dtype=str)
+        self.categories = np.array(sorted(categories), dtype=str)
+        self.rate_range = rate_range
+        self.max_maturity = np.datetime64(as_of_date, "D") + np.timedelta64(int(max_maturity_years * 365.25), "D")
+        self.chunk_size = chunk_size
+        self.report = ValidationReport()
+        self.rejected_ids: List[str] = []
+        self._seen_ids: set = set()
+
+    def rows(self, rows: Iterable[Sequence]) -> Iterator[tuple]:
+        """Validate a stream of rows, yielding the accepted ones."""
+        rows = iter(rows)
+        while True:
+            chunk = list(itertools.islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            yield from self.validate_columns(list(zip(*chunk)))
+
+    def validate_columns(self, columns: Sequence[Sequence]) -> Iterator[tuple]:
+        """
+        Validate one chunk given column-wise, e.g. an Arrow record batch converted to arrays.
+
+        Args:
+            columns: One sequence per field, in POSITION_FIELDS order.
+
+        Returns:
+            Iterator[tuple]: The accepted rows, in stored form.
+        """
+        ids, types, categories, amounts, currencies, maturities, rates, fixed, counterparties = (
+            np.asarray(column) for column in columns
+        )
+        n = len(ids)
+        offset = self.report.checked
+        self.report.checked += n
+        index = np.arange(offset, offset + n)
+        ids = ids.astype(str)
+        rejected = np.zeros(n, dtype=bool)
+        corrected = np.zeros(n, dtype=bool)
+
+        def flag(rule: str, field: str, mask: np.ndarray, action: str = "rejected") -> None:
+            mask = mask & ~rejected
+            self.report.record(rule, field, action, index[mask], ids[mask])
+            if action == "rejected":
+                rejected[mask] = True
+            else:
+                corrected[mask] = True
+
+        # Identity
+        flag("missing", "id", np.isin(ids, ["", "None", "nan"]))
+        _, first = np.unique(ids, return_index=True)
+        repeated = np.ones(n, dtype=bool)
+        repeated[first] = False
+        if self._seen_ids:
+            repeated |= np.isin(ids, list(self._seen_ids.intersection(ids)))
+        flag("duplicate", "id", repeated)
+        self._seen_ids.update(ids.tolist())
+
+        # Enumerations
+        types, categories, currencies = types.astype(str), categories.astype(str), currencies.astype(str)
+        if "normalize_codes" in self.corrections:
+            normalized = (
+                np.char.lower(np.char.strip(types)),
+                np.char.lower(np.char.strip(categories)),
+                np.char.upper(np.char.strip(currencies)),
+            )
+            for field, before, after in zip(("type", "category", "currency"), (types, categories, currencies), normalized):
+                flag("normalized", field, before != after, "corrected")
+            types, categories, currencies = normalized
+        flag("unknown_value", "type", ~np.isin(types, POSITION_TYPES))
+        flag("unknown_value", "category", ~np.isin(categories, self.categories))
+        flag("unknown_value", "currency", ~np.isin(currencies, self.currencies))
+
+        # Numeric ranges
+        amounts = _floats(amounts)
+        flag("not_a_number", "amount", ~np.isfinite(amounts))
+        negative = amounts < 0
+        if "absolute_amount" in self.corrections:
+            flag("negative", "amount", negative, "corrected")
+            amounts = np.abs(amounts)
+        else:
+            flag("negative", "amount", negative)
+        rates = _floats(rates)
+        flag("not_a_number", "interest_rate", ~np.isfinite(rates))
+        low, high = self.rate_range
+        flag("out_of_range", "interest_rate", (rates < low) | (rates > high))
+        fixed_text = np.char.lower(np.char.strip(fixed.astype(str)))
+        flag("not_a_boolean", "fixed_rate", ~np.isin(fixed_text, _TRUE + _FALSE))
+        fixed = np.isin(fixed_text, _TRUE).astype(np.int64)
+
+        # Dates
+        maturities = _dates(maturities)
+        flag("invalid_date", "maturity_date", np.isnat(maturities))
+        flag("matured", "maturity_date", maturities < np.datetime64(self.as_of_date, "D"))
+        flag("out_of_range", "maturity_date", maturities > self.max_maturity)
+
+        self.report.rejected += int(rejected.sum())
+        self.report.corrected += int((corrected & ~rejected).sum())
+        self.rejected_ids.extend(ids[rejected & (ids != "None")].tolist())
+        keep = ~rejected
+        counterparties = [cp or None for cp in counterparties[keep].tolist()]
+        return zip(
+            ids[keep].tolist(),
+            types[keep].tolist(),
+            categories[keep].tolist(),
+            amounts[keep].tolist(),
+            currencies[keep].tolist(),
+            maturities[keep].astype(str).tolist(),
+            rates[keep].tolist(),
+            fixed[keep].tolist(),
+            counterparties,
+        )
@@ -4,7 +4,8 @@ import json
 import dotenv
 from fastapi import FastAPI, APIRouter, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from app.alm.router import router as alm_router
+from app.alm.compression import CompressionMiddleware
+from app.alm.router import compression_metrics, router as alm_router
 from app.auth.router import router as auth_router
 
 # Load environment variables from .env file
@@ -145,6 +146,9 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Compress ALM responses with the best encoding each client accepts, recording bytes and CPU per endpoint
+    app.add_middleware(CompressionMiddleware, path_prefix="/api/alm", metrics=compression_metrics)
+
     # Register the authentication and ALM routers
     app.include_router(auth_router)
     app.include_router(alm_router)
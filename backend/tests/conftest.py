@@ -0,0 +1,85 @@
+# tests/conftest.py
+# This file holds the fixtures shared by the ALM test suite
+
+import os
+import sys
+import types
+from datetime import date, timedelta
+
+import pytest
+
+# Keep the suite off the on-disk database, whatever the working directory
+os.environ.setdefault("ALM_DB_PATH", ":memory:")
+
+try:
+    import app.auth.dependencies  # noqa: F401
+except ImportError:
+    # The OAuth stack depends on hosting-platform modules (app.core, databutton_app's JWT packages)
+    # that are not part of this tree; endpoints are tested with an authenticated user injected instead.
+    auth = types.ModuleType("app.auth")
+    auth.__path__ = []
+    dependencies = types.ModuleType("app.auth.dependencies")
+
+    async def get_current_user() -> dict:
+        return {"username": "tester"}
+
+    dependencies.get_current_user = get_current_user
+    sys.modules["app.auth"] = auth
+    sys.modules["app.auth.dependencies"] = dependencies
+
+from app.alm.columnar import PositionFrame
+from app.alm.models import AssetLiability
+from app.alm.repository import SQLiteRepository, position_to_row
+from app.alm.service import ALMService
+
+TODAY = date.today()
+
+
+def position(id: str, type: str, category: str, amount: float, currency: str, years: float, rate: float = 3.0, fixed: bool = True, counterparty: str = None) -> AssetLiability:
+    """A position maturing `years` from today."""
+    return AssetLiability(
+        id=id, type=type, category=category, amount=amount, currency=currency,
+        maturity_date=TODAY + timedelta(days=round(365 * years)), interest_rate=rate,
+        fixed_rate=fixed, counterparty=counterparty,
+    )
+
+
+def frame(positions) -> PositionFrame:
+    """Columnar snapshot of positions as of today."""
+    return PositionFrame.from_positions(positions, TODAY)
+
+
+def replace_book(service: ALMService, positions) -> None:
+    """Replace the service's positions with `positions`."""
+    service.repository.positions.merge_positions(TODAY, [position_to_row(p) for p in positions], complete=True)
+    service.positions.invalidate_caches()
+
+
+@pytest.fixture
+def repository():
+    repository = SQLiteRepository(":memory:")
+    yield repository
+    repository.close()
+
+
+@pytest.fixture
+def service(repository):
+    """A service over a fresh in-memory store seeded with the demonstration book."""
+    service = ALMService(repository)
+    yield service
+    service.behaviour.close()
+
+
+@pytest.fixture
+def client(service, monkeypatch):
+    """A test client of the ALM router, backed by `service`."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.alm import router
+
+    monkeypatch.setattr(router, "alm_service", service)
+    app = FastAPI()
+    app.include_router(router.router)
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,149 @@
+# tests/test_behaviour.py
+# This file tests the behavioural calibration, its reuse between runs and the gap analysis it feeds
+
+import random
+import warnings
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from app.alm.services import behaviour as behaviour_module
+from app.alm.behaviour import calibrate_segment, fit_decay, fit_prepayment, history_window, monthly_series
+from app.alm.curves import FX_SPOT
+from app.alm.models import Account, AccountType, GapAnalysisRequest, Transaction, TransactionType
+
+from conftest import TODAY, position, replace_book
+
+
+def month_start(months_back: int) -> date:
+    year, month = divmod(TODAY.year * 12 + TODAY.month - 1 - months_back, 12)
+    return date(year, month + 1, 1)
+
+
+def savings_history(service, months: int = 24, seed: int = 3) -> None:
+    """A TND savings account losing a few percent of its balance every month."""
+    service.accounts.upsert_accounts([
+        Account(id="S1", account_number="S1", account_type=AccountType.SAVINGS, account_name="S1", currency="TND", balance=0.0)
+    ])
+    rng = random.Random(seed)
+    balance, transactions = 100_000.0, []
+    for i, back in enumerate(range(months - 1, -1, -1)):
+        when = datetime.combine(month_start(back), datetime.min.time())
+        if i == 0:
+            transactions.append(Transaction(id="T0", type=TransactionType.DEPOSIT, to_account_id="S1", amount=balance, currency="TND", date=when))
+            continue
+        withdrawn = round(balance * rng.uniform(0.01, 0.06), 2)
+        balance -= withdrawn
+        transactions.append(Transaction(id=f"T{i}", type=TransactionType.WITHDRAWAL, from_account_id="S1", amount=withdrawn, currency="TND", date=when))
+    service.transactions.append_transactions(transactions)
+
+
+def gap_book():
+    return [
+        position("A1", "asset", "loans", 1_000.0, "TND", 0.1),
+        position("A2", "asset", "bonds", 500.0, "USD", 0.4),
+        position("L1", "liability", "deposits", 800.0, "TND", 0.2),
+        position("L2", "liability", "borrowings", 300.0, "TND", 2.0),
+    ]
+
+
+def test_history_window_counts_whole_months_without_deprecated_arithmetic():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        assert history_window(date(2024, 2, 29), months=3) == ["2023-12", "2024-01", "2024-02"]
+
+
+def test_monthly_series_carries_balances_over_quiet_months():
+    balance, inflow, outflow = monthly_series(["2024-01", "2024-02", "2024-03"], 50.0, [("2024-02", 10.0, 0.0, 1, 60.0)])
+
+    assert balance.tolist() == [50.0, 60.0, 60.0]
+    assert inflow.tolist() == [0.0, 10.0, 0.0]
+
+
+def test_decay_fit_recovers_the_curve_and_warm_starts_in_one_step():
+    horizons = np.arange(1.0, 25.0)
+    retention = 0.8 * np.exp(-0.03 * horizons)
+
+    core, decay, cold, rmse = fit_decay(horizons, retention + 0.002 * np.sin(horizons))
+    assert (core, decay) == pytest.approx((0.8, 0.03), rel=0.02)
+
+    *_, warm, _ = fit_decay(horizons, retention + 0.002 * np.sin(horizons), start=(core, decay))
+    assert warm == 1 < cold
+
+
+def test_prepayment_is_the_excess_over_scheduled_amortization():
+    # 1% of the balance repaid each month with no schedule known: all of it is prepayment
+    balance = 1_000.0 * 0.99 ** np.arange(13)
+    outflow = np.append(0.0, -np.diff(balance))
+
+    assert fit_prepayment(balance, np.zeros(13), outflow, None) == pytest.approx(1 - 0.99 ** 12)
+    assert fit_prepayment(balance, np.zeros(13), outflow, remaining_months=12.0) < 1 - 0.99 ** 12
+
+
+def test_short_or_unmodelled_segments_are_not_calibrated():
+    series = np.ones(12), np.zeros(12), np.zeros(12)
+    assert calibrate_segment("Other", "TND", *series) is None
+    assert calibrate_segment("Savings", "TND", np.append(np.zeros(8), np.ones(4)), np.zeros(12), np.zeros(12)) is None
+
+
+def test_calibrations_are_stored_and_reused(service, monkeypatch):
+    savings_history(service)
+    fits = []
+    monkeypatch.setattr(behaviour_module, "calibrate_segment", lambda *args, **kwargs: fits.append(kwargs["previous"]) or calibrate_segment(*args, **kwargs))
+
+    first = service.behaviour.calibrate_behaviour(TODAY)
+    assert [(s.product, s.currency, s.category) for s in first.segments] == [("Savings", "TND", "deposits")]
+    assert 0.0 < first.deposit_runoff < 0.1
+
+    assert service.behaviour.calibrate_behaviour(TODAY) == first
+    service.build_dashboard(TODAY)
+    assert len(fits) == 1
+
+    service.behaviour.calibrate_behaviour(TODAY, refit=True)
+    assert len(fits) == 2
+
+
+def test_refits_start_from_the_latest_earlier_calibration(service, monkeypatch):
+    savings_history(service)
+    earlier = service.behaviour.calibrate_behaviour(month_start(1)).segments[0]
+    starts = []
+    monkeypatch.setattr(behaviour_module, "calibrate_segment", lambda *args, **kwargs: starts.append(kwargs["previous"]) or calibrate_segment(*args, **kwargs))
+
+    latest = service.behaviour.calibrate_behaviour(TODAY).segments[0]
+
+    assert starts[0]["core_share"] == earlier.core_share and starts[0]["decay_rate"] == earlier.decay_rate
+    assert latest.observations == earlier.observations + 1
+
+
+def test_gap_analysis_buckets_positions_by_maturity(service):
+    replace_book(service, gap_book())
+
+    report = service.perform_gap_analysis(GapAnalysisRequest(as_of_date=TODAY))
+    usd = 500.0 * FX_SPOT["USD"]
+    assert report.assets_by_bucket == pytest.approx([0.0, 1_000.0, usd, 0.0])
+    assert report.liabilities_by_bucket == pytest.approx([0.0, 800.0, 0.0, 0.0])
+    assert report.cumulative_gap == pytest.approx(np.cumsum([0.0, 200.0, usd, 0.0]).tolist())
+
+    custom = service.perform_gap_analysis(GapAnalysisRequest(as_of_date=TODAY, time_buckets=["2W", "1Y", "5Y"]))
+    assert custom.gap_by_bucket == pytest.approx([0.0, 1_000.0 + usd - 800.0, -300.0])
+
+
+def test_gap_analysis_runs_calibrated_deposits_off_along_their_retention(service):
+    replace_book(service, gap_book())
+    savings_history(service)
+    segment = service.behaviour.calibrate_behaviour(TODAY).segments[0]
+
+    report = service.perform_gap_analysis(GapAnalysisRequest(as_of_date=TODAY, time_buckets=["1M", "1Y"]))
+
+    retained = [segment.core_share * np.exp(-segment.decay_rate * months) for months in (1, 12)]
+    assert report.liabilities_by_bucket == pytest.approx([800.0 * (1 - retained[0]), 800.0 * (retained[0] - retained[1])])
+
+
+def test_gap_analysis_endpoint(client):
+    response = client.post("/api/alm/gap-analysis", json={"as_of_date": TODAY.isoformat(), "scenario_id": "S001"})
+    assert response.status_code == 200
+    assert response.json()["scenario_details"]["name"] == "Interest Rate Shock +200bp"
+
+    for request in ({"time_buckets": ["1M", "1Q"]}, {"time_buckets": ["1Y", "6M"]}, {"scenario_id": "S999"}):
+        assert client.post("/api/alm/gap-analysis", json={"as_of_date": TODAY.isoformat(), **request}).status_code == 400
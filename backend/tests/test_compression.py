@@ -0,0 +1,135 @@
+# tests/test_compression.py
+# This file tests content-coding negotiation, the compression middleware and its metrics
+
+import json
+import zlib
+
+import pyarrow as pa
+import pytest
+
+from app.alm.compression import SUPPORTED_ENCODINGS, CompressionMetrics, CompressionMiddleware, compress, negotiate
+from app.alm.dashboard import Snapshot
+
+from conftest import TODAY, position, replace_book
+
+ENCODINGS = ("gzip", "zstd")
+
+
+def decode(body: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        return zlib.decompress(body, 31)
+    return pa.CompressedInputStream(pa.BufferReader(body), encoding).read()
+
+
+@pytest.fixture
+def compressed_client(service, monkeypatch):
+    """A test client of the ALM router behind the compression middleware, with fresh metrics and a book of 40 assets."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.alm import router
+
+    replace_book(service, [position(f"A{i:03d}", "asset", "loans", 1_000.0 * i, "TND", 1 + i % 7) for i in range(40)])
+    metrics = CompressionMetrics()
+    monkeypatch.setattr(router, "alm_service", service)
+    monkeypatch.setattr(router, "compression_metrics", metrics)
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, path_prefix="/api/alm", metrics=metrics)
+    app.include_router(router.router)
+    with TestClient(app) as client:
+        yield client
+
+
+def raw_get(client, path, encoding, **kwargs):
+    """Status, headers and undecoded body of a GET accepting `encoding`."""
+    with client.stream("GET", path, headers={"Accept-Encoding": encoding}, **kwargs) as response:
+        return response.status_code, response.headers, b"".join(response.iter_raw())
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("identity", None),
+    ("gzip, deflate, br", "gzip"),
+    ("gzip, zstd", SUPPORTED_ENCODINGS[0]),
+    ("gzip;q=1.0, zstd;q=0.5", "gzip"),
+    ("*", SUPPORTED_ENCODINGS[0]),
+    ("*;q=0, gzip;q=0", None),
+    ("gzip;q=oops", None),
+])
+def test_negotiation_follows_quality_values_then_server_preference(header, expected):
+    assert negotiate(header) == expected
+
+
+@pytest.mark.parametrize("encoding", [e for e in ENCODINGS if e in SUPPORTED_ENCODINGS])
+def test_whole_bodies_round_trip(encoding):
+    body = json.dumps([{"id": i, "amount": i * 1.5} for i in range(2_000)]).encode()
+    assert decode(compress(body, encoding), encoding) == body
+
+
+@pytest.mark.parametrize("encoding", [e for e in ENCODINGS if e in SUPPORTED_ENCODINGS])
+def test_large_json_responses_are_compressed_with_an_exact_length(compressed_client, encoding):
+    plain = compressed_client.get("/api/alm/assets", headers={"Accept-Encoding": "identity"})
+    status, headers, body = raw_get(compressed_client, "/api/alm/assets", encoding)
+
+    assert status == 200
+    assert headers["content-encoding"] == encoding
+    assert int(headers["content-length"]) == len(body)
+    assert "Accept-Encoding" in headers["vary"]
+    assert json.loads(decode(body, encoding))
+    assert "content-encoding" not in plain.headers
+
+
+def test_small_and_precompressed_media_types_are_sent_as_they_are(compressed_client):
+    _, small, _ = raw_get(compressed_client, "/api/alm/datasources", "gzip")
+    _, parquet, _ = raw_get(compressed_client, "/api/alm/export/positions", "gzip", params={"format": "parquet"})
+
+    assert "content-encoding" not in small
+    assert "content-encoding" not in parquet
+
+
+def test_streamed_exports_are_compressed_chunk_by_chunk(compressed_client, service):
+    status, headers, body = raw_get(compressed_client, "/api/alm/export/positions", "gzip", params={"format": "arrow"})
+
+    assert status == 200 and headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    table = pa.ipc.open_stream(decode(body, "gzip")).read_all()
+    assert table.num_rows == len(service.positions.get_assets(TODAY))
+
+
+def test_snapshots_are_compressed_once_per_encoding():
+    body = json.dumps({"values": list(range(5_000))}).encode()
+    snapshot = Snapshot(body, version=1)
+
+    for encoding in SUPPORTED_ENCODINGS:
+        encoded, sent, etag = snapshot.representation(encoding)
+        assert sent == encoding and decode(encoded, encoding) == body
+        assert etag != snapshot.etag and encoding in etag
+    assert snapshot.representation(None) == (body, None, snapshot.etag)
+    assert Snapshot(b"{}", version=1).representation("gzip")[1] is None
+
+
+def test_dashboard_is_served_precompressed_with_an_etag_per_encoding(compressed_client):
+    status, headers, body = raw_get(compressed_client, "/api/alm/dashboard", "gzip")
+    assert status == 200 and headers["content-encoding"] == "gzip"
+    assert json.loads(decode(body, "gzip"))["current_risk_assessment"]
+
+    _, identity, _ = raw_get(compressed_client, "/api/alm/dashboard", "identity")
+    assert identity["etag"] != headers["etag"]
+    revalidated = compressed_client.get("/api/alm/dashboard", headers={"Accept-Encoding": "gzip", "If-None-Match": headers["etag"]})
+    assert revalidated.status_code == 304
+
+
+def test_metrics_report_bytes_and_cpu_per_endpoint(compressed_client):
+    raw_get(compressed_client, "/api/alm/assets", "gzip")
+    raw_get(compressed_client, "/api/alm/assets", "identity")
+    raw_get(compressed_client, "/api/alm/dashboard", "gzip")
+
+    report = compressed_client.get("/api/alm/metrics/compression", headers={"Accept-Encoding": "identity"}).json()
+
+    positions = report["GET /api/alm/assets"]
+    assert positions["responses"] == 2
+    gzip = positions["by_encoding"]["gzip"]
+    assert gzip["wire_bytes"] < gzip["body_bytes"] and gzip["ratio"] < 1.0
+    assert positions["by_encoding"]["identity"]["ratio"] == 1.0
+    dashboard = report["GET /api/alm/dashboard"]["by_encoding"]["gzip"]
+    assert dashboard["precompressed"] == 1 and dashboard["cpu_seconds"] == 0
@@ -0,0 +1,81 @@
+# tests/test_concentration.py
+# This file tests the incremental concentration aggregates and their endpoints
+
+from datetime import timedelta
+
+import pytest
+
+from app.alm.concentration import ConcentrationEngine, CounterpartyHierarchy, TopNIndex
+from app.alm.curves import FX_SPOT
+from app.alm.repository import position_to_row
+
+from conftest import TODAY, frame, position
+
+
+def test_top_n_follows_updates_and_removals():
+    index = TopNIndex({"a": 5.0, "b": 3.0, "c": 1.0})
+    index.add("c", 6.0)
+    index.add("a", -5.0)
+
+    assert index.top(2) == [("c", 7.0), ("b", 3.0)]
+    assert "a" not in index.totals
+    assert index.sum == pytest.approx(10.0)
+    assert index.hhi() == pytest.approx((7.0 ** 2 + 3.0 ** 2) / 10.0 ** 2)
+
+
+def test_stale_heap_entries_are_compacted():
+    index = TopNIndex({"a": 1.0})
+    for _ in range(200):
+        index.add("a", 1.0)
+
+    assert index.top(3) == [("a", 201.0)]
+    assert len(index._heap) <= 2 * len(index.totals) + 64
+
+
+def book():
+    return [
+        position("A1", "asset", "loans", 1_000.0, "TND", 1.0, counterparty="Alpha"),
+        position("A2", "asset", "bonds", 500.0, "USD", 2.0, counterparty="Beta"),
+        position("A3", "asset", "loans", 200.0, "TND", 1.0, counterparty="Gamma"),
+        position("L1", "liability", "deposits", 800.0, "TND", 0.25, counterparty="Alpha"),
+    ]
+
+
+def test_incremental_updates_match_a_full_reload():
+    hierarchy = CounterpartyHierarchy({"Alpha": ("Alpha Group", "industry"), "Gamma": ("Alpha Group", "industry")})
+    engine = ConcentrationEngine(hierarchy)
+    engine.load(frame(book()))
+    amended = position("A3", "asset", "loans", 900.0, "EUR", 1.0, counterparty="Gamma")
+    engine.upsert(amended)
+    engine.remove("A2")
+
+    reloaded = ConcentrationEngine(hierarchy)
+    reloaded.load(frame([amended] + [p for p in book() if p.id in ("A1", "L1")]))
+    for dimension, index in engine.indexes.items():
+        assert index.totals == pytest.approx(reloaded.indexes[dimension].totals)
+        assert index.hhi() == pytest.approx(reloaded.indexes[dimension].hhi())
+    assert engine.indexes["group"].top(1) == [("Alpha Group", pytest.approx(1_000.0 + 900.0 * FX_SPOT["EUR"]))]
+    assert engine.indexes["counterparty"].totals.keys() == {"Alpha", "Gamma"}
+
+
+def test_position_edits_move_the_concentration_report(client):
+    before = client.get("/api/alm/concentration").json()
+    response = client.put("/api/alm/positions", json=position("A9", "asset", "loans", 5_000_000.0, "TND", 1.0, counterparty="Delta").model_dump(mode="json"))
+
+    assert response.status_code == 200
+    after = client.get("/api/alm/concentration", params={"top_n": 1}).json()
+    assert after["top_counterparties"][0]["name"] == "Delta"
+    assert after["total_exposure"] == pytest.approx(before["total_exposure"] + 5_000_000.0)
+    assert client.delete("/api/alm/positions/A9").status_code == 200
+    assert client.get("/api/alm/concentration").json()["total_exposure"] == pytest.approx(before["total_exposure"])
+    assert client.delete("/api/alm/positions/A9").status_code == 404
+
+
+def test_reports_follow_the_as_of_date(service):
+    today = service.get_concentration_report(TODAY).total_exposure
+    # A load for tomorrow adds a position from then on
+    later = TODAY + timedelta(days=1)
+    service.repository.positions.merge_positions(later, [position_to_row(position("A9", "asset", "loans", 2_000_000.0, "TND", 1.0, counterparty="Delta"))])
+
+    assert service.get_concentration_report(later).total_exposure == pytest.approx(today + 2_000_000.0)
+    assert service.get_concentration_report(TODAY).total_exposure == pytest.approx(today)
@@ -0,0 +1,120 @@
+# tests/test_concurrency.py
+# This file tests that heavy endpoints run under admission control and share the service caches safely
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.alm import router
+from app.alm.concurrency import AdmissionControl, AdmissionRejected, SingleFlight
+
+from conftest import TODAY
+
+def test_identical_concurrent_requests_share_one_computation():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def scenario():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.run("key", compute) for _ in range(5)), flight.run("other", compute))
+        return flight, results, await flight.run("key", compute)
+
+    flight, results, later = asyncio.run(scenario())
+    assert results[:5] == [results[0]] * 5
+    assert (flight.leaders, flight.followers) == (3, 4)
+    # Finished computations are not cached
+    assert later == 3
+
+
+def test_a_disconnecting_caller_does_not_cancel_the_shared_computation():
+    async def scenario():
+        flight = SingleFlight()
+        first = asyncio.ensure_future(flight.run("key", lambda: asyncio.sleep(0.02, result="done")))
+        second = asyncio.ensure_future(flight.run("key", lambda: asyncio.sleep(0.02, result="again")))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == "done"
+
+
+def test_requests_waiting_too_long_are_refused_with_503():
+    release = threading.Event()
+
+    async def scenario():
+        control = AdmissionControl("slow", max_concurrent=1, max_queued=1, queue_timeout=0.05)
+        running = asyncio.ensure_future(control.run(release.wait, 5))
+        await asyncio.sleep(0.01)
+        try:
+            await control.run(time.sleep, 0)
+        except AdmissionRejected as e:
+            return e
+        finally:
+            release.set()
+            await running
+
+    rejected = asyncio.run(scenario())
+    assert (rejected.status_code, rejected.retry_after) == (503, 1)
+
+
+HEAVY_GETS = [
+    ("sensitivity", "/api/alm/sensitivity"),
+    ("concentration", "/api/alm/concentration"),
+    ("market-risk", "/api/alm/market-risk/var"),
+]
+HEAVY_POSTS = [
+    ("gap-analysis", "/api/alm/gap-analysis", {"as_of_date": TODAY.isoformat()}),
+    ("scenario-grid", "/api/alm/stress-test/grid", {"rate_shock_bp": {"start": 0, "stop": 100, "steps": 3}}),
+]
+
+
+@pytest.mark.parametrize("endpoint, path", HEAVY_GETS)
+def test_heavy_endpoints_answer(client, endpoint, path):
+    response = client.get(path)
+
+    assert response.status_code == 200
+    assert response.json()["as_of_date"] == TODAY.isoformat()
+
+
+@pytest.mark.parametrize("endpoint, path", HEAVY_GETS)
+def test_heavy_endpoints_are_shed_when_full(client, monkeypatch, endpoint, path):
+    full = AdmissionControl(endpoint, max_concurrent=0, max_queued=0)
+    monkeypatch.setitem(router.admission, endpoint, full)
+    response = client.get(path)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "10"
+    assert full.rejected == 1
+
+
+@pytest.mark.parametrize("endpoint, path, body", HEAVY_POSTS)
+def test_heavy_posts_are_shed_when_full(client, monkeypatch, endpoint, path, body):
+    assert client.post(path, json=body).status_code == 200
+    monkeypatch.setitem(router.admission, endpoint, AdmissionControl(endpoint, max_concurrent=0, max_queued=0))
+
+    assert client.post(path, json=body).status_code == 429
+
+
+def test_the_request_key_is_computed_off_the_event_loop(client, service, monkeypatch):
+    threads = []
+    monkeypatch.setattr(type(service), "data_version", property(lambda self: threads.append(threading.current_thread()) or 0))
+    client.get("/api/alm/sensitivity")
+
+    assert threads and threading.main_thread() not in threads
+
+
+def test_caches_are_built_once_under_concurrent_requests(service):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        engines = list(pool.map(lambda _: service.positions.get_sensitivity_engine(TODAY), range(16)))
+        concentration = list(pool.map(lambda _: service.positions.concentration_engine(TODAY), range(16)))
+
+    assert all(engine is engines[0] for engine in engines)
+    assert all(engine is concentration[0] for engine in concentration)
+    assert engines[0].frame is service.positions.get_position_frame(TODAY)
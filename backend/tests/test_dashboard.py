@@ -0,0 +1,75 @@
+# tests/test_dashboard.py
+# This file tests the dashboard aggregate and its materialized endpoint
+
+import threading
+import time
+
+import pytest
+
+from app.alm.curves import FX_SPOT
+from app.alm.dashboard import MaterializedView, etag_matches
+from app.alm.models import RiskType
+
+from conftest import TODAY
+
+
+def test_interest_rate_figures_are_in_the_base_currency(service):
+    engine = service.positions.get_sensitivity_engine(TODAY)
+    dashboard = service.build_dashboard(TODAY)
+
+    rate_risk = next(a for a in dashboard.current_risk_assessment if a.risk_type == RiskType.INTEREST_RATE)
+    assert f"EVE {engine.base_pv.sum():,.0f}" in rate_risk.description
+    shocked = engine.in_base_currency(engine.parallel_shift(0.02)).sum()
+    rate_stress = next(t for t in dashboard.recent_stress_tests if t.risk_type == RiskType.INTEREST_RATE)
+    assert f"EVE change of {shocked:,.0f}" in rate_stress.description
+    # The native sum would add USD and EUR amounts to TND ones
+    assert f"EVE change of {engine.parallel_shift(0.02).sum():,.0f}" not in rate_stress.description
+
+
+def test_liquidity_stress_is_in_the_base_currency(service):
+    dashboard = service.build_dashboard(TODAY)
+
+    liquidity = next(t for t in dashboard.recent_stress_tests if t.risk_type == RiskType.LIQUIDITY)
+    # Demonstration book: the 500k USD bond, less a 30% haircut, against 20% of the 800k TND deposits
+    buffer, outflows = (float(word.replace(",", "")) for word in liquidity.description.split() if word[0].isdigit() and "," in word)
+    assert buffer == pytest.approx(500_000 * FX_SPOT["USD"] * 0.7, rel=0.05)
+    assert outflows == 160_000
+
+
+def test_first_dashboard_request_builds_the_snapshot(service, client):
+    assert not service.dashboard_ready
+    response = client.get("/api/alm/dashboard")
+
+    assert response.status_code == 200
+    assert service.dashboard_ready
+    assert len(response.json()["recent_stress_tests"]) == 2
+    assert client.get("/api/alm/dashboard", headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+
+
+def test_stale_view_serves_the_previous_snapshot_while_rebuilding():
+    version = [1]
+    release = threading.Event()
+
+    def build():
+        if version[0] > 1:
+            release.wait(5)
+        return f'{{"version": {version[0]}}}'.encode()
+
+    view = MaterializedView(build, lambda: version[0])
+    first = view.get()
+    version[0] = 2
+    assert view.get() is first
+    release.set()
+    for _ in range(100):
+        if view.get().version == 2:
+            break
+        time.sleep(0.01)
+    assert view.get().body == b'{"version": 2}'
+    assert view.get().etag != first.etag
+
+
+def test_etag_matching():
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches(None, '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
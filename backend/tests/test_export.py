@@ -0,0 +1,90 @@
+# tests/test_export.py
+# This file tests the Arrow IPC and Parquet export and import of positions and result tables
+
+import io
+from datetime import timedelta
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from app.alm.export import export_positions, export_table, import_positions
+from app.alm.repository import SQLiteRepository
+
+from conftest import TODAY, position
+
+
+def book():
+    return [
+        position("A1", "asset", "loans", 1_000.0, "TND", 1.0, counterparty="Alpha"),
+        position("A2", "asset", "bonds", 500.0, "USD", 2.0, rate=4.5, fixed=False),
+        position("L1", "liability", "deposits", 800.0, "TND", 0.25, counterparty="Beta"),
+    ]
+
+
+def read(chunks, format):
+    data = io.BytesIO(b"".join(chunks))
+    return pq.read_table(data) if format == "parquet" else pa.ipc.open_stream(data).read_all()
+
+
+@pytest.mark.parametrize("format", ["arrow", "parquet"])
+def test_positions_round_trip(repository, format):
+    repository.positions.save_positions(TODAY, book())
+    data = b"".join(export_positions(repository.positions, TODAY, format))
+
+    target = SQLiteRepository(":memory:")
+    changes, validator = import_positions(target.positions, io.BytesIO(data), format)
+    assert (changes.received, len(changes.inserted), validator.report.rejected) == (3, 3, 0)
+    assert target.positions.load_positions(TODAY) == repository.positions.load_positions(TODAY)
+    # The file remembers its snapshot date unless another one is given
+    changes, _ = import_positions(target.positions, io.BytesIO(data), format, TODAY + timedelta(days=1))
+    assert (changes.received, changes.unchanged) == (3, 3)
+    target.close()
+
+
+def test_projection_and_filters_are_pushed_down(repository):
+    repository.positions.save_positions(TODAY, book())
+    table = read(export_positions(
+        repository.positions, TODAY, "parquet", ["id", "amount", "currency"],
+        type="asset", currencies=["TND"], maturity_to=TODAY + timedelta(days=400),
+    ), "parquet")
+
+    assert table.column_names == ["id", "amount", "currency"]
+    assert table.column("id").to_pylist() == ["A1"]
+    assert pa.types.is_dictionary(table.schema.field("currency").type)
+
+
+def test_batches_are_streamed_as_separate_chunks(repository):
+    repository.positions.save_positions(TODAY, book())
+    batches = repository.positions.iter_position_rows(TODAY, ["id"], batch_size=1)
+
+    assert [len(batch) for batch in batches] == [1, 1, 1]
+    assert read(export_table({"x": list(range(5))}, "arrow", batch_size=2), "arrow").num_rows == 5
+
+
+def test_unknown_formats_and_columns_are_rejected(repository):
+    with pytest.raises(ValueError):
+        export_positions(repository.positions, TODAY, "csv")
+    with pytest.raises(ValueError):
+        export_positions(repository.positions, TODAY, "arrow", ["id", "no_such_column"])
+    incomplete = io.BytesIO(b"".join(export_positions(repository.positions, TODAY, "arrow", ["id", "amount"])))
+    with pytest.raises(ValueError, match="missing columns"):
+        import_positions(repository.positions, incomplete, "arrow")
+
+
+def test_export_and_import_endpoints(client, service):
+    response = client.get("/api/alm/export/positions", params={"format": "parquet", "type": "asset"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.parquet"
+    assert read([response.content], "parquet").num_rows == len(service.positions.get_assets(TODAY))
+
+    later = TODAY + timedelta(days=1)
+    upload = {"file": ("assets.parquet", response.content, "application/octet-stream")}
+    imported = client.post("/api/alm/import/positions", params={"format": "parquet", "as_of_date": later.isoformat()}, files=upload)
+    assert imported.json()["imported"] == len(service.positions.get_assets(TODAY))
+    assert imported.json()["anomalies"]["rejected"] == 0
+    assert service.positions.get_assets(later) == service.positions.get_assets(TODAY)
+
+    gap = read([client.get("/api/alm/export/results/gap").content], "arrow")
+    assert gap.column("period").to_pylist() == ["1M", "3M", "6M", "1Y"]
+    assert client.get("/api/alm/export/results/unknown").status_code == 400
@@ -0,0 +1,91 @@
+# tests/test_ftp.py
+# This file tests funds transfer pricing rates, margin reports and the locking of rates between runs
+
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from app.alm.curves import get_curve
+from app.alm.ftp import LIQUIDITY_PREMIUM_CURVE, FTPEngine, margin_report
+
+from conftest import TODAY, frame, position, replace_book
+
+
+def book():
+    return [
+        position("A1", "asset", "loan", 1_000.0, "TND", 2.0, rate=8.0),
+        position("A2", "asset", "loan", 3_000.0, "TND", 6.0, rate=7.0, fixed=False),
+        position("L1", "liability", "deposit", 2_000.0, "TND", 1.0, rate=2.0),
+    ]
+
+
+def test_matched_maturity_reads_the_funding_curve_at_the_residual_maturity():
+    positions = book()
+    f = frame(positions)
+    rate, premium, term = FTPEngine().price(f, "matched_maturity")
+
+    days = np.rint(f.maturity_years * 365.0)
+    assert rate == pytest.approx(get_curve("TND").zero_rates(days / 365.0))
+    assert premium == pytest.approx(np.interp(days / 365.0, *LIQUIDITY_PREMIUM_CURVE) / 10_000.0)
+    assert term == pytest.approx(f.maturity_years * 365.0)
+
+
+def test_repricing_term_caps_floating_positions_at_the_reset_period():
+    f = frame(book())
+    term = FTPEngine(reset_frequency=4).term_days(f, "repricing_term")
+
+    assert term.tolist() == pytest.approx([f.maturity_years[0] * 365.0, 365.0 / 4, f.maturity_years[2] * 365.0])
+
+
+def test_pooled_positions_share_the_pool_rate_at_its_weighted_maturity():
+    f = frame(book())
+    term = FTPEngine().term_days(f, "pooled")
+
+    loans = (1_000.0 * f.maturity_years[0] + 3_000.0 * f.maturity_years[1]) / 4_000.0 * 365.0
+    assert term.tolist() == pytest.approx([loans, loans, f.maturity_years[2] * 365.0])
+    with pytest.raises(ValueError):
+        FTPEngine().term_days(f, "average")
+
+
+def test_margins_charge_assets_and_credit_liabilities():
+    f = frame(book())
+    report = margin_report(f, np.array([0.05, 0.06, 0.04]), np.zeros(3))
+
+    assert report["by_category"]["loan"]["margin_income"] == pytest.approx(1_000.0 * 0.03 + 3_000.0 * 0.01)
+    assert report["by_category"]["deposit"]["margin"] == pytest.approx(2.0)
+    assert report["total"]["margin_income"] == pytest.approx(60.0 + 40.0)
+    assert report["total"]["transfer_rate"] == pytest.approx(100 * (50.0 + 180.0 + 80.0) / 6_000.0)
+
+
+def test_locked_rates_are_reused_until_repricing(service):
+    replace_book(service, book())
+
+    first = service.ftp.run_ftp(TODAY)
+    second = service.ftp.run_ftp(TODAY)
+    assert (first.priced, first.reused) == (3, 0)
+    assert (second.priced, second.reused) == (0, 3)
+    assert second.total == first.total
+
+    replace_book(service, book() + [position("A3", "asset", "loan", 500.0, "TND", 3.0, rate=6.0)])
+    assert (service.ftp.run_ftp(TODAY).priced, service.ftp.run_ftp(TODAY, incremental=False).priced) == (1, 4)
+    assert service.ftp.run_ftp(TODAY, method="pooled").priced == 4
+
+
+def test_repricing_term_locks_expire_at_the_next_reset(service):
+    replace_book(service, book())
+    service.ftp.run_ftp(TODAY, method="repricing_term")
+
+    later = service.ftp.run_ftp(TODAY + timedelta(days=100), method="repricing_term")
+
+    assert (later.priced, later.reused) == (1, 2)
+
+
+def test_ftp_endpoint(client):
+    response = client.get("/api/alm/ftp", params={"method": "pooled", "liquidity_premium": False})
+    assert response.status_code == 200
+    report = response.json()
+    assert report["method"] == "pooled" and report["total"]["liquidity_premium"] == 0.0
+    assert set(report["by_currency"]) == {"TND", "USD", "EUR"}
+
+    assert client.get("/api/alm/ftp", params={"method": "average"}).status_code == 400
@@ -0,0 +1,87 @@
+# tests/test_market_risk.py
+# This file tests the historical VaR engine and its rolling window
+
+import warnings
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from app.alm import service as service_module
+from app.alm.market_risk import HistoricalVaR, RiskFactorHistory
+
+from conftest import TODAY, position, replace_book
+
+
+def engine_with(returns, window=10):
+    history = RiskFactorHistory(["IR.TND.1Y", "FX.USDTND"], window=window)
+    for i, row in enumerate(returns):
+        history.append(TODAY - timedelta(days=len(returns) - i), np.array(row))
+    return HistoricalVaR(history)
+
+
+def test_empty_history_slots_are_day_precision_nat():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        history = RiskFactorHistory(["IR.TND.1Y"], window=3)
+
+    assert history.dates.dtype == np.dtype("datetime64[D]")
+    assert np.isnat(history.dates).all()
+
+
+def test_var_is_the_tail_loss_of_the_desk_pnl():
+    var = engine_with([[0.0, r] for r in (-0.03, -0.01, 0.0, 0.01, 0.02)])
+    var.set_sensitivities({"fx/USD": np.array([0.0, 1_000.0])})
+    figures = var.run(confidence=0.8)
+
+    # One scenario in the 20% tail: the -3% move on a 1,000 position
+    assert figures["fx/USD"] == {"var": pytest.approx(30.0), "expected_shortfall": pytest.approx(30.0)}
+    assert figures["TOTAL"] == figures["fx/USD"]
+
+
+def test_appending_a_day_evicts_the_oldest_scenario():
+    var = engine_with([[0.0, r] for r in (-0.03, 0.01, 0.02)], window=3)
+    var.set_sensitivities({"fx/USD": np.array([0.0, 1_000.0])})
+    var.append_day(TODAY, {"FX.USDTND": -0.005})
+
+    assert sorted(var.pnl[0]) == pytest.approx([-5.0, 10.0, 20.0])
+    # Unchanged desks keep their P&L rows
+    assert var.set_sensitivities({"fx/USD": np.array([0.0, 1_000.0])}) == 0
+
+
+def test_var_of_the_demonstration_book(client):
+    response = client.get("/api/alm/market-risk/var")
+
+    assert response.status_code == 200
+    report = response.json()
+    assert set(report["by_desk"]) == {"bonds/USD", "fx/USD", "fx/EUR"}
+    assert report["total"]["var"] > 0
+
+
+def test_book_without_desks_has_no_var(service, client):
+    # A base-currency book with no bond categories carries neither bond nor FX desks
+    replace_book(service, [
+        position("A1", "asset", "loans", 1_000.0, "TND", 1.0),
+        position("L1", "liability", "deposits", 800.0, "TND", 0.25),
+    ])
+    response = client.get("/api/alm/market-risk/var")
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["by_desk"] == {} and report["by_currency"] == {}
+    assert report["total"] == {"var": 0.0, "expected_shortfall": 0.0}
+
+
+def test_desks_are_derived_again_only_for_a_new_date_or_data_version(service, monkeypatch):
+    calls = []
+    derive = service_module.desk_sensitivities
+    monkeypatch.setattr(service_module, "desk_sensitivities", lambda *args: calls.append(args) or derive(*args))
+
+    first = service.get_market_var(TODAY)
+    assert service.get_market_var(TODAY, confidence=0.95).total.var <= first.total.var
+    assert len(calls) == 1
+
+    service.positions.upsert_position(position("A9", "asset", "bonds", 1_000_000.0, "USD", 5.0))
+    assert service.get_market_var(TODAY).total.var != first.total.var
+    service.get_market_var(TODAY + timedelta(days=1))
+    assert len(calls) == 3
@@ -0,0 +1,146 @@
+# tests/test_repository.py
+# This file tests the SQLite repository: dated snapshots, versioning and store setup
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pytest
+
+from app.alm import repository as repository_module
+from app.alm.repository import (
+    POSITION_COLUMNS, VALID_AT_SQL, ALMRepository, AccountRepository, BehaviourRepository, FTPRepository, PositionRepository,
+    ReferenceDataRepository, SandboxRepository, SourceRepository, SQLiteRepository, TransactionRepository, position_to_row,
+)
+from app.alm.service import ALMService
+
+from conftest import TODAY, position
+
+
+def book():
+    return [
+        position("A1", "asset", "loans", 1_000.0, "TND", 1.0),
+        position("A2", "asset", "bonds", 500.0, "USD", 2.0),
+        position("L1", "liability", "deposits", 800.0, "TND", 0.25),
+    ]
+
+
+@pytest.mark.parametrize("interface", [
+    ALMRepository, PositionRepository, SourceRepository, ReferenceDataRepository, AccountRepository,
+    TransactionRepository, FTPRepository, BehaviourRepository, SandboxRepository,
+])
+def test_interfaces_are_abstract(interface):
+    with pytest.raises(TypeError):
+        interface()
+
+
+def test_positions_are_versioned_by_date(repository):
+    yesterday = TODAY - timedelta(days=1)
+    repository.positions.save_positions(yesterday, book())
+    amended = position("A1", "asset", "loans", 1_200.0, "TND", 1.0)
+    changes = repository.positions.merge_positions(TODAY, [position_to_row(amended)], deleted_ids=["L1"])
+
+    assert changes.summary() == {"received": 1, "inserted": 0, "updated": 1, "deleted": 1, "unchanged": 0}
+    assert {p.id: p.amount for p in repository.positions.load_positions(yesterday)} == {"A1": 1_000.0, "A2": 500.0, "L1": 800.0}
+    assert {p.id: p.amount for p in repository.positions.load_positions(TODAY)} == {"A1": 1_200.0, "A2": 500.0}
+    assert repository.positions.snapshot_date(TODAY + timedelta(days=5)) == TODAY
+    assert repository.positions.is_latest_snapshot(TODAY) and not repository.positions.is_latest_snapshot(yesterday)
+
+
+def test_unchanged_rows_do_not_bump_the_version(repository):
+    repository.positions.save_positions(TODAY, book())
+    version = repository.positions.data_version()
+    changes = repository.positions.merge_positions(TODAY, [position_to_row(p) for p in book()])
+
+    assert changes.unchanged == 3 and not changes
+    assert repository.positions.data_version() == version
+
+
+def test_complete_load_deletes_missing_positions(repository):
+    repository.positions.save_positions(TODAY - timedelta(days=1), book())
+    changes = repository.positions.merge_positions(TODAY, [position_to_row(p) for p in book()[:2]], complete=True)
+
+    assert changes.deleted == ["L1"]
+    assert [p.id for p in repository.positions.load_positions(TODAY, type="liability")] == []
+
+
+def test_complete_load_only_deletes_its_own_source(repository):
+    repository.positions.merge_positions(TODAY - timedelta(days=1), [position_to_row(p) for p in book()[:2]], source="core")
+    repository.positions.merge_positions(TODAY - timedelta(days=1), [position_to_row(book()[2])], source="treasury")
+    changes = repository.positions.merge_positions(TODAY, [position_to_row(book()[0])], complete=True, source="core")
+
+    assert changes.deleted == ["A2"]
+    assert sorted(p.id for p in repository.positions.load_positions(TODAY)) == ["A1", "L1"]
+
+
+def test_frame_matches_positions(repository):
+    repository.positions.save_positions(TODAY, book())
+    frame = repository.positions.load_frame(TODAY)
+
+    assert sorted(frame.ids) == ["A1", "A2", "L1"]
+    assert frame.amount.sum() == pytest.approx(2_300.0)
+    assert len(repository.positions.load_frame(TODAY - timedelta(days=1)).ids) == 0
+
+
+def test_snapshot_reads_range_scan_the_validity_index(repository):
+    plan = repository.database.connection().execute(
+        f"EXPLAIN QUERY PLAN SELECT {POSITION_COLUMNS} FROM positions WHERE {VALID_AT_SQL}",
+        (TODAY.isoformat(), TODAY.isoformat()),
+    ).fetchall()
+
+    assert any("ix_positions_valid (valid_to>?)" in row[-1] for row in plan)
+
+
+def test_filtered_scans_seek_on_the_equality_columns(repository):
+    plan = repository.database.connection().execute(
+        f"EXPLAIN QUERY PLAN SELECT id FROM positions WHERE {VALID_AT_SQL} AND type = ? AND category = ? AND currency = ?",
+        (TODAY.isoformat(), TODAY.isoformat(), "asset", "loans", "TND"),
+    ).fetchall()
+
+    assert any("ix_positions_filter (type=? AND category=? AND currency=?" in row[-1] for row in plan)
+
+
+def test_default_path_does_not_depend_on_the_working_directory(monkeypatch, tmp_path):
+    monkeypatch.delenv("ALM_DB_PATH")
+    monkeypatch.chdir(tmp_path)
+
+    assert os.path.isabs(repository_module.DEFAULT_DB_PATH)
+    assert os.path.dirname(repository_module.DEFAULT_DB_PATH) == os.path.dirname(os.path.dirname(__file__))
+
+
+def test_service_opens_the_store_on_first_use(monkeypatch, tmp_path):
+    path = tmp_path / "alm.sqlite3"
+    monkeypatch.setenv("ALM_DB_PATH", str(path))
+    service = ALMService()
+    assert not path.exists()
+
+    assert [s.id for s in service.get_stress_test_scenarios()] == ["S001", "S002"]
+    assert path.exists()
+    service.close()
+
+    # A restarted worker reuses the store rather than seeding it again
+    restarted = ALMService(SQLiteRepository(str(path)))
+    assert len(restarted.positions.get_assets(TODAY)) == 2
+    restarted.close()
+
+
+def test_writes_from_another_worker_invalidate_caches(tmp_path):
+    path = str(tmp_path / "alm.sqlite3")
+    first, second = ALMService(SQLiteRepository(path)), ALMService(SQLiteRepository(path))
+    assert first.get_concentration_report(TODAY).total_exposure == second.get_concentration_report(TODAY).total_exposure
+
+    second.positions.upsert_position(position("A9", "asset", "loans", 1_000.0, "TND", 1.0, counterparty="Delta"), TODAY)
+    assert first.get_concentration_report(TODAY).total_exposure == pytest.approx(second.get_concentration_report(TODAY).total_exposure)
+    for service in (first, second):
+        service.close()
+
+
+def test_close_releases_connections_opened_by_other_threads(tmp_path):
+    repository = SQLiteRepository(str(tmp_path / "alm.sqlite3"))
+    repository.positions.save_positions(TODAY, book())
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        assert pool.submit(lambda: len(repository.positions.load_positions(TODAY))).result() == 3
+    repository.close()
+
+    assert len(repository.positions.load_positions(TODAY)) == 3
+    repository.close()
@@ -0,0 +1,48 @@
+# tests/test_reverse_stress.py
+# This file tests the reverse stress search against breach points computed by hand
+
+import numpy as np
+import pytest
+
+from app.alm.curves import FX_SPOT, get_curve
+from app.alm.models import ReverseStressRequest
+from conftest import position, replace_book
+
+
+@pytest.fixture
+def liquidity_book(service):
+    # A USD bond buffer (one floating flow in 3 months) against TND deposits
+    book = [
+        position("A1", "asset", "bonds", 1_000.0, "USD", 2.0, rate=4.0, fixed=False),
+        position("L1", "liability", "deposits", 800.0, "TND", 0.5, rate=2.0, fixed=False),
+    ]
+    replace_book(service, book)
+    return service
+
+
+def test_lcr_breach_matches_the_hand_computed_severity(liquidity_book):
+    request = ReverseStressRequest(metric_name="LCR", rate_shock_bp=0.0)
+    result = liquidity_book.run_reverse_stress_test(request)
+
+    # With haircut = runoff = s the coverage is B (1 - s) / (800 s), which falls to 1 at s = B / (B + 800)
+    buffer = 1_000.0 * (1 + 0.04 * 0.25) * get_curve("USD").discount_factors(np.array([0.25]))[0] * FX_SPOT["USD"]
+    breach = buffer / (buffer + 800.0)
+
+    assert result.breached and result.converged
+    assert breach <= result.severity <= breach + request.tolerance
+    assert result.scenario == {"rate_shock_bp": 0.0, "deposit_runoff": result.severity, "haircut": result.severity}
+    assert result.metric_value == pytest.approx(1.0, abs=0.01)
+    assert result.metric_value <= 1.0
+
+
+def test_rate_shock_brings_the_breach_forward(liquidity_book, client):
+    without_shock = liquidity_book.run_reverse_stress_test(ReverseStressRequest(metric_name="LCR", rate_shock_bp=0.0))
+    response = client.post("/api/alm/stress-test/reverse", json={"metric_name": "LCR", "rate_shock_bp": 500.0})
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result["breached"] and result["threshold"] == 1.0
+    # Higher rates lower the bond value, so the buffer runs out at a milder runoff and haircut
+    assert result["scenario"]["rate_shock_bp"] > 0
+    assert result["severity"] < without_shock.severity
+    assert result["metric_value"] <= 1.0
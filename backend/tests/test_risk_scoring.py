@@ -0,0 +1,93 @@
+# tests/test_risk_scoring.py
+# This file tests the account risk scores and their portfolio aggregate against the frontend risk store
+
+from datetime import timedelta
+
+import pytest
+
+from app.alm.models import Account, AccountType
+from app.alm.repository import account_to_row
+
+from conftest import TODAY
+
+
+def account(id: str, account_type: AccountType, balance: float, **fields) -> Account:
+    return Account(
+        id=id, account_number=f"N-{id}", account_type=account_type, account_name=id,
+        currency="TND", balance=balance, **fields,
+    )
+
+
+def test_safest_portfolio_reports_unscored_categories(client):
+    response = client.put("/api/alm/accounts", json=[account("C1", AccountType.CHECKING, 1_000.0, available_balance=500.0).model_dump(mode="json")])
+    assert response.status_code == 200
+    metrics = client.get("/api/alm/accounts/risk/portfolio").json()
+
+    assert (metrics["credit_risk_score"], metrics["liquidity_risk_score"], metrics["interest_rate_risk_score"]) == (100.0, 100.0, 100.0)
+    assert metrics["market_risk_score"] == metrics["operational_risk_score"] == 0.0
+    assert metrics["unscored_categories"] == ["market", "operational"]
+    assert metrics["overall_risk_score"] == pytest.approx(70.0)
+
+
+def test_overall_score_matches_the_frontend_risk_store(service):
+    service.accounts.upsert_accounts([
+        account("C1", AccountType.CHECKING, 1_000.0, available_balance=500.0),
+        account("M1", AccountType.MORTGAGE, -200_000.0, interest_rate=4.0, maturity_date=TODAY.replace(year=TODAY.year + 10)),
+    ])
+    metrics = service.accounts.get_portfolio_risk()
+
+    # calculatePortfolioRisk in frontend/src/utils/riskStore.ts, by hand:
+    # checking 100 / 100 (110 capped) / 100; mortgage 100-15-30 / 100-25 / 100-25-10-30
+    credit, liquidity, interest_rate = (100 + 55) / 2, (100 + 75) / 2, (100 + 35) / 2
+    assert (metrics.credit_risk_score, metrics.liquidity_risk_score, metrics.interest_rate_risk_score) == (credit, liquidity, interest_rate)
+    assert metrics.overall_risk_score == pytest.approx(0.3 * credit + 0.2 * liquidity + 0.2 * interest_rate)
+    assert metrics.overall_risk_score == pytest.approx(54.25)
+
+
+def test_only_new_or_changed_accounts_are_rescored(service):
+    checking = account("C1", AccountType.CHECKING, 1_000.0, available_balance=500.0)
+    loan = account("L1", AccountType.LOAN, -5_000.0, interest_rate=6.0)
+
+    assert service.accounts.upsert_accounts([checking, loan]) == {"received": 2, "rescored": 2}
+    assert service.accounts.upsert_accounts([checking, loan]) == {"received": 2, "rescored": 0}
+
+    changed = loan.model_copy(update={"interest_rate": 2.0})
+    assert service.accounts.upsert_accounts([checking, changed]) == {"received": 2, "rescored": 1}
+    scores = {a.risk_type.value: a.score for a in service.accounts.get_account_risk("L1")}
+    assert scores["interest_rate"] == 100 - 25
+
+
+def test_date_change_rescores_accounts_crossing_a_maturity_tier(service, monkeypatch):
+    service.accounts.upsert_accounts([
+        account("T1", AccountType.CERTIFICATE, 10_000.0, maturity_date=TODAY + timedelta(days=364)),
+        account("T2", AccountType.CERTIFICATE, 10_000.0, maturity_date=TODAY + timedelta(days=3_000)),
+    ])
+    # Pretend the scores were last brought up to date two days ago
+    service.repository.accounts.set_risk_scored_on(TODAY - timedelta(days=2))
+    rescored = []
+    score_accounts = service.accounts._score_accounts
+    monkeypatch.setattr(service.accounts, "_score_accounts", lambda rows, as_of: rescored.extend(r[0] for r in rows) or score_accounts(rows, as_of))
+
+    service.accounts.get_portfolio_risk()
+
+    assert rescored == ["T1"]
+    assert service.repository.accounts.risk_scored_on() == TODAY
+
+
+def test_remove_account_drops_its_scores(client):
+    client.put("/api/alm/accounts", json=[
+        account(id, AccountType.SAVINGS, 1_000.0).model_dump(mode="json") for id in ("S1", "S2")
+    ])
+
+    assert client.delete("/api/alm/accounts/S1").status_code == 200
+    assert client.get("/api/alm/accounts/S1/risk").status_code == 404
+    assert client.get("/api/alm/accounts/risk/portfolio").json()["accounts"] == 1
+    assert client.delete("/api/alm/accounts/S1").status_code == 404
+
+
+def test_remove_account_before_any_scoring(service):
+    service.repository.accounts.merge_accounts([account_to_row(account("S1", AccountType.SAVINGS, 1_000.0))])
+    assert service.repository.accounts.risk_scored_on() is None
+
+    assert service.accounts.remove_account("S1")
+    assert service.accounts.get_portfolio_risk().accounts == 0
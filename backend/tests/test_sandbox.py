@@ -0,0 +1,116 @@
+# tests/test_sandbox.py
+# This file tests what-if sandboxes against a full recompute of the changed book
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.alm.services import sandboxes as sandbox_module
+from app.alm.repository import SQLiteRepository
+from app.alm.service import ALMService
+
+from conftest import TODAY, position, replace_book
+
+
+def book():
+    return [
+        position("A1", "asset", "loans", 1_000_000.0, "TND", 0.5, rate=7.0),
+        position("A2", "asset", "bonds", 400_000.0, "USD", 3.0, rate=4.0),
+        position("A3", "asset", "loans", 250_000.0, "TND", 2.0, rate=6.0, fixed=False),
+        position("L1", "liability", "deposits", 900_000.0, "TND", 0.2, rate=2.0),
+        position("L2", "liability", "borrowings", 300_000.0, "EUR", 1.5, rate=3.0),
+    ]
+
+
+def changes():
+    """Added and amended positions, and the ID of a removed one."""
+    return [
+        position("A9", "asset", "bonds", 200_000.0, "TND", 0.8, rate=5.0),
+        position("L1", "liability", "deposits", 600_000.0, "TND", 0.2, rate=2.5),
+    ], "A3"
+
+
+def figures(result, side):
+    values = [getattr(f, side) for f in result.gap]
+    values += [getattr(f, side) for f in result.nii.values()]
+    values += [getattr(getattr(result, name), side) for name in ("liquidity_buffer", "deposit_outflows", "liquidity_coverage")]
+    return values
+
+
+def test_what_if_matches_a_full_recompute_of_the_changed_book(service):
+    replace_book(service, book())
+    added, removed = changes()
+    sandbox = service.sandboxes.create_sandbox(TODAY)
+    service.sandboxes.upsert_sandbox_positions(sandbox.id, added)
+    assert service.sandboxes.remove_sandbox_position(sandbox.id, removed).model_dump(include={"added", "removed"}) == {"added": 2, "removed": 1}
+
+    result = service.sandboxes.run_what_if(sandbox.id, deposit_runoff=0.1, haircut=0.2)
+
+    # The same figures from scratch, on a store holding the changed book
+    recompute = ALMService(SQLiteRepository(":memory:"))
+    changed = [p for p in book() if p.id not in {removed, "L1"}] + added
+    replace_book(recompute, changed)
+    expected = recompute.sandboxes.run_what_if(recompute.sandboxes.create_sandbox(TODAY).id, deposit_runoff=0.1, haircut=0.2)
+    recompute.close()
+
+    assert figures(result, "what_if") == pytest.approx(figures(expected, "base"))
+    assert [f.delta for f in result.gap] == pytest.approx([f.what_if - f.base for f in result.gap])
+
+
+def test_sandboxes_leave_the_stored_book_untouched(service):
+    replace_book(service, book())
+    sandbox = service.sandboxes.create_sandbox(TODAY)
+    service.sandboxes.upsert_sandbox_positions(sandbox.id, changes()[0])
+
+    assert sorted(p.id for p in service.positions.get_assets(TODAY) + service.positions.get_liabilities(TODAY)) == ["A1", "A2", "A3", "L1", "L2"]
+    empty = service.sandboxes.run_what_if(service.sandboxes.create_sandbox(TODAY).id)
+    assert figures(empty, "what_if") == pytest.approx(figures(empty, "base"))
+    assert service.sandboxes.run_what_if(sandbox.id).liquidity_buffer.base == empty.liquidity_buffer.base
+
+
+def test_base_results_are_computed_once_for_every_sandbox(service, monkeypatch):
+    replace_book(service, book())
+    sizes = []
+    engine = sandbox_module.NIIEngine
+
+    def counting(frame, *args, **kwargs):
+        sizes.append(len(frame))
+        return engine(frame, *args, **kwargs)
+    monkeypatch.setattr(sandbox_module, "NIIEngine", counting)
+
+    for _ in range(3):
+        sandbox = service.sandboxes.create_sandbox(TODAY)
+        service.sandboxes.upsert_sandbox_positions(sandbox.id, changes()[0])
+        service.sandboxes.run_what_if(sandbox.id)
+
+    assert sizes.count(len(book())) == 1
+
+
+def test_sandboxes_expire(service):
+    service.repository.sandboxes.create_sandbox("old", TODAY, datetime.now() - timedelta(days=2))
+    assert service.sandboxes.get_sandbox("old") is not None
+
+    service.sandboxes.create_sandbox(TODAY)
+
+    assert service.sandboxes.get_sandbox("old") is None
+
+
+def test_sandbox_endpoints(client):
+    sandbox = client.post("/api/alm/sandboxes", json={}).json()
+    assert sandbox["as_of_date"] == TODAY.isoformat()
+
+    added = changes()[0][0].model_dump(mode="json")
+    assert client.put(f"/api/alm/sandboxes/{sandbox['id']}/positions", json=[added]).json()["added"] == 1
+    assert client.delete(f"/api/alm/sandboxes/{sandbox['id']}/positions/A001").json()["removed"] == 1
+    result = client.get(f"/api/alm/sandboxes/{sandbox['id']}/what-if", params={"horizon_months": 6})
+    assert result.status_code == 200
+    assert list(result.json()["nii"])[0] == "base"
+
+    assert client.delete(f"/api/alm/sandboxes/{sandbox['id']}").status_code == 200
+    for response in (
+        client.get(f"/api/alm/sandboxes/{sandbox['id']}"),
+        client.get(f"/api/alm/sandboxes/{sandbox['id']}/what-if"),
+        client.put(f"/api/alm/sandboxes/{sandbox['id']}/positions", json=[added]),
+        client.delete(f"/api/alm/sandboxes/{sandbox['id']}"),
+    ):
+        assert response.status_code == 404
@@ -0,0 +1,75 @@
+# tests/test_sensitivity.py
+# This file tests the EVE / DV01 sensitivity engine, in particular its currency conversion
+
+import numpy as np
+import pytest
+
+from app.alm.curves import FX_SPOT, get_curve
+from app.alm.sensitivity import SensitivityEngine, generate_cash_flows
+
+from conftest import frame, position
+
+
+def engine_for(positions):
+    return SensitivityEngine(generate_cash_flows(frame(positions)))
+
+
+def test_single_flow_is_valued_in_the_base_currency():
+    # A floating USD position repricing in 3 months is one flow of principal plus accrued interest
+    engine = engine_for([position("A1", "asset", "bonds", 1_000.0, "USD", 2.0, rate=4.0, fixed=False)])
+    t = engine.cash_flows.t[0]
+    pv_usd = 1_000.0 * (1 + 0.04 * t) * get_curve("USD").discount_factors(np.array([t]))[0]
+
+    report = engine.run()
+    assert report["by_currency"]["USD"]["eve"] == pytest.approx(pv_usd * FX_SPOT["USD"])
+    assert report["total"]["eve"] == pytest.approx(pv_usd * FX_SPOT["USD"])
+
+
+def test_breakdowns_add_up_to_the_totals():
+    engine = engine_for([
+        position("A1", "asset", "loans", 1_000_000.0, "TND", 1.0, rate=5.5),
+        position("A2", "asset", "bonds", 500_000.0, "USD", 2.0, rate=3.2),
+        position("L1", "liability", "deposits", 800_000.0, "TND", 0.25, rate=2.5),
+        position("L2", "liability", "borrowings", 600_000.0, "EUR", 1.0, rate=3.0, fixed=False),
+    ])
+    report = engine.run()
+    native = engine.eve().sum(axis=1)
+    expected = sum(native[i] * FX_SPOT[ccy] for i, ccy in enumerate(engine.frame.currencies))
+
+    assert report["total"]["eve"] == pytest.approx(expected)
+    for field in ("eve", "dv01"):
+        assert sum(b[field] for b in report["by_currency"].values()) == pytest.approx(report["total"][field])
+        assert sum(b[field] for b in report["by_category"].values()) == pytest.approx(report["total"][field])
+    assert np.sum([b["key_rate_dv01"] for b in report["by_currency"].values()], axis=0) == pytest.approx(report["total"]["key_rate_dv01"])
+    # The EUR borrowing outweighs the TND book once converted
+    assert report["total"]["eve"] < 0
+
+
+def test_shocks_are_converted():
+    engine = engine_for([position("A1", "asset", "bonds", 1_000.0, "EUR", 5.0)])
+    report = engine.run(shocks_bp=(200.0,))
+
+    assert report["eve_shocks"]["+200bp"] == pytest.approx(engine.parallel_shift(0.02).sum() * FX_SPOT["EUR"])
+
+
+def test_key_rates_add_up_to_the_parallel_dv01():
+    engine = engine_for([
+        position("A1", "asset", "loans", 1_000.0, "TND", 3.0, rate=5.0),
+        position("L1", "liability", "deposits", 600.0, "TND", 0.5, rate=2.0),
+    ])
+    report = engine.run()
+
+    # Key-rate weights interpolate between tenors and sum to one for every flow
+    assert sum(report["total"]["key_rate_dv01"]) == pytest.approx(report["total"]["dv01"], rel=1e-3)
+    # A long asset book loses value when rates rise, so its DV01 is positive
+    assert report["total"]["dv01"] > 0
+
+
+def test_sensitivity_endpoint(client):
+    response = client.get("/api/alm/sensitivity", params={"bump_bp": 10})
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["bump_bp"] == 10
+    assert set(report["by_currency"]) == {"TND", "USD", "EUR"}
+    assert set(report["eve_shocks"]) == {"+200bp", "-200bp"}
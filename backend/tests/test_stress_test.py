@@ -0,0 +1,37 @@
+# tests/test_stress_test.py
+# This file tests the scenario stress tests and their HTTP endpoint
+
+import pytest
+
+from app.alm.nii import NIIEngine, parallel_scenario
+
+from conftest import TODAY
+
+
+def test_rate_scenario_reports_its_nii_impact(service, client):
+    response = client.post("/api/alm/stress-test/run", params={"scenario_id": "S001"})
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result["risk_type"] == "interest_rate" and 0 <= result["impact_level"] <= 100
+    engine = NIIEngine(service.positions.get_position_frame(TODAY))
+    nii = engine.project(12, {"base": parallel_scenario(0.0), "up": parallel_scenario(200.0)})["nii"].sum(axis=1)
+    assert result["impact_metrics"]["nii_impact_pct"] == pytest.approx(100.0 * (nii[1] - nii[0]) / abs(nii[0]), abs=0.01)
+    # The same figures as the dashboard line for the scenario
+    dashboard = service.build_dashboard(TODAY).recent_stress_tests[0]
+    assert (result["id"], result["description"]) == (dashboard.id, dashboard.description)
+    assert result["impact_metrics"]["eve_change"] == pytest.approx(dashboard.impact_metrics["eve_change"])
+
+
+def test_liquidity_scenario(client):
+    response = client.post("/api/alm/stress-test/run", params={"scenario_id": "S002"})
+
+    assert response.status_code == 200
+    metrics = response.json()["impact_metrics"]
+    assert metrics["deposit_outflows"] == pytest.approx(160_000)
+    assert metrics["net_liquidity"] == pytest.approx(metrics["liquidity_buffer"] - 160_000)
+    assert "nii_impact_pct" not in metrics
+
+
+def test_unknown_scenario(client):
+    assert client.post("/api/alm/stress-test/run", params={"scenario_id": "S999"}).status_code == 404
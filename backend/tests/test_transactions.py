@@ -0,0 +1,144 @@
+# tests/test_transactions.py
+# This file tests the append-only transaction log and its flow rollups against flows recomputed from scratch
+
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.alm.models import Account, AccountType, Transaction, TransactionStatus, TransactionType
+
+START = date(2024, 1, 1)
+
+
+def transaction(id: str, day: date, amount: float, from_account: str = None, to_account: str = None, **fields) -> Transaction:
+    kind = TransactionType.TRANSFER if from_account and to_account else TransactionType.DEPOSIT if to_account else TransactionType.WITHDRAWAL
+    return Transaction(
+        id=id, type=kind, from_account_id=from_account, to_account_id=to_account, amount=amount,
+        currency="TND", date=datetime.combine(day, datetime.min.time()) + timedelta(hours=10), **fields,
+    )
+
+
+def expected_series(transactions, account_id, length, start, end):
+    """Opening balance and (period, inflow, outflow, count, balance) buckets recomputed from the whole log."""
+    legs = []
+    for t in transactions:
+        if t.status != TransactionStatus.COMPLETED:
+            continue
+        if t.from_account_id == account_id:
+            legs.append((t.date.date(), -t.amount))
+        if t.to_account_id == account_id:
+            legs.append((t.date.date(), t.amount))
+    first, last = start.isoformat()[:length], end.isoformat()[:length]
+    opening = sum(amount for day, amount in legs if day.isoformat()[:length] < first)
+    buckets = {}
+    for day, amount in legs:
+        period = day.isoformat()[:length]
+        if first <= period <= last:
+            inflow, outflow, count = buckets.get(period, (0.0, 0.0, 0))
+            buckets[period] = (inflow + max(amount, 0.0), outflow + max(-amount, 0.0), count + 1)
+    series, balance = [], opening
+    for period in sorted(buckets):
+        inflow, outflow, count = buckets[period]
+        balance += inflow - outflow
+        series.append((period, inflow, outflow, count, balance))
+    return opening, series
+
+
+def as_tuples(series):
+    return series.opening_balance, [(b.period, b.inflow, b.outflow, b.count, b.balance) for b in series.buckets]
+
+
+def test_account_flows_and_running_balance(service):
+    service.transactions.append_transactions([
+        transaction("T1", START, 1_000.0, to_account="A"),
+        transaction("T2", START + timedelta(days=1), 300.0, from_account="A", to_account="B"),
+        transaction("T3", START + timedelta(days=3), 200.0, from_account="A"),
+    ])
+
+    series = service.transactions.get_flow_series("day", START + timedelta(days=1), START + timedelta(days=5), account_id="A")
+
+    assert series.opening_balance == 1_000.0
+    assert [(b.period, b.net, b.balance) for b in series.buckets] == [
+        ("2024-01-02", -300.0, 700.0),
+        ("2024-01-04", -200.0, 500.0),
+    ]
+    assert [t.id for t in service.transactions.get_account_transactions("B")] == ["T2"]
+
+
+def test_back_dated_appends_shift_later_balances(service):
+    service.transactions.append_transactions([transaction("T2", date(2024, 3, 10), 500.0, to_account="A")])
+    service.transactions.append_transactions([transaction("T1", date(2024, 1, 5), 200.0, to_account="A")])
+
+    monthly = service.transactions.get_flow_series("month", date(2024, 1, 1), date(2024, 12, 31), account_id="A")
+
+    assert [(b.period, b.balance) for b in monthly.buckets] == [("2024-01", 200.0), ("2024-03", 700.0)]
+
+
+def test_rollups_match_a_full_recomputation_in_any_append_order(service):
+    rng = random.Random(7)
+    accounts = ["A", "B", "C"]
+    log = []
+    for i in range(400):
+        debited, credited = rng.sample(accounts + [None], 2)
+        if debited is None and credited is None:
+            credited = "A"
+        status = TransactionStatus.COMPLETED if rng.random() < 0.9 else TransactionStatus.PENDING
+        log.append(transaction(
+            f"T{i}", START + timedelta(days=rng.randrange(300)), round(rng.uniform(1, 1_000), 2),
+            from_account=debited, to_account=credited, status=status,
+        ))
+    shuffled = log[:]
+    rng.shuffle(shuffled)
+    for i in range(0, len(shuffled), 37):
+        service.transactions.append_transactions(shuffled[i:i + 37])
+
+    start, end = START + timedelta(days=40), START + timedelta(days=250)
+    for account_id in accounts:
+        for granularity, length in (("day", 10), ("month", 7)):
+            opening, buckets = as_tuples(service.transactions.get_flow_series(granularity, start, end, account_id=account_id))
+            expected_opening, expected = expected_series(log, account_id, length, start, end)
+            assert opening == pytest.approx(expected_opening)
+            assert [b[:4] for b in buckets] == [pytest.approx(b[:4]) for b in expected]
+            assert [b[4] for b in buckets] == pytest.approx([b[4] for b in expected])
+
+
+def test_replayed_transactions_are_skipped(service):
+    batch = [transaction("T1", START, 100.0, to_account="A"), transaction("T2", START, 50.0, from_account="A")]
+    assert service.transactions.append_transactions(batch) == {"received": 2, "appended": 2, "duplicates": 0}
+    assert service.transactions.append_transactions(batch) == {"received": 2, "appended": 0, "duplicates": 2}
+
+    series = service.transactions.get_flow_series("day", START, START, account_id="A")
+    assert [(b.count, b.balance) for b in series.buckets] == [(2, 50.0)]
+
+
+def test_product_flows_group_accounts_by_type_and_currency(service):
+    service.accounts.upsert_accounts([
+        Account(id=id, account_number=id, account_type=AccountType.SAVINGS, account_name=id, currency="TND", balance=0.0)
+        for id in ("S1", "S2")
+    ])
+    service.transactions.append_transactions([
+        transaction("T1", START, 100.0, to_account="S1"),
+        transaction("T2", START, 40.0, from_account="S1", to_account="S2"),
+        transaction("T3", START, 25.0, to_account="X"),
+    ])
+
+    savings = service.transactions.get_flow_series("day", START, START, product="Savings", currency="TND")
+    other = service.transactions.get_flow_series("day", START, START, product="Other", currency="TND")
+
+    assert [(b.inflow, b.outflow, b.count, b.balance) for b in savings.buckets] == [(140.0, 40.0, 3, 100.0)]
+    assert [b.balance for b in other.buckets] == [25.0]
+
+
+def test_transaction_endpoints(client):
+    response = client.post("/api/alm/transactions", json=[transaction("T1", START, 100.0, to_account="A").model_dump(mode="json")])
+    assert response.status_code == 200
+    assert response.json()["appended"] == 1
+
+    flows = client.get("/api/alm/accounts/A/flows", params={"granularity": "month", "start": "2024-01-01", "end": "2024-06-30"})
+    assert flows.status_code == 200
+    assert flows.json()["buckets"][0]["balance"] == 100.0
+
+    assert client.get("/api/alm/accounts/A/flows", params={"granularity": "week"}).status_code == 400
+    bad = transaction("T2", START, 10.0, from_account="A", to_account="A").model_dump(mode="json")
+    assert client.post("/api/alm/transactions", json=[bad]).status_code == 400
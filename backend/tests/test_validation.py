@@ -0,0 +1,129 @@
+# tests/test_validation.py
+# This file tests the column-wise validation of position loads and its anomaly report
+
+import io
+from datetime import timedelta
+
+import pyarrow as pa
+import pytest
+
+from app.alm.export import import_positions
+from app.alm.extraction import Extract, SourceConnector
+from app.alm.models import DataSource
+from app.alm.validation import PositionValidator
+
+from conftest import TODAY
+
+MATURITY = (TODAY + timedelta(days=365)).isoformat()
+
+
+def row(id="P1", type="asset", category="loans", amount=100.0, currency="TND", maturity=MATURITY, rate=3.0, fixed=1, counterparty=None):
+    return (id, type, category, amount, currency, maturity, rate, fixed, counterparty)
+
+
+def issues(validator):
+    return {(i["rule"], i["field"], i["action"]): i for i in validator.report.to_dict()["issues"]}
+
+
+def test_valid_rows_come_out_in_stored_form():
+    validator = PositionValidator(TODAY)
+    rows = list(validator.rows([row(fixed="true", counterparty=""), row("P2", amount="250", rate="4.5", fixed="0")]))
+
+    assert rows == [
+        ("P1", "asset", "loans", 100.0, "TND", MATURITY, 3.0, 1, None),
+        ("P2", "asset", "loans", 250.0, "TND", MATURITY, 4.5, 0, None),
+    ]
+    assert validator.report.to_dict() == {"checked": 2, "rejected": 0, "corrected": 0, "issues": []}
+
+
+@pytest.mark.parametrize("bad, rule, field", [
+    (row(id=""), "missing", "id"),
+    (row("BAD", type="equity"), "unknown_value", "type"),
+    (row("BAD", category="crypto"), "unknown_value", "category"),
+    (row("BAD", currency="XYZ"), "unknown_value", "currency"),
+    (row("BAD", amount="n/a"), "not_a_number", "amount"),
+    (row("BAD", amount=-5.0), "negative", "amount"),
+    (row("BAD", rate=75.0), "out_of_range", "interest_rate"),
+    (row("BAD", fixed="maybe"), "not_a_boolean", "fixed_rate"),
+    (row("BAD", maturity="2024-13-45"), "invalid_date", "maturity_date"),
+    (row("BAD", maturity=(TODAY - timedelta(days=1)).isoformat()), "matured", "maturity_date"),
+    (row("BAD", maturity=(TODAY + timedelta(days=365 * 150)).isoformat()), "out_of_range", "maturity_date"),
+])
+def test_each_rule_rejects_and_reports_the_row(bad, rule, field):
+    validator = PositionValidator(TODAY)
+    accepted = list(validator.rows([row("OK"), bad]))
+
+    assert [r[0] for r in accepted] == ["OK"]
+    issue = issues(validator)[(rule, field, "rejected")]
+    assert issue["count"] == 1 and issue["rows"] == [1]
+    assert validator.report.rejected == 1
+
+
+def test_a_row_is_only_reported_for_its_first_failure():
+    validator = PositionValidator(TODAY)
+    list(validator.rows([row(currency="XYZ", amount=-1.0, rate=99.0)]))
+
+    assert list(issues(validator)) == [("unknown_value", "currency", "rejected")]
+
+
+def test_duplicates_are_caught_across_chunks():
+    validator = PositionValidator(TODAY, chunk_size=2)
+    accepted = list(validator.rows([row("P1"), row("P2"), row("P1"), row("P3")]))
+
+    assert [r[0] for r in accepted] == ["P1", "P2", "P3"]
+    assert issues(validator)[("duplicate", "id", "rejected")]["rows"] == [2]
+    assert validator.rejected_ids == ["P1"]
+
+
+def test_corrections_are_applied_and_counted():
+    validator = PositionValidator(TODAY, corrections=["normalize_codes", "absolute_amount"])
+    accepted = list(validator.rows([row(type=" Asset", category="LOANS ", currency="tnd", amount=-100.0)]))
+
+    assert accepted == [row()]
+    assert validator.report.corrected == 1
+    assert {key[:2] for key in issues(validator)} == {
+        ("normalized", "type"), ("normalized", "category"), ("normalized", "currency"), ("negative", "amount"),
+    }
+    with pytest.raises(ValueError):
+        PositionValidator(TODAY, corrections=["guess"])
+
+
+def test_arrow_imports_are_validated_from_the_batch_columns(repository):
+    table = pa.table({
+        "id": ["P1", "P2"], "type": ["asset", "asset"], "category": ["loans", "loans"],
+        "amount": [100.0, -1.0], "currency": ["TND", "TND"],
+        "maturity_date": pa.array([TODAY + timedelta(days=365)] * 2, pa.date32()),
+        "interest_rate": [3.0, 3.0], "fixed_rate": [True, False],
+    })
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    changes, validator = import_positions(repository.positions, io.BytesIO(sink.getvalue()), "arrow", TODAY)
+
+    assert [p.id for p in repository.positions.load_positions(TODAY)] == ["P1"]
+    assert repository.positions.load_positions(TODAY)[0].counterparty is None
+    assert issues(validator)[("negative", "amount", "rejected")]["ids"] == ["P2"]
+
+
+class FeedConnector(SourceConnector):
+    def __init__(self, rows):
+        self.feed = rows
+
+    def extract(self, since, as_of_date):
+        return Extract(self.feed, complete=True)
+
+
+def test_complete_extract_keeps_the_stored_version_of_rejected_rows(repository):
+    from app.alm.service import ALMService
+
+    connector = FeedConnector([row("P1"), row("P2", amount=200.0)])
+    service = ALMService(repository, connectors={"Feed": connector})
+    repository.sources.save_datasources([DataSource(name="Feed", source_type="api", connection_params={})])
+    service.sources.extract_data("Feed", TODAY)
+
+    connector.feed = [row("P1", currency="XYZ")]
+    result = service.sources.extract_data("Feed", TODAY + timedelta(days=1))
+    assert (result.anomalies.rejected, result.deleted) == (1, 1)
+    # P1 failed validation so its previous version stays; P2 left the feed
+    assert [p.id for p in service.positions.get_assets(TODAY + timedelta(days=1)) if p.id.startswith("P")] == ["P1"]
+    service.behaviour.close()